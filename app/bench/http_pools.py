@@ -0,0 +1,145 @@
+"""Бенчмарк пулов HTTP: ответы на кнопки во время загрузок.
+
+Запуск из каталога ``app``::
+
+    python -m bench.http_pools --uploads 12 --upload-time 0.5 --answers 20
+
+Stand-in Bot API (http.server в потоке) держит каждую загрузку
+``--upload-time`` секунд, остальные методы отвечает сразу. Пока ``--uploads``
+задач без перерыва шлют документы, меряется латентность answerCallbackQuery
+двумя способами: один общий HTTPXRequest на все вызовы (как было) и
+``core.http.bot_request`` с отдельными пулами. Общий пул — того же размера,
+что оба раздельных вместе.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from time import perf_counter
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+MESSAGE = {
+    "message_id": 1,
+    "date": 0,
+    "chat": {"id": 1, "type": "channel"},
+    "document": {"file_id": "f", "file_unique_id": "u"},
+}
+
+
+def make_handler(upload_time: float) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self) -> None:  # noqa: N802
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            method = self.path.rsplit("/", 1)[-1]
+            if method == "getMe":
+                result: object = {"id": 1, "is_bot": True, "first_name": "bench"}
+            elif method == "sendDocument":
+                # медленный аплинк: соединение занято, пока «идут» байты
+                time.sleep(upload_time)
+                result = MESSAGE
+            else:
+                result = True
+            payload = json.dumps({"ok": True, "result": result}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args: object) -> None:
+            pass
+
+    return Handler
+
+
+async def run_mode(base: str, request: object, uploads: int, answers: int) -> list:
+    from telegram import Bot
+
+    bot = Bot("0:bench", base_url=f"{base}/bot", request=request)
+    done = asyncio.Event()
+
+    async def uploader() -> None:
+        while not done.is_set():
+            await bot.send_document(1, io.BytesIO(os.urandom(64 * 1024)), "a.bin")
+
+    latencies = []
+    async with bot:
+        tasks = [asyncio.create_task(uploader()) for _ in range(uploads)]
+        # загрузки успевают занять пул
+        await asyncio.sleep(0.2)
+        for _ in range(answers):
+            t = perf_counter()
+            await bot.answer_callback_query("1")
+            latencies.append(perf_counter() - t)
+            await asyncio.sleep(0.05)
+        done.set()
+        await asyncio.gather(*tasks)
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uploads", type=int, default=12, help="параллельных загрузок")
+    parser.add_argument("--upload-time", type=float, default=0.5, help="секунд")
+    parser.add_argument("--answers", type=int, default=20)
+    parser.add_argument("--pool", type=int, default=8, help="интерактивный пул")
+    parser.add_argument("--upload-pool", type=int, default=4)
+    args = parser.parse_args()
+
+    os.environ["TGBOT_HTTP_POOL_SIZE"] = str(args.pool)
+    os.environ["TGBOT_HTTP_UPLOAD_POOL_SIZE"] = str(args.upload_pool)
+    # очередь в пуле загрузок здесь нарочно — предупреждения о ней не нужны
+    os.environ.setdefault("LOG_LEVEL", "ERROR")
+    sys.path.insert(0, str(APP_DIR))
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    from telegram.request import HTTPXRequest
+
+    from core.http import bot_request
+
+    shared_size = args.pool + args.upload_pool
+    modes = {
+        f"shared pool ({shared_size})": lambda: HTTPXRequest(
+            connection_pool_size=shared_size, pool_timeout=None
+        ),
+        f"split pools ({args.pool}+{args.upload_pool})": bot_request,
+    }
+    print(
+        f"{args.uploads} uploads x {args.upload_time}s in flight, "
+        f"{args.answers} answerCallbackQuery"
+    )
+    for label, factory in modes.items():
+        server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.upload_time))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        try:
+            ms = sorted(
+                x * 1000
+                for x in asyncio.run(
+                    run_mode(base, factory(), args.uploads, args.answers)
+                )
+            )
+        finally:
+            server.shutdown()
+        print(
+            f"{label:>22}: p50 {ms[len(ms) // 2]:.0f} ms, "
+            f"p99 {ms[min(len(ms) - 1, int(0.99 * len(ms)))]:.0f} ms, "
+            f"max {ms[-1]:.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Бенчмарк стоимости вызова логгера.
+
+Запуск из каталога ``app``::
+
+    python -m bench.log_calls --calls 20000
+
+Сравнивает прежнюю схему (синхронный StreamHandler, callsite на каждом
+вызове) с текущей (QueueHandler + листенер, callsite только от WARNING,
+подавление повторов). Вывод идёт в /dev/null, меряется время в вызывающем
+потоке — именно его платит event loop.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import queue
+from logging.handlers import QueueListener
+from time import perf_counter
+
+import structlog
+
+from config.logger import PassThroughQueueHandler, build_processors, build_renderer
+
+VARIANTS = {
+    "before: sync + callsite always": dict(
+        use_queue=False, callsite_min_level="NOTSET", callsite_sample=1.0, window=0
+    ),
+    "sync + sampled callsite": dict(
+        use_queue=False, callsite_min_level="WARNING", callsite_sample=0.0, window=60
+    ),
+    "after: queue + sampled callsite": dict(
+        use_queue=True, callsite_min_level="WARNING", callsite_sample=0.0, window=60
+    ),
+}
+
+
+def make_logger(
+    name: str,
+    use_queue: bool,
+    callsite_min_level: str,
+    callsite_sample: float,
+    window: float,
+):
+    chain, foreign = build_processors(
+        ecs=False,
+        callsite_min_level=callsite_min_level,
+        callsite_sample=callsite_sample,
+        rate_limit_window=window,
+    )
+    sink = logging.StreamHandler(open(os.devnull, "w"))
+    sink.setFormatter(
+        structlog.stdlib.ProcessorFormatter(
+            processor=build_renderer(False), foreign_pre_chain=foreign
+        )
+    )
+
+    std = logging.getLogger(f"bench.{name}")
+    std.handlers.clear()
+    std.propagate = False
+    std.setLevel(logging.INFO)
+
+    listener = None
+    if use_queue:
+        q: queue.SimpleQueue = queue.SimpleQueue()
+        listener = QueueListener(q, sink)
+        listener.start()
+        std.addHandler(PassThroughQueueHandler(q))
+    else:
+        std.addHandler(sink)
+
+    log = structlog.wrap_logger(
+        std,
+        processors=[*chain, structlog.stdlib.ProcessorFormatter.wrap_for_formatter],
+        wrapper_class=structlog.stdlib.BoundLogger,
+    )
+    return log, listener
+
+
+def run(calls: int, variant: dict) -> tuple[float, float, float]:
+    log, listener = make_logger(str(id(variant)), **variant)
+
+    t = perf_counter()
+    for i in range(calls):
+        log.info("Post previewed", folder=f"post_{i}", images=i % 10)
+    info_us = (perf_counter() - t) / calls * 1e6
+
+    t = perf_counter()
+    for i in range(calls):
+        log.warning("Cannot open %s: %s", f"/posts/{i}.jpg", "EACCES")
+    warn_us = (perf_counter() - t) / calls * 1e6
+
+    # сколько листенер дорисовывает уже после возврата вызовов
+    t = perf_counter()
+    if listener:
+        listener.stop()
+    drain_ms = (perf_counter() - t) * 1000
+    return info_us, warn_us, drain_ms
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(
+        f"{'variant':34} {'info, us/call':>14} {'warn, us/call':>14}"
+        f" {'drain, ms':>10}"
+    )
+    for name, variant in VARIANTS.items():
+        info_us, warn_us, drain_ms = run(args.calls, variant)
+        print(f"{name:34} {info_us:14.2f} {warn_us:14.2f} {drain_ms:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
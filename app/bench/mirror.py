@@ -0,0 +1,201 @@
+"""Проверка рабочей копии S3 (``StorageMirror``) на заглушке клиента boto3.
+
+Запуск из каталога ``app``::
+
+    python -m bench.mirror
+
+Бакет — словарь в памяти за тем же интерфейсом, что дёргает ``S3Storage``
+(постраничный list_objects_v2, get_object, delete_objects), так что
+проверяются и бэкенд, и зеркало, без сети и без boto3. Сценарий:
+пачки по ``--batch`` постов и окно рабочей копии, холостой sync, изменённый
+и удалённый файл, пост, удалённый в бакете мимо бота, и опубликованный пост,
+который не должен воскреснуть. Каждая проверка печатается; код выхода 1,
+если хоть одна не прошла.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import io
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+BUCKET = "posts"
+PREFIX = "incoming/"
+
+
+class StubS3Client:
+    """Бакет в памяти; листинг режется на страницы по ``page_size`` ключей."""
+
+    def __init__(self, page_size: int) -> None:
+        self.objects: dict[str, bytes] = {}
+        self.page_size = page_size
+        self.gets = 0
+
+    def put(self, key: str, body: bytes) -> None:
+        self.objects[PREFIX + key] = body
+
+    def delete(self, key: str) -> None:
+        self.objects.pop(PREFIX + key, None)
+
+    def head_bucket(self, Bucket: str) -> dict:
+        return {}
+
+    def get_paginator(self, name: str) -> StubS3Client:
+        assert name == "list_objects_v2", name
+        return self
+
+    def paginate(self, Bucket: str, Prefix: str):
+        keys = sorted(k for k in self.objects if k.startswith(Prefix))
+        for i in range(0, max(len(keys), 1), self.page_size):
+            page = keys[i : i + self.page_size]
+            yield {
+                "Contents": [
+                    {
+                        "Key": k,
+                        "Size": len(self.objects[k]),
+                        "ETag": f'"{hashlib.md5(self.objects[k]).hexdigest()}"',
+                    }
+                    for k in page
+                ]
+            }
+
+    def get_object(self, Bucket: str, Key: str) -> dict:
+        self.gets += 1
+        return {"Body": io.BytesIO(self.objects[Key])}
+
+    def delete_objects(self, Bucket: str, Delete: dict) -> dict:
+        for obj in Delete["Objects"]:
+            self.objects.pop(obj["Key"], None)
+        return {}
+
+
+class Checks:
+    def __init__(self) -> None:
+        self.failed = 0
+
+    def __call__(self, name: str, ok: bool, detail: object = "") -> None:
+        self.failed += not ok
+        suffix = f"  ({detail})" if detail else ""
+        print(f"{'ok  ' if ok else 'FAIL'} {name}{suffix}")
+
+
+def run(root: Path, posts: int, batch: int, window: int) -> int:
+    from core.storage.mirror import StorageMirror
+    from core.storage.s3 import S3Storage
+    from storages.mirror_state import MirrorStateStore
+
+    client = StubS3Client(page_size=5)
+    for i in range(posts):
+        client.put(f"p{i}/meta.json", b'{"title": "t%d"}' % i)
+        for j in range(3):
+            client.put(f"p{i}/{j}.jpg", os.urandom(2048))
+    # глубже поста и вне префикса — не посты
+    client.put("p0/deep/x.jpg", b"x")
+    client.objects["other/q/meta.json"] = b"{}"
+
+    storage = S3Storage(BUCKET, PREFIX)
+    storage._client_obj = client
+    state = MirrorStateStore(root / ".bot" / "mirror.json")
+    (root / ".bot").mkdir(parents=True)
+    mirror = StorageMirror(storage, root, state, workers=4, batch=batch)
+    check = Checks()
+
+    def local() -> list[str]:
+        return sorted(p.name for p in root.iterdir() if not p.name.startswith("."))
+
+    # окно: не больше window постов без .lock, пачками по batch
+    first = mirror.sync(window)
+    check(
+        "first sync fills one batch",
+        first.posts == min(batch, window) and first.pending > 0,
+        first,
+    )
+    while mirror.sync(window).pending:
+        pass
+    check("window bounds the working copy", len(local()) == window, local())
+    check(
+        "post files mirrored, deep keys skipped",
+        sorted(f.name for f in (root / "p0").iterdir())
+        == ["0.jpg", "1.jpg", "2.jpg", "meta.json"],
+    )
+
+    gets = client.gets
+    idle = mirror.sync(window)
+    check(
+        "idle sync downloads nothing",
+        client.gets == gets and idle.posts == 0 and idle.waiting == posts - window,
+        idle,
+    )
+
+    # решение по карточке (.lock) освобождает место в окне
+    for name in local()[:batch]:
+        (root / name / ".lock").write_text("token")
+    grown = mirror.sync(window)
+    check("locked posts free the window", grown.posts == batch, grown)
+
+    # изменённый и удалённый файл: качается только изменившееся, .lock цел
+    client.put("p1/0.jpg", b"new")
+    client.delete("p1/2.jpg")
+    gets = client.gets
+    changed = mirror.sync(window)
+    check(
+        "incremental update",
+        client.gets == gets + 1
+        and (root / "p1" / "0.jpg").read_bytes() == b"new"
+        and not (root / "p1" / "2.jpg").exists()
+        and (root / "p1" / ".lock").exists(),
+        changed,
+    )
+
+    # пост удалили в бакете мимо бота — уходит и из рабочей копии
+    for name in ("meta.json", "0.jpg", "1.jpg", "2.jpg"):
+        client.delete(f"p2/{name}")
+    gone = mirror.sync(window)
+    check(
+        "post deleted in bucket is removed",
+        gone.removed == 1 and not (root / "p2").exists(),
+        gone,
+    )
+
+    # опубликован: удалён в бакете и локально, листинг его не вернёт
+    mirror.remove("p3")
+    left = [k for k in client.objects if k.startswith(f"{PREFIX}p3/")]
+    mirror.sync(window)
+    check(
+        "published post removed and not re-downloaded",
+        not left and not (root / "p3").exists(),
+        left,
+    )
+    check(
+        "state tracks the working copy",
+        sorted(state.load().files) == local(),
+        sorted(state.load().files),
+    )
+    check("staging cleaned up", not any((root / ".mirror").glob("*")))
+    return check.failed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=12, help="постов в бакете")
+    parser.add_argument("--batch", type=int, default=2, help="SCAN_BATCH зеркала")
+    parser.add_argument("--window", type=int, default=5, help="окно без .lock")
+    args = parser.parse_args()
+
+    os.environ["TGBOT_BOT_TOKEN"] = "0:mirror"
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    sys.path.insert(0, str(APP_DIR))
+    with tempfile.TemporaryDirectory() as tmp:
+        failed = run(Path(tmp), args.posts, args.batch, args.window)
+    print("state:", "OK" if not failed else f"{failed} check(s) failed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,540 @@
+"""Нагрузочный прогон апдейтов через хендлеры бота.
+
+Запуск из каталога ``app``::
+
+    python -m bench.replay updates.jsonl --speedup 10 --api-latency 0.05
+    python -m bench.replay --synthetic 200
+
+Апдейты — запись ``TGBOT_RECORD_UPDATES`` (см. ``core.recorder``) или
+синтетический поток нажатий (``--synthetic N`` папок). Бот собирается теми же
+``build_application``/``register_handlers``, что и в ``main``, но ходит в
+поддельный Bot API в памяти, а POSTS_ROOT — временный, с папками, на которые
+ссылается запись. Перед прогоном полный скан выдаёт карточки, и токены и
+job_id из записи на лету переводятся на выданные заново.
+
+Отчёт: латентность от постановки апдейта в очередь до конца обработки (p50/p99
+по типу апдейта), /timings по хендлерам, ошибки и проверка согласованности
+состояния — TOKENS, файлов .lock и стора расписания.
+
+Настройки бота — через окружение как обычно (``TGBOT_CONCURRENT_UPDATES``,
+``TGBOT_PUBLISH_CONCURRENCY``…); лимит отправок по умолчанию снят.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import copy
+import io
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from time import monotonic, perf_counter, time
+from types import SimpleNamespace
+
+from telegram.request import BaseRequest, RequestData
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+JOB_ACTIONS = frozenset({"cancel_job", "view_job"})
+SYNTHETIC_USER = 1001
+
+# сценарии нажатий по одной карточке; "@text" — ввод даты после schedule_input
+SCENARIOS = (
+    ("approve", "publish_now"),
+    ("approve", "schedule_in:60"),
+    ("skip",),
+    ("approve", "schedule_input", "@text"),
+    # двойные нажатия
+    ("approve", "approve", "publish_now", "publish_now"),
+    ("approve", "schedule_in:600", "cancel_job"),
+    ("cancel",),
+)
+
+
+class FakeBotAPI(BaseRequest):
+    """Bot API в памяти: правдоподобные ответы с задержкой, без сети."""
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0) -> None:
+        self.latency = latency
+        self.error_rate = error_rate
+        self.calls: Counter[str] = Counter()
+        self._message_ids = itertools.count(1)
+
+    @property
+    def read_timeout(self) -> float | None:
+        return None
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    async def do_request(
+        self,
+        url: str,
+        method: str,
+        request_data: RequestData | None = None,
+        read_timeout=None,
+        write_timeout=None,
+        connect_timeout=None,
+        pool_timeout=None,
+    ) -> tuple[int, bytes]:
+        name = url.rsplit("/", 1)[-1]
+        self.calls[name] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency * random.uniform(0.5, 1.5))
+        if name != "getMe" and random.random() < self.error_rate:
+            self.calls["429"] += 1
+            return 429, _dumps(
+                {
+                    "ok": False,
+                    "error_code": 429,
+                    "description": "Too Many Requests: retry after 1",
+                    "parameters": {"retry_after": 1},
+                }
+            )
+        params = request_data.parameters if request_data else {}
+        return 200, _dumps({"ok": True, "result": self._result(name, params)})
+
+    def _result(self, name: str, params: dict) -> object:
+        if name == "getMe":
+            return {
+                "id": 1,
+                "is_bot": True,
+                "first_name": "replay",
+                "username": "replay_bot",
+            }
+        if name == "sendMediaGroup":
+            return [
+                {**self._message(params), **self._file(item)}
+                for item in params.get("media", [])
+            ]
+        if name.startswith(("send", "edit", "copy", "forward")):
+            return self._message(params)
+        return True
+
+    def _file(self, item: dict) -> dict:
+        # по file_id (предзагрузка) он же и возвращается, иначе — новый
+        media = item.get("media")
+        file_id = media if isinstance(media, str) and "://" not in media else None
+        file_id = file_id or f"file{next(self._message_ids)}"
+        ref = {"file_id": file_id, "file_unique_id": file_id}
+        if item.get("type") == "document":
+            return {"document": ref}
+        return {"photo": [{**ref, "width": 320, "height": 240}]}
+
+    def _message(self, params: dict) -> dict:
+        chat_id = params.get("chat_id")
+        return {
+            "message_id": params.get("message_id") or next(self._message_ids),
+            "date": int(time()),
+            "chat": {
+                "id": chat_id if isinstance(chat_id, int) else -1000000000001,
+                "type": "private" if isinstance(chat_id, int) else "channel",
+            },
+            "text": params.get("text") or "",
+        }
+
+
+def _dumps(payload: dict) -> bytes:
+    return json.dumps(payload, ensure_ascii=False).encode()
+
+
+# --- входной поток ---------------------------------------------------------
+
+
+def load_records(path: Path, max_gap: float) -> list[dict]:
+    """Записи с ``at`` от начала; паузы длиннее ``max_gap`` сжимаются до него."""
+    with path.open(encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    records.sort(key=lambda r: r["at"])
+    prev, at = None, 0.0
+    for rec in records:
+        if prev is not None:
+            at += min(rec["at"] - prev, max_gap)
+        prev, rec["at"] = rec["at"], at
+    return records
+
+
+def _user(uid: int) -> dict:
+    return {"id": uid, "is_bot": False, "first_name": "admin"}
+
+
+def _message(uid: int, message_id: int, text: str) -> dict:
+    msg = {
+        "message_id": message_id,
+        "date": int(time()),
+        "chat": {"id": uid, "type": "private"},
+        "from": _user(uid),
+        "text": text,
+    }
+    if text.startswith("/"):
+        msg["entities"] = [
+            {"type": "bot_command", "offset": 0, "length": len(text.split()[0])}
+        ]
+    return msg
+
+
+def synthetic_records(posts: int, gap: float = 1.0) -> list[dict]:
+    """Поток нажатий по ``posts`` папкам "default/post_NNNNN".
+
+    Вместо токена в callback_data — имя папки, ``refs`` переводят его так же,
+    как токены из настоящей записи.
+    """
+    when = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d %H:%M")
+    ids = itertools.count(1)
+    records = []
+    for i in range(posts):
+        name = f"post_{i:05d}"
+        refs = {name: {"tenant": "default", "folder": name}}
+        at = i * 0.2
+        for step in SCENARIOS[i % len(SCENARIOS)]:
+            at += gap
+            if step == "@text":
+                update = {"message": _message(SYNTHETIC_USER, next(ids), when)}
+            else:
+                action, _, extra = step.partition(":")
+                data = ":".join(filter(None, (action, name, extra)))
+                update = {
+                    "callback_query": {
+                        "id": str(next(ids)),
+                        "from": _user(SYNTHETIC_USER),
+                        "chat_instance": "replay",
+                        "data": data,
+                        "message": _message(SYNTHETIC_USER, next(ids), name),
+                    }
+                }
+            records.append({"at": at, "update": update, "refs": refs})
+        if i % 25 == 0:
+            update = {"message": _message(SYNTHETIC_USER, next(ids), "/view_jobs")}
+            records.append({"at": at, "update": update, "refs": {}})
+            update = {"message": _message(SYNTHETIC_USER, next(ids), f"/find {name}")}
+            records.append({"at": at, "update": update, "refs": {}})
+    return sorted(records, key=lambda r: r["at"])
+
+
+def referenced_folders(records: list[dict]) -> dict[str, set[str]]:
+    out: dict[str, set[str]] = defaultdict(set)
+    for rec in records:
+        for ref in rec.get("refs", {}).values():
+            out[ref["tenant"]].add(ref["folder"])
+    return out
+
+
+def user_ids(records: list[dict]) -> list[int]:
+    seen: dict[int, None] = {}
+    for rec in records:
+        for kind in ("message", "callback_query", "edited_message"):
+            sender = (rec["update"].get(kind) or {}).get("from")
+            if sender:
+                seen[sender["id"]] = None
+    return list(seen) or [SYNTHETIC_USER]
+
+
+# --- синтетический POSTS_ROOT ------------------------------------------------
+
+
+def make_posts(root: Path, names: set[str], images: int) -> None:
+    from PIL import Image
+
+    for n, name in enumerate(sorted(names)):
+        folder = root / name
+        folder.mkdir(parents=True, exist_ok=True)
+        meta = {"title": name, "tags": ["replay"]}
+        (folder / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+        (folder / "description.txt").write_text(f"Пост {name}\n", encoding="utf-8")
+        for j in range(images):
+            # свой цвет на файл: кэш миниатюр не склеит одинаковые картинки
+            color = ((n * 7 + j) % 256, (n * 13) % 256, (j * 29) % 256)
+            buf = io.BytesIO()
+            Image.new("RGB", (320, 240), color).save(buf, "JPEG", quality=80)
+            (folder / f"{j:02d}.jpg").write_bytes(buf.getvalue())
+
+
+def configure_env(tmp: Path, tenants: list[str], admins: list[int]) -> None:
+    """Окружение до импорта бота: настройки читаются при импорте config.settings."""
+    os.environ["TGBOT_BOT_TOKEN"] = "0:replay"
+    os.environ["TGBOT_LOCAL_API_URL"] = ""
+    os.environ["TGBOT_RECORD_UPDATES"] = ""
+    os.environ["TGBOT_THUMB_CACHE_DIR"] = str(tmp / "thumbs")
+    os.environ["TGBOT_TENANTS"] = json.dumps(
+        [
+            {
+                "NAME": name,
+                "POSTS_ROOT": str(tmp / name),
+                "CHANNEL_ID": f"@replay_{name}",
+                "ADMIN_CHAT_ID": admins[0],
+                "ADMIN_IDS": admins,
+                # карточки на все папки сразу, без очереди превью
+                "MAX_PENDING_PREVIEWS": 0,
+            }
+            for name in tenants
+        ]
+    )
+    os.environ.setdefault("TGBOT_SEND_RATE_PER_MIN", "1000000")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    # превью решённых постов убираются сразу — прогон проверяет и уборку
+    os.environ.setdefault("TGBOT_PREVIEW_CLEANUP_DELAY", "0")
+
+
+# --- прогон -----------------------------------------------------------------
+
+
+class Probe:
+    """Латентность от постановки в очередь до конца обработки и ошибки."""
+
+    def __init__(self) -> None:
+        self.enqueued: dict[int, tuple[str, float]] = {}
+        self.samples: dict[str, list[float]] = defaultdict(list)
+        self.errors: Counter[str] = Counter()
+        self.first_error: BaseException | None = None
+
+    def mark(self, update, kind: str) -> None:
+        self.enqueued[update.update_id] = (kind, perf_counter())
+
+    async def done(self, update, context) -> None:
+        entry = self.enqueued.pop(update.update_id, None)
+        if entry:
+            kind, started = entry
+            self.samples[kind].append(perf_counter() - started)
+
+    async def error(self, update, context) -> None:
+        self.errors[type(context.error).__name__] += 1
+        if self.first_error is None:
+            self.first_error = context.error
+
+
+def remap(record: dict, update_id: int, speedup: float) -> dict:
+    """Апдейт из записи с токенами и job_id, выданными в этом прогоне."""
+    from core.tenants import TENANTS
+    from storages.publication import TOKENS
+
+    data = copy.deepcopy(record["update"])
+    data["update_id"] = update_id
+    cq = data.get("callback_query")
+    if not cq or not cq.get("data"):
+        return data
+
+    parts = cq["data"].split(":")
+    ref = record.get("refs", {}).get(parts[1]) if len(parts) > 1 else None
+    tenant = TENANTS.get(ref["tenant"]) if ref else None
+    if tenant is not None:
+        folder = tenant.posts_root / ref["folder"]
+        if parts[0] in JOB_ACTIONS:
+            jobs = tenant.scheduled.load_all().items()
+            new = next((job_id for job_id, it in jobs if it.folder == folder), None)
+        else:
+            new = next((t for t, f in TOKENS.items() if f == str(folder)), None)
+        # не нашлось — пост уже ушёл, пусть хендлер ответит «устарела»
+        parts[1] = new or parts[1]
+    if parts[0] == "schedule_in" and len(parts) > 2:
+        # плановые публикации тоже ускоряются, иначе не успеют в прогон
+        parts[2] = str(max(1, round(int(parts[2]) / speedup)))
+    cq["data"] = ":".join(parts)
+    return data
+
+
+async def settle(app, timeout: float) -> bool:
+    """Дождаться фоновых публикаций и плановых, что наступят в пределах timeout."""
+    from core.channel.publish_pool import publish_pool
+
+    deadline = monotonic() + timeout
+    while monotonic() < deadline:
+        horizon = time() + deadline - monotonic()
+        due = [
+            job
+            for job in app.job_queue.get_jobs_by_name("_publish_job")
+            if job.next_t and job.next_t.timestamp() <= horizon
+        ]
+        if not publish_pool.tasks and not due:
+            return True
+        await asyncio.sleep(0.05)
+    return False
+
+
+def check_state(app) -> dict[str, list[str]]:
+    """Нарушения согласованности: {проверка: [примеры]}."""
+    from core.channel.publish_pool import publish_pool
+    from core.locks import folder_locks
+    from core.tenants import all_tenants
+    from storages.publication import TOKENS
+
+    problems: dict[str, list[str]] = defaultdict(list)
+    for token, folder_str in TOKENS.items():
+        folder = Path(folder_str)
+        if not folder.exists():
+            problems["токен на удалённую папку"].append(f"{token} {folder.name}")
+        elif not (folder / ".lock").exists():
+            # скан выслал бы по папке вторую карточку
+            problems["живая карточка без .lock"].append(f"{token} {folder.name}")
+
+    jobs = {job.id for job in app.job_queue.get_jobs_by_name("_publish_job")}
+    stored: set[str] = set()
+    for tenant in all_tenants():
+        for token in tenant.awaiting - TOKENS.keys():
+            problems["awaiting без токена"].append(f"{tenant.name} {token}")
+        scheduled: dict[Path, str] = {}
+        for job_id, item in tenant.scheduled.load_all().items():
+            stored.add(job_id)
+            name = f"{tenant.name}/{item.folder.name}"
+            if not item.folder.exists():
+                problems["расписание на удалённую папку"].append(name)
+            elif not (item.folder / ".lock").exists():
+                problems["запланирован без .lock"].append(name)
+            if job_id not in jobs:
+                problems["запись расписания без задачи"].append(f"{name} {job_id}")
+            if item.folder in scheduled:
+                problems["две задачи на папку"].append(name)
+            scheduled[item.folder] = job_id
+        for key, items in tenant.previews.load_all().items():
+            name = f"{tenant.name}/{Path(key).name}"
+            if not Path(key).exists() and any(i.delete_after is None for i in items):
+                # опубликован или пропущен, а превью так и останутся в чате
+                problems["превью без уборки"].append(name)
+            if any(i.delete_after is not None for i in items):
+                problems["неудалённые превью"].append(name)
+        for lock in tenant.posts_root.glob("*/.lock"):
+            token = lock.read_text(encoding="utf-8").strip()
+            if token not in TOKENS and lock.parent not in scheduled:
+                # ни карточки, ни задачи — папку больше никто не тронет
+                problems["осиротевший .lock"].append(
+                    f"{tenant.name}/{lock.parent.name}"
+                )
+    for job_id in jobs - stored:
+        problems["задача без записи в расписании"].append(job_id)
+    if publish_pool.tasks:
+        problems["незавершённые публикации"].extend(publish_pool.tasks)
+    if folder_locks._locks:
+        problems["неотпущенные локи"].extend(folder_locks._locks)
+    return problems
+
+
+async def replay(args: argparse.Namespace, records: list[dict]) -> int:
+    from telegram import Update
+    from telegram.ext import TypeHandler
+
+    from core.timing import STATS, format_stats, update_type
+    from core.janitor import janitor_job
+    from core.validation import shutdown_pool
+    from handlers.scan.scan import process_scan
+    from main import build_application, prepare_storage, register_handlers
+    from storages.publication import TOKENS
+
+    api = FakeBotAPI(args.api_latency, args.api_errors)
+    prepare_storage()
+    app = build_application(api)
+    register_handlers(app)
+    probe = Probe()
+    # последней группой: к этому моменту все хендлеры апдейта отработали
+    app.add_handler(TypeHandler(Update, probe.done), group=100)
+    app.add_error_handler(probe.error)
+
+    await app.initialize()
+    await app.start()
+    try:
+        started = perf_counter()
+        await process_scan(app, full=True)
+        print(
+            f"seed scan:          {(perf_counter() - started) * 1000:8.1f} ms"
+            f"  ({len(TOKENS)} cards)"
+        )
+        api.calls.clear()
+        STATS.clear()
+
+        started = monotonic()
+        for update_id, rec in enumerate(records, 1):
+            delay = rec["at"] / args.speedup - (monotonic() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            update = Update.de_json(remap(rec, update_id, args.speedup), app.bot)
+            probe.mark(update, update_type(update))
+            await app.update_queue.put(update)
+        await app.update_queue.join()
+        replay_s = monotonic() - started
+        settled = await settle(app, args.settle)
+        # _post_init здесь не вызывается — уборщик запускается вручную
+        await janitor_job(SimpleNamespace(application=app))
+        problems = check_state(app)
+    finally:
+        await app.stop()
+        await app.shutdown()
+        shutdown_pool()
+
+    print(
+        f"replayed:           {len(records)} updates in {replay_s:.1f} s"
+        f"  (x{args.speedup:g}, api latency {args.api_latency * 1000:.0f} ms)"
+    )
+    print("end-to-end (ms):    n / p50 / p99 / max")
+    for kind, samples in sorted(probe.samples.items()):
+        samples.sort()
+        p50 = samples[len(samples) // 2]
+        p99 = samples[min(len(samples) - 1, int(0.99 * len(samples)))]
+        print(
+            f"  {kind:<24} {len(samples)} / {p50 * 1000:.0f} / {p99 * 1000:.0f}"
+            f" / {samples[-1] * 1000:.0f}"
+        )
+    if probe.enqueued:
+        print(f"  not completed (gate or crash): {len(probe.enqueued)}")
+    print("handlers (/timings):")
+    for line in format_stats().splitlines()[1:]:
+        print("  " + line)
+    print("api calls:          " + ", ".join(f"{k} {v}" for k, v in api.calls.items()))
+    print(f"errors:             {sum(probe.errors.values())} {dict(probe.errors)}")
+    if probe.first_error is not None:
+        print(f"  first: {probe.first_error!r}")
+    if not settled:
+        print(f"not settled in {args.settle:g} s: publications still running")
+
+    if not problems:
+        print("state:              OK")
+        return 0
+    print("state:              FAIL")
+    for check, items in problems.items():
+        print(f"  {check}: {len(items)}  e.g. {', '.join(map(str, items[:3]))}")
+    return 1
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("records", nargs="?", type=Path, help="JSONL из RECORD_UPDATES")
+    parser.add_argument("--synthetic", type=int, default=50, help="папок без записи")
+    parser.add_argument("--speedup", type=float, default=10)
+    parser.add_argument("--api-latency", type=float, default=0.03, help="секунды")
+    parser.add_argument("--api-errors", type=float, default=0.0, help="доля 429")
+    parser.add_argument("--images", type=int, default=3, help="картинок в папке")
+    parser.add_argument("--posts", type=int, default=0, help="лишних папок в корне")
+    parser.add_argument(
+        "--settle", type=float, default=15, help="сек на фоновые и плановые"
+    )
+    parser.add_argument(
+        "--max-gap", type=float, default=5, help="сек, потолок паузы в записи"
+    )
+    args = parser.parse_args()
+
+    if args.records:
+        records = load_records(args.records, args.max_gap)
+    else:
+        records = synthetic_records(args.synthetic)
+    folders = referenced_folders(records) or {"default": set()}
+
+    with tempfile.TemporaryDirectory() as tmp_str:
+        tmp = Path(tmp_str)
+        for tenant, names in folders.items():
+            extra = {f"extra_{i:05d}" for i in range(args.posts)}
+            make_posts(tmp / tenant, names | extra, args.images)
+        configure_env(tmp, list(folders), user_ids(records))
+        sys.path.insert(0, str(APP_DIR))
+        code = asyncio.run(replay(args, records))
+    sys.exit(code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Бенчмарк холодного старта бота.
+
+Запуск из каталога ``app``::
+
+    python -m bench.startup --runs 5 --posts 200 --target 1.5
+
+Меряет время импорта ``main`` в чистом интерпретаторе, сборку ``Settings``
+и ``restore_scheduled`` на синтетическом расписании.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from time import perf_counter
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+IMPORT_SNIPPET = (
+    "import time; t = time.perf_counter(); import main; "
+    "print(time.perf_counter() - t)"
+)
+
+
+def _child_env(posts_root: Path) -> dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(APP_DIR), env.get("PYTHONPATH")])
+    )
+    env["TGBOT_POSTS_ROOT"] = str(posts_root)
+    return env
+
+
+def measure_import(posts_root: Path, runs: int) -> list[float]:
+    out = []
+    for _ in range(runs):
+        res = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET],
+            cwd=APP_DIR,
+            env=_child_env(posts_root),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        out.append(float(res.stdout.strip().splitlines()[-1]))
+    return out
+
+
+def top_imports(posts_root: Path, limit: int = 10) -> list[tuple[int, str]]:
+    res = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=APP_DIR,
+        env=_child_env(posts_root),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in res.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        name = name[1:]
+        # отступ = глубина; берём прямые зависимости main, вложенные уже в cumulative
+        if len(name) - len(name.lstrip()) == 2:
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def make_schedule(posts_root: Path, posts: int) -> None:
+    run_at = datetime.now(timezone.utc) + timedelta(days=1)
+    raw = {}
+    for i in range(posts):
+        folder = posts_root / f"post_{i:05d}"
+        folder.mkdir(parents=True, exist_ok=True)
+        (folder / "meta.json").write_text("{}", encoding="utf-8")
+        raw[f"job{i}"] = {
+            "token": f"{i:012x}",
+            "folder": str(folder),
+            "channel": "@bench",
+            "run_at": (run_at + timedelta(minutes=i)).isoformat(),
+        }
+    state_dir = posts_root / ".bot"
+    state_dir.mkdir(exist_ok=True)
+    (state_dir / ".scheduled_posts.json").write_text(json.dumps(raw), "utf-8")
+
+
+def measure_in_process(posts_root: Path) -> tuple[float, float]:
+    os.environ["TGBOT_POSTS_ROOT"] = str(posts_root)
+    sys.path.insert(0, str(APP_DIR))
+    logging.getLogger("apscheduler").setLevel(logging.WARNING)
+
+    from telegram.ext import Application
+
+    from config.settings import AppSettings, LogSettings, Settings, TGBotSettings
+    from core.channel.publisher import restore_scheduled
+
+    t = perf_counter()
+    Settings(APP=AppSettings(), LOG=LogSettings(), TGBOT=TGBotSettings())
+    settings_s = perf_counter() - t
+
+    app = Application.builder().token("0:bench").build()
+    t = perf_counter()
+    asyncio.run(restore_scheduled(app))
+    restore_s = perf_counter() - t
+    return settings_s, restore_s
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--posts", type=int, default=100)
+    parser.add_argument(
+        "--target", type=float, default=0.0, help="секунды, 0 — без проверки"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        posts_root = Path(tmp)
+        make_schedule(posts_root, args.posts)
+
+        imports = measure_import(posts_root, args.runs)
+        heaviest = top_imports(posts_root)
+        settings_s, restore_s = measure_in_process(posts_root)
+
+    import_s = statistics.median(imports)
+    print(
+        f"import main:      median {import_s * 1000:8.1f} ms"
+        f"  (min {min(imports) * 1000:.1f}, runs {args.runs})"
+    )
+    print(f"settings load:           {settings_s * 1000:8.1f} ms")
+    print(
+        f"restore_scheduled:       {restore_s * 1000:8.1f} ms"
+        f"  ({args.posts} posts, в фоне после старта)"
+    )
+    print("heaviest top-level imports (cumulative):")
+    for us, name in heaviest:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    # restore уходит в job_queue, поэтому в путь до первого ответа не входит
+    ready_s = import_s + settings_s
+    print(f"ready for first update:  {ready_s * 1000:8.1f} ms")
+    if args.target and ready_s > args.target:
+        print(f"FAIL: target {args.target:.2f} s exceeded")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Бенчмарк загрузки альбомов: байты через HTTP против file:// путей.
+
+Запуск из каталога ``app``::
+
+    python -m bench.upload --albums 5 --images 10 --size 1600
+
+Поднимает локальный stand-in Bot API (http.server в потоке) и шлёт через
+настоящий ``telegram.Bot`` одни и те же альбомы двумя способами: как сейчас
+(файлы читаются и уходят в multipart) и в ``local_mode`` (только пути).
+Stand-in в локальном режиме читает файлы с диска сам, как telegram-bot-api
+``--local``, так что сравнение честное: меряется, сколько байт проходит
+через процесс бота и сколько длится отправка.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import threading
+from contextlib import ExitStack
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from time import perf_counter
+from urllib.parse import unquote
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+FILE_URI = re.compile(r"file://([^\"&\\\\]+)")
+
+
+class StandInStats:
+    def __init__(self) -> None:
+        self.http_bytes = 0
+        self.disk_bytes = 0
+        self.lock = threading.Lock()
+
+
+def make_handler(stats: StandInStats) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self) -> None:  # noqa: N802
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            method = self.path.rsplit("/", 1)[-1]
+            disk = 0
+            if not self.headers.get("Content-Type", "").startswith("multipart/"):
+                # локальный сервер сам читает файлы по путям из запроса
+                for raw in FILE_URI.findall(unquote(body.decode())):
+                    disk += len(Path(raw).read_bytes())
+            with stats.lock:
+                stats.http_bytes += len(body)
+                stats.disk_bytes += disk
+
+            chat = {"id": 1, "type": "channel"}
+            if method == "getMe":
+                result: object = {
+                    "id": 1,
+                    "is_bot": True,
+                    "first_name": "bench",
+                    "username": "bench_bot",
+                }
+            else:
+                result = [
+                    {"message_id": i, "date": 0, "chat": chat} for i in range(10)
+                ]
+            payload = json.dumps({"ok": True, "result": result}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args: object) -> None:
+            pass
+
+    return Handler
+
+
+def make_images(root: Path, count: int, side: int) -> list[Path]:
+    from PIL import Image
+
+    out = []
+    for i in range(count):
+        # шум плохо сжимается: размер файла близок к реальным фото
+        w, h = side, side * 3 // 4
+        im = Image.frombytes("RGB", (w, h), os.urandom(w * h * 3))
+        path = root / f"{i:02d}.jpg"
+        im.save(path, "JPEG", quality=90)
+        out.append(path)
+    return out
+
+
+async def run_mode(
+    base: str, images: list[Path], albums: int, local: bool
+) -> tuple[float, list[float]]:
+    from telegram import Bot
+
+    from core.channel.media import build_media, plan_chunks
+
+    bot = Bot("0:bench", base_url=f"{base}/bot", local_mode=local)
+    per_album = []
+    async with bot:
+        started = perf_counter()
+        for _ in range(albums):
+            t = perf_counter()
+            for chunk in plan_chunks(images, local):
+                with ExitStack() as stack:
+                    media = build_media(stack, chunk, "bench", local)
+                    await bot.send_media_group(chat_id=1, media=media)
+            per_album.append(perf_counter() - t)
+        total = perf_counter() - started
+    return total, per_album
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--albums", type=int, default=5)
+    parser.add_argument("--images", type=int, default=10)
+    parser.add_argument("--size", type=int, default=1600, help="ширина, px")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(APP_DIR))
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        images = make_images(Path(tmp), args.images, args.size)
+        album_mb = sum(p.stat().st_size for p in images) / 1024 / 1024
+        print(f"album: {args.images} images, {album_mb:.1f} MB, x{args.albums}")
+
+        for label, local in (("bytes upload", False), ("local file://", True)):
+            stats = StandInStats()
+            server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(stats))
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            base = f"http://127.0.0.1:{server.server_address[1]}"
+            try:
+                total, per_album = asyncio.run(
+                    run_mode(base, images, args.albums, local)
+                )
+            finally:
+                server.shutdown()
+                server.server_close()
+
+            sent_mb = album_mb * args.albums
+            print(
+                f"{label:14s} {total * 1000:8.1f} ms total"
+                f"  {min(per_album) * 1000:7.1f} ms/album (best)"
+                f"  {sent_mb / total:7.1f} MB/s"
+                f"  via bot process {stats.http_bytes / 1024 / 1024:7.2f} MB"
+                f"  read by server {stats.disk_bytes / 1024 / 1024:7.2f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
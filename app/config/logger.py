@@ -1,20 +1,30 @@
+import atexit
 import logging
+import queue
+import sys
+from collections import OrderedDict
+from logging.handlers import QueueHandler, QueueListener
+from random import random
 from threading import Lock
-from time import time
+from time import monotonic, time
 
-import ecs_logging
-import funcy
 import structlog
 from structlog.dev import plain_traceback
 from structlog.processors import ExceptionRenderer
 from structlog.stdlib import BoundLogger
 from structlog.tracebacks import ExceptionDictTransformer
 
-from app.config.settings import settings
+from config.settings import settings
 
 
 LOG_MSG_LENGTH = 400
 
+CALLSITE_PARAMS = {
+    structlog.processors.CallsiteParameter.FILENAME,
+    structlog.processors.CallsiteParameter.FUNC_NAME,
+    structlog.processors.CallsiteParameter.LINENO,
+}
+
 
 class ExcludeRouteFilter(logging.Filter):
     def __init__(self, routes: list[str]) -> None:
@@ -23,7 +33,7 @@ class ExcludeRouteFilter(logging.Filter):
 
     def filter(self, record: logging.LogRecord) -> bool:
         root = record.args[2]
-        if funcy.any(root.startswith, self.routes):
+        if root.startswith(tuple(self.routes)):
             return record.args[4] >= LOG_MSG_LENGTH
         return super().filter(record)
 
@@ -32,31 +42,155 @@ def get_logger(name: str) -> BoundLogger:
     return structlog.get_logger(name)
 
 
-ecs_logs = settings.LOG.ECS_FORMAT
-processors = [
-    structlog.processors.StackInfoRenderer(),
-    structlog.processors.UnicodeDecoder(),
-    structlog.processors.CallsiteParameterAdder(
-        {
-            structlog.processors.CallsiteParameter.FILENAME,
-            structlog.processors.CallsiteParameter.FUNC_NAME,
-            structlog.processors.CallsiteParameter.LINENO,
-        },
-    ),
-]
-if ecs_logs:
-    processors += [ExceptionRenderer(ExceptionDictTransformer(locals_max_string=256))]
-else:
-    processors += [
-        structlog.processors.add_log_level,
-        structlog.processors.TimeStamper(fmt="%Y-%m-%d %H:%M:%S", utc=False),
+class RateLimitRepeated:
+    """Глушит повторы одного и того же предупреждения в пределах окна.
+
+    Ключ — уровень, шаблон события и поля из ``KEY_FIELDS``: "Slow update"
+    разных хендлеров или "Scan failed" разных тенантов — разные предупреждения,
+    а "Cannot open %s" с разными путями — одно. При следующем выводе
+    добавляется ``suppressed=N``. ERROR и выше не глушатся.
+    """
+
+    # поля, которые отличают источник предупреждения, а не его подробности
+    KEY_FIELDS = ("tenant", "handler", "pool", "scope")
+    # LRU: самые давние ключи вытесняются, таблица не растёт без предела
+    MAX_KEYS = 1024
+
+    def __init__(
+        self,
+        window: float,
+        min_level: int = logging.WARNING,
+        max_level: int = logging.ERROR,
+    ) -> None:
+        self.window = window
+        self.min_level = min_level
+        self.max_level = max_level
+        self._seen: OrderedDict[tuple, list[float | int]] = OrderedDict()
+        self._lock = Lock()
+
+    def _key(self, method_name: str, event_dict: dict) -> tuple:
+        return (
+            method_name,
+            str(event_dict.get("event")),
+            *(str(event_dict.get(f)) for f in self.KEY_FIELDS),
+        )
+
+    def __call__(self, logger, method_name: str, event_dict: dict) -> dict:
+        level = logging.getLevelName(method_name.upper())
+        if not isinstance(level, int) or not self.min_level <= level < self.max_level:
+            return event_dict
+        key = self._key(method_name, event_dict)
+        now = monotonic()
+        with self._lock:
+            state = self._seen.get(key)
+            if state and now - state[0] < self.window:
+                state[1] += 1
+                raise structlog.DropEvent
+            self._seen[key] = [now, 0]
+            self._seen.move_to_end(key)
+            if len(self._seen) > self.MAX_KEYS:
+                self._seen.popitem(last=False)
+        if state and state[1]:
+            event_dict["suppressed"] = state[1]
+        return event_dict
+
+
+class SampledCallsite:
+    """CallsiteParameterAdder только для важных событий и доли остальных.
+
+    Поиск кадра — самая дорогая часть цепочки, на info-потоке он не нужен.
+    """
+
+    def __init__(self, min_level: str, sample: float) -> None:
+        self.min_level = logging.getLevelName(min_level.upper())
+        self.sample = sample
+        self.adder = structlog.processors.CallsiteParameterAdder(
+            CALLSITE_PARAMS, additional_ignores=[__name__]
+        )
+
+    def __call__(self, logger, method_name: str, event_dict: dict) -> dict:
+        level = logging.getLevelName(method_name.upper())
+        if (isinstance(level, int) and level >= self.min_level) or (
+            self.sample and random() < self.sample
+        ):
+            return self.adder(logger, method_name, event_dict)
+        return event_dict
+
+
+class PassThroughQueueHandler(QueueHandler):
+    """QueueHandler без форматирования в вызывающем потоке.
+
+    Стандартный ``prepare`` рендерит сообщение сразу — нам же нужно, чтобы
+    ProcessorFormatter отработал в потоке QueueListener с исходным event_dict.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def _capture_exc_info(logger, method_name: str, event_dict: dict) -> dict:
+    # exc_info=True раскрывается в sys.exc_info() — в потоке листенера его уже нет
+    if event_dict.get("exc_info") is True:
+        event_dict["exc_info"] = sys.exc_info()
+    return event_dict
+
+
+def build_processors(
+    ecs: bool,
+    callsite: bool = True,
+    callsite_min_level: str = "NOTSET",
+    callsite_sample: float = 1.0,
+    rate_limit_window: float = 0.0,
+) -> tuple[list, list]:
+    """Вернёт (цепочка structlog, foreign_pre_chain для stdlib-записей)."""
+    head = [
+        structlog.processors.StackInfoRenderer(),
+        structlog.processors.UnicodeDecoder(),
+    ]
+    if ecs:
+        tail = [ExceptionRenderer(ExceptionDictTransformer(locals_max_string=256))]
+    else:
+        tail = [
+            structlog.processors.add_log_level,
+            structlog.processors.TimeStamper(fmt="%Y-%m-%d %H:%M:%S", utc=False),
+        ]
+
+    chain = []
+    if rate_limit_window > 0:
+        chain.append(RateLimitRepeated(rate_limit_window))
+    chain += [*head, _capture_exc_info]
+    if callsite:
+        chain.append(SampledCallsite(callsite_min_level, callsite_sample))
+    chain += tail
+
+    # у stdlib-записей callsite берётся из самого LogRecord — это дёшево
+    foreign = [
+        *head,
+        structlog.processors.CallsiteParameterAdder(CALLSITE_PARAMS),
+        *tail,
     ]
+    return chain, foreign
 
-renderer = (
-    ecs_logging.StructlogFormatter()
-    if ecs_logs
-    else structlog.dev.ConsoleRenderer(exception_formatter=plain_traceback)
+
+def build_renderer(ecs: bool):
+    if ecs:
+        # ecs_logging нужен только в ECS-режиме — не грузим его при обычном старте
+        import ecs_logging
+
+        return ecs_logging.StructlogFormatter()
+    return structlog.dev.ConsoleRenderer(exception_formatter=plain_traceback)
+
+
+ecs_logs = settings.LOG.ECS_FORMAT
+processors, foreign_processors = build_processors(
+    ecs_logs,
+    callsite=settings.LOG.CALLSITE,
+    callsite_min_level=settings.LOG.CALLSITE_MIN_LEVEL,
+    callsite_sample=settings.LOG.CALLSITE_SAMPLE,
+    rate_limit_window=settings.LOG.RATE_LIMIT_WINDOW,
 )
+renderer = build_renderer(ecs_logs)
+
 structlog.configure(
     processors=[*processors, structlog.stdlib.ProcessorFormatter.wrap_for_formatter],
     wrapper_class=structlog.stdlib.BoundLogger,
@@ -68,13 +202,26 @@ structlog.configure(
 handler = logging.StreamHandler()
 handler.setFormatter(
     structlog.stdlib.ProcessorFormatter(
-        processor=renderer, foreign_pre_chain=processors
+        processor=renderer, foreign_pre_chain=foreign_processors
     ),
 )
 
+listener: QueueListener | None = None
+
 
 def _init_logger(logger: logging.RootLogger) -> None:
-    logger.addHandler(handler)
+    global listener
+
+    if settings.LOG.QUEUE:
+        # рендер и запись в поток — в отдельном потоке, event loop только кладёт
+        # запись в очередь
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, handler, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+        logger.addHandler(PassThroughQueueHandler(log_queue))
+    else:
+        logger.addHandler(handler)
     logger.setLevel(settings.LOG.LEVEL)
     logging.captureWarnings(capture=True)
 
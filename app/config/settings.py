@@ -3,7 +3,9 @@ from __future__ import annotations
 import tempfile
 import zoneinfo
 from pathlib import Path
+from typing import Literal
 
+from pydantic import BaseModel
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -28,19 +30,169 @@ class LogSettings(BaseSettings):
     ECS_FORMAT: bool = False
     LEVEL: str = "INFO"
     ALCHEMY: str = "NOTSET"
+    # Рендер и вывод логов в отдельном потоке (QueueHandler + QueueListener)
+    QUEUE: bool = True
+    # filename/func_name/lineno: всегда от CALLSITE_MIN_LEVEL, ниже — с долей SAMPLE
+    CALLSITE: bool = True
+    CALLSITE_MIN_LEVEL: str = "WARNING"
+    CALLSITE_SAMPLE: float = 0.0
+    # Окно (сек) подавления одинаковых предупреждений, 0 — без ограничения
+    RATE_LIMIT_WINDOW: float = 60
 
     model_config = SettingsConfigDict(env_prefix="LOG_", **file_args)
 
 
+class TenantSettings(BaseModel):
+    """Конвейер одного канала: своя папка, канал, админы и расписание."""
+
+    NAME: str
+    POSTS_ROOT: Path
+    CHANNEL_ID: str
+    ADMIN_CHAT_ID: int
+    # Кто может нажимать кнопки; по умолчанию — только ADMIN_CHAT_ID
+    ADMIN_IDS: list[int] = []
+    MAX_PENDING_PREVIEWS: int | None = None
+    SEND_RATE_PER_MIN: int | None = None
+    STAGING_CHAT_ID: int | str | None = None
+    # Свои шаблоны карточки и подписи (см. core.templates); None — общие
+    CARD_TEMPLATE: str | None = None
+    CAPTION_TEMPLATE: str | None = None
+    # Префикс канала в бакете при STORAGE_BACKEND=s3; None — <S3_PREFIX>/<NAME>
+    S3_PREFIX: str | None = None
+
+
 class TGBotSettings(BaseSettings):
     BOT_TOKEN: str = ""
     ADMIN_CHAT_ID: int = 0
     CHANNEL_ID: str = ""
     POSTS_ROOT: Path = Path()
     SCAN_INTERVAL: int = 1
+    # Сколько папок POSTS_ROOT проверяет один тик скана; дальше — со следующего
+    SCAN_BATCH: int = 200
+    # Несколько каналов в одном процессе, JSON-список TenantSettings.
+    # Пусто — один тенант "default" из POSTS_ROOT/CHANNEL_ID/ADMIN_CHAT_ID.
+    TENANTS: list[TenantSettings] = []
+    # Лимит отправок на тенанта (канал + админ-чат), сообщений в минуту
+    SEND_RATE_PER_MIN: int = 20
+    # Сколько карточек может одновременно ждать решения (0 — без ограничения);
+    # остальные папки ждут в очереди .pending_previews.json
+    MAX_PENDING_PREVIEWS: int = 20
+    # Где лежат посты: local — прямо в POSTS_ROOT; s3 — в бакете S3-совместимого
+    # хранилища (AWS, MinIO; нужен boto3), POSTS_ROOT тогда — рабочая копия
+    STORAGE_BACKEND: Literal["local", "s3"] = "local"
+    S3_BUCKET: str = ""
+    S3_PREFIX: str = ""
+    # Пусто — AWS; для MinIO и т. п. — его адрес, напр. http://minio:9000
+    S3_ENDPOINT_URL: str = ""
+    S3_REGION: str = ""
+    # Пусто — стандартные источники boto3 (AWS_* в окружении, ~/.aws, роль)
+    S3_ACCESS_KEY: str = ""
+    S3_SECRET_KEY: str = ""
+    # Листинг бакета не чаще раза в N секунд; потоков скачивания файлов постов
+    STORAGE_SYNC_INTERVAL: float = 30
+    STORAGE_WORKERS: int = 8
+    # Процессы для проверки папок перед превью (декод изображений, meta.json)
+    VALIDATION_WORKERS: int = 2
+
+    # Шаблоны карточки админу (HTML) и подписи в канале, поля {name}, {title},
+    # {meta}, {description}; пусто — встроенные (core.templates)
+    CARD_TEMPLATE: str = ""
+    CAPTION_TEMPLATE: str = ""
+
+    # Превью для админа: длинная сторона миниатюры (0 — слать оригиналы)
+    PREVIEW_THUMB_SIZE: int = 640
+    PREVIEW_THUMB_QUALITY: int = 80
+    THUMB_CACHE_DIR: Path = Path(tempfile.gettempdir()) / "tg_bot_thumbs"
+
+    # Апдейты дольше порога (и такое же ожидание лока папки) логируются как медленные
+    SLOW_UPDATE_MS: int = 1000
+    # Сколько апдейтов обрабатывается параллельно (1 — строго по очереди)
+    CONCURRENT_UPDATES: int = 16
+    # Через сколько секунд после старта polling'а восстанавливать расписание
+    RESTORE_DELAY: float = 0
+    # Посты, просроченные не больше чем на столько секунд (рестарт, перехват
+    # лидерства), публикуются сразу; более старые снова уходят на решение админу
+    LATE_PUBLISH_GRACE: float = 600
+
+    # Горячий резерв: экземпляры с общим файлом-лизой, работает только лидер
+    # (см. core.leader). Пусто — один процесс без выборов.
+    LEADER_LEASE_FILE: str = ""
+    # Лиза живёт TTL секунд; лидер продлевает её, а резерв пробует взять с шагом
+    LEADER_LEASE_TTL: float = 10
+    LEADER_HEARTBEAT: float = 2
+
+    # Публикация: попытки на чанк (RetryAfter/сетевые ошибки) и потолок backoff
+    PUBLISH_MAX_ATTEMPTS: int = 5
+    PUBLISH_BACKOFF_MAX: float = 60
+    # Повтор упавшей плановой публикации: задержка (удваивается) и число повторов
+    PUBLISH_RETRY_DELAY: float = 60
+    PUBLISH_MAX_RETRIES: int = 3
+    # Сколько публикаций идёт одновременно (кнопка «Сейчас» и плановые)
+    PUBLISH_CONCURRENCY: int = 2
+    # Не чаще раза в N секунд обновлять карточку прогрессом по чанкам
+    PUBLISH_PROGRESS_INTERVAL: float = 2
+    # Импорт архивов командой /import: каталог с архивами (пусто — команда
+    # выключена), потоки распаковки zip, сколько папок переносить в корень
+    # за раз и не чаще раза во сколько секунд
+    IMPORT_DIR: str = ""
+    IMPORT_WORKERS: int = 4
+    IMPORT_BATCH: int = 50
+    IMPORT_BATCH_INTERVAL: float = 5
+    # Журнал событий постов для /stats (POSTS_ROOT/.bot/events.jsonl): кусок
+    # откладывается при таком размере, старых кусков хранится столько, дневная
+    # статистика держится за столько дней
+    EVENT_LOG_MAX_BYTES: int = 5 * 1024 * 1024
+    EVENT_LOG_KEEP: int = 3
+    STATS_DAYS: int = 30
+    # Превью в чатах админов удаляются через столько секунд после публикации,
+    # пропуска или пропажи папки (-1 — не удалять); фоновая уборка — раз в N сек
+    PREVIEW_CLEANUP_DELAY: float = 60
+    PREVIEW_JANITOR_INTERVAL: float = 30
+    # Плановые посты: за сколько секунд до run_at проверить папку и загрузить
+    # медиа в служебный чат ради file_id (0 — грузить в момент публикации)
+    STAGE_LEAD_TIME: float = 300
+    # Служебный чат предзагрузки; пусто — ADMIN_CHAT_ID. Сообщения сразу удаляются.
+    STAGING_CHAT_ID: str = ""
+
+    # HTTP-клиенты Bot API (core.http): свои пулы соединений у загрузок медиа,
+    # интерактивных вызовов (кнопки, карточки) и getUpdates
+    HTTP_POOL_SIZE: int = 32
+    HTTP_UPLOAD_POOL_SIZE: int = 4
+    # Таймауты чтения/записи, секунды: интерактивные вызовы и загрузки
+    HTTP_TIMEOUT: float = 10
+    HTTP_UPLOAD_TIMEOUT: float = 120
+    HTTP_CONNECT_TIMEOUT: float = 5
+    # Сколько ждать свободного соединения пула, прежде чем отказаться от вызова
+    HTTP_POOL_TIMEOUT: float = 10
+    HTTP_UPLOAD_POOL_TIMEOUT: float = 600
+    # Сколько секунд держать простаивающее соединение открытым
+    HTTP_KEEPALIVE: float = 30
+    # HTTP/2 — нужен пакет h2 (python-telegram-bot[http2]), без него HTTP/1.1
+    HTTP2: bool = False
+
+    # Локальный Bot API сервер (telegram-bot-api --local), напр. http://localhost:8081.
+    # Файлы уходят путями file:// без чтения в процессе бота, крупные — документами.
+    LOCAL_API_URL: str = ""
+
+    # Писать входящие апдейты в JSONL (для прогона через bench.replay); пусто — нет.
+    # В файл попадают тексты сообщений и id пользователей.
+    RECORD_UPDATES: str = ""
 
     model_config = SettingsConfigDict(env_prefix="TGBOT_", **file_args)
 
+    def tenants(self) -> list[TenantSettings]:
+        if self.TENANTS:
+            return self.TENANTS
+        return [
+            TenantSettings(
+                NAME="default",
+                POSTS_ROOT=self.POSTS_ROOT,
+                CHANNEL_ID=self.CHANNEL_ID,
+                ADMIN_CHAT_ID=self.ADMIN_CHAT_ID,
+                S3_PREFIX=self.S3_PREFIX,
+            )
+        ]
+
 
 class Settings(BaseSettings):
     APP: AppSettings
@@ -54,4 +206,11 @@ settings = Settings(APP=AppSettings(), LOG=LogSettings(), TGBOT=TGBotSettings())
 
 TZ = zoneinfo.ZoneInfo(settings.APP.TIMEZONE)
 MAX_CAPTION = 1024
+MAX_MESSAGE = 4096
 MEDIA_GROUP_LIMIT = 10
+# Лимиты Bot API для sendPhoto / sendMediaGroup
+MAX_PHOTO_BYTES = 10 * 1024 * 1024
+MAX_PHOTO_SIDES_SUM = 10000
+MAX_PHOTO_RATIO = 20
+# Лимит загрузки файла через локальный Bot API сервер
+LOCAL_MAX_FILE_BYTES = 2000 * 1024 * 1024
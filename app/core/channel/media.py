@@ -0,0 +1,95 @@
+"""Сборка медиа для отправки: фото/документ, чанки альбома, локальный Bot API.
+
+С локальным Bot API сервером (``TGBOT_LOCAL_API_URL``) файлы уходят как
+``file://`` пути — сервер читает их с диска сам, байты через наш процесс не
+идут. Сервер должен видеть POSTS_ROOT и THUMB_CACHE_DIR по тем же путям.
+"""
+
+from __future__ import annotations
+
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Literal, NamedTuple
+
+from telegram import InputMediaDocument, InputMediaPhoto
+
+from config.logger import get_logger
+from config.settings import MAX_PHOTO_BYTES, MEDIA_GROUP_LIMIT, settings
+from core.validation_worker import photo_limit_error
+
+log = get_logger(__name__)
+
+LOCAL_MODE = bool(settings.TGBOT.LOCAL_API_URL)
+
+MediaKind = Literal["photo", "document"]
+
+
+class MediaChunk(NamedTuple):
+    kind: MediaKind
+    files: list[Path]
+
+
+def media_kind(path: Path, local: bool = LOCAL_MODE) -> MediaKind:
+    """Фото, если укладывается в лимиты sendPhoto, иначе документ.
+
+    Без локального сервера всё уходит фото: валидация не пускает в публикацию
+    файлы за лимитами. Размер — из stat, стороны — из заголовка изображения.
+    """
+    if not local:
+        return "photo"
+    from PIL import Image
+
+    try:
+        size = path.stat().st_size
+        if size > MAX_PHOTO_BYTES:
+            return "document"
+        with Image.open(path) as im:
+            w, h = im.size
+    except Exception:
+        return "document"
+    return "photo" if photo_limit_error(size, w, h) is None else "document"
+
+
+def plan_chunks(images: list[Path], local: bool = LOCAL_MODE) -> list[MediaChunk]:
+    """Режет альбом на чанки по MEDIA_GROUP_LIMIT, не смешивая фото и документы.
+
+    Telegram не группирует фото с документами, поэтому подряд идущие файлы
+    одного вида образуют свои чанки; порядок файлов сохраняется.
+    """
+    runs: list[MediaChunk] = []
+    for img in images:
+        kind = media_kind(img, local)
+        if runs and runs[-1].kind == kind and len(runs[-1].files) < MEDIA_GROUP_LIMIT:
+            runs[-1].files.append(img)
+        else:
+            runs.append(MediaChunk(kind, [img]))
+    return runs
+
+
+def build_media(
+    stack: ExitStack,
+    chunk: MediaChunk,
+    caption: str | None,
+    local: bool = LOCAL_MODE,
+) -> list[InputMediaPhoto | InputMediaDocument]:
+    """InputMedia для чанка; подпись — на первом элементе.
+
+    В локальном режиме отдаём ``Path``: PTB превратит его в ``file://`` URI
+    без чтения файла. Иначе файл открывается и уходит в multipart.
+    """
+    cls = InputMediaPhoto if chunk.kind == "photo" else InputMediaDocument
+    media = []
+    for img in chunk.files:
+        if local:
+            if not img.is_file():
+                log.warning("Cannot open %s: no such file", img)
+                continue
+            source = img.absolute()
+        else:
+            try:
+                source = stack.enter_context(img.open("rb"))
+            except Exception as e:
+                log.warning("Cannot open %s: %s", img, e)
+                continue
+        media.append(cls(source, caption=None if media else caption or None))
+    return media
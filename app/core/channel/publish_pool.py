@@ -0,0 +1,120 @@
+"""Фоновые публикации: не больше PUBLISH_CONCURRENCY одновременно.
+
+Колбэк кнопки только ставит публикацию в пул и сразу отвечает; прогресс и
+итог пишет в карточку сама задача. Отмена кооперативная: флаг проверяется
+между чанками, поэтому недоставленная часть альбома продолжится при повторе
+из журнала, а отправленный чанк не задублируется.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from time import monotonic
+from typing import AsyncIterator, Awaitable, Callable
+
+from telegram.ext import Application
+
+from config.logger import get_logger
+from config.settings import settings
+
+log = get_logger(__name__)
+
+tg_bot_settings = settings.TGBOT
+
+
+class PublishCancelled(Exception):
+    """Админ остановил публикацию; бросается из ``PublishTask.checkpoint``."""
+
+
+class PublishTask:
+    def __init__(self, key: str, tenant: str) -> None:
+        self.key = key
+        self.tenant = tenant
+        self.state = "queued"
+        self.done = 0
+        self.total = 0
+        self.cancel_requested = False
+        self.created_at = monotonic()
+
+    def checkpoint(self, done: int, total: int) -> None:
+        """Отметить прогресс перед очередным чанком; остановиться, если просили."""
+        self.done, self.total = done, total
+        if self.cancel_requested:
+            raise PublishCancelled
+
+
+class PublishPool:
+    def __init__(self, limit: int) -> None:
+        self._sem = asyncio.Semaphore(max(1, limit))
+        self.tasks: dict[str, PublishTask] = {}
+
+    def running(self, key: str) -> bool:
+        return key in self.tasks
+
+    def reserve(self, key: str, tenant: str) -> PublishTask | None:
+        """Занять ключ (папку) под публикацию; None — по ней уже идёт публикация.
+
+        Синхронно: вызывающий держит локи папки, и между проверкой и записью
+        никто не вклинится.
+        """
+        if key in self.tasks:
+            return None
+        task = PublishTask(key, tenant)
+        self.tasks[key] = task
+        return task
+
+    def release(self, task: PublishTask) -> None:
+        """Снять резерв, если задачу так и не отдали в ``submit``/``slot``."""
+        if self.tasks.get(task.key) is task:
+            del self.tasks[task.key]
+
+    def submit(
+        self,
+        app: Application,
+        task: PublishTask,
+        run: Callable[[PublishTask], Awaitable[None]],
+    ) -> None:
+        """Запустить ``run`` в фоне под лимитом пула."""
+        # задачи app.create_task дожидаются при остановке бота
+        app.create_task(self._run(task, run), name=f"publish:{task.key}")
+
+    async def _run(
+        self, task: PublishTask, run: Callable[[PublishTask], Awaitable[None]]
+    ) -> None:
+        try:
+            async with self.slot(task):
+                await run(task)
+        except Exception:
+            log.exception("Background publication crashed", key=task.key)
+
+    @asynccontextmanager
+    async def slot(self, task: PublishTask) -> AsyncIterator[PublishTask]:
+        """Дождаться места в пуле; по выходу ключ освобождается."""
+        try:
+            async with self._sem:
+                await self._start(task)
+                yield task
+        finally:
+            self.tasks.pop(task.key, None)
+
+    async def _start(self, task: PublishTask) -> None:
+        task.state = "running"
+        wait_ms = round((monotonic() - task.created_at) * 1000, 1)
+        log.info(
+            "Publication started",
+            key=task.key,
+            tenant=task.tenant,
+            queued_ms=wait_ms,
+            in_pool=len(self.tasks),
+        )
+
+    def cancel(self, key: str) -> bool:
+        task = self.tasks.get(key)
+        if task is None:
+            return False
+        task.cancel_requested = True
+        return True
+
+
+publish_pool = PublishPool(tg_bot_settings.PUBLISH_CONCURRENCY)
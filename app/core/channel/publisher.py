@@ -1,53 +1,80 @@
+import asyncio
 import re
-import shutil
+from time import monotonic
+from typing import Awaitable, Callable
 import uuid
+from contextlib import ExitStack
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
-from telegram import Update, InputMediaPhoto, InlineKeyboardMarkup, InlineKeyboardButton
+from telegram import CallbackQuery, InlineKeyboardMarkup, Update
 from telegram.constants import ParseMode
+from telegram.error import (
+    BadRequest,
+    NetworkError,
+    RetryAfter,
+    TelegramError,
+    TimedOut,
+)
 from telegram.ext import ContextTypes, Application
 
 from config.logger import get_logger
-from config.settings import settings, MEDIA_GROUP_LIMIT, TZ
-from core.utils import collect_images
+from config.settings import settings, TZ
+from core.channel.media import MediaChunk, build_media, plan_chunks
+from core.channel.publish_pool import PublishCancelled, PublishTask, publish_pool
+from core.channel.staging import is_fresh, stage_media, staged_chunks, staged_media
+from core.janitor import remember_preview, retire_previews
+from core.keyboards import CARD, RETRY, SCHEDULE, STOP, UNCERTAIN, keyboard
+from core.leader import leader
+from core.locks import folder_locks
+from core.templates import render_caption, render_card
+from core.tenants import (
+    TENANTS,
+    Tenant,
+    all_tenants,
+    find_job,
+    tenant_for_folder,
+    tenants_for_user,
+)
+from core.timing import record
+from core.utils import collect_images, retry_after_seconds
+from core.validation import filter_valid
 from handlers.scan.scan import (
-    caption_trim,
+    on_decision,
     parse_meta,
+    read_description,
     send_media_preview,
-    build_preview_text,
 )
-from schemas.schema import ScheduledPost
-from storages import scheduled_store
+from handlers.store.delay_posts import send_job_card
+from schemas.schema import ScheduledPost, StagedMedia
 from storages.publication import TOKENS
 
 tg_bot_settings = settings.TGBOT
 log = get_logger(__name__)
 
+# (отправлено чанков, всего чанков) перед каждым чанком; может прервать публикацию
+ProgressHook = Callable[[int, int], Awaitable[None]]
 
-def _schedule_kb(token: str) -> InlineKeyboardMarkup:
-    return InlineKeyboardMarkup(
-        [
-            [InlineKeyboardButton("🟢 Сейчас", callback_data=f"publish_now:{token}")],
-            [
-                InlineKeyboardButton(
-                    "⏱ +15 мин", callback_data=f"schedule_in:{token}:900"
-                ),
-                InlineKeyboardButton(
-                    "⏱ +1 ч", callback_data=f"schedule_in:{token}:3600"
-                ),
-                InlineKeyboardButton(
-                    "⏱ +3 ч", callback_data=f"schedule_in:{token}:10800"
-                ),
-            ],
-            [
-                InlineKeyboardButton(
-                    "📅 Ввести дату/время", callback_data=f"schedule_input:{token}"
-                ),
-            ],
-            [InlineKeyboardButton("✖️ Отмена", callback_data=f"cancel:{token}")],
-        ]
-    )
+# callback_data нажатий, которые сейчас обрабатываются
+_inflight: set[str] = set()
+
+
+class DeliveryUncertain(Exception):
+    """Чанк ушёл с таймаутом: дошёл ли он до канала, решает админ.
+
+    Автоповтор мог бы задублировать альбом, поэтому публикация стоит, пока
+    чанк в журнале помечен ``uncertain``.
+    """
+
+    def __init__(self, index: int) -> None:
+        super().__init__(f"delivery of chunk {index} is unknown")
+        self.index = index
+
+
+UNCERTAIN_TEXT = (
+    "❓ {name}: часть альбома {part} ушла с таймаутом — Telegram мог её "
+    "доставить. Проверь канал и выбери, как продолжить."
+)
 
 
 async def on_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -57,7 +84,9 @@ async def on_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
 
     data = cq.data or ""
     m = re.match(
-        r"^(approve|skip|publish_now|schedule|schedule_in|schedule_input|cancel|cancel_job|view_job):([a-f0-9]{12}|[\w-]+)(?::(\d+))?$",
+        r"^(approve|skip|publish_now|chunk_sent|chunk_resend|stop_publish|schedule"
+        r"|schedule_in|schedule_input|cancel|cancel_job|view_job)"
+        r":([a-f0-9]{12}|[\w-]+)(?::(\d+))?$",
         data,
     )
 
@@ -67,6 +96,33 @@ async def on_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
 
     action, key, extra = m.group(1), m.group(2), m.group(3)
 
+    # двойное нажатие, пока первое ещё обрабатывается, — просто отбиваем
+    if data in _inflight:
+        await cq.answer("Уже обрабатываю…")
+        return
+    _inflight.add(data)
+    try:
+        async with folder_locks.hold(_lock_key(action, key, cq), "on_callback"):
+            await _handle_callback(cq, context, action, key, extra)
+    finally:
+        _inflight.discard(data)
+
+
+def _lock_key(action: str, key: str, cq: CallbackQuery) -> str:
+    if action in {"cancel_job", "view_job"}:
+        found = find_job(key, tenants_for_user(cq.from_user.id))
+        return str(found[1].folder) if found else f"job:{key}"
+    return TOKENS.get(key) or f"token:{key}"
+
+
+async def _handle_callback(
+    cq: CallbackQuery,
+    context: ContextTypes.DEFAULT_TYPE,
+    action: str,
+    key: str,
+    extra: str | None,
+) -> None:
+    # состояние перечитывается под локом: пока ждали, пост могли опубликовать
     token = key if action not in {"cancel_job", "view_job"} else None
     folder_str = TOKENS.get(token)
 
@@ -75,9 +131,19 @@ async def on_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
         return
 
     folder = Path(folder_str) if folder_str else None
-    if folder and (not folder.exists() or not _is_under_posts_root(folder)):
+    tenant = tenant_for_folder(folder) if folder else None
+    if folder and (not folder.exists() or tenant is None):
         TOKENS.pop(token, None)
         await cq.answer("Папка недоступна")
+        if tenant:
+            retire_previews(tenant, folder)
+            await on_decision(context.application, tenant, token)
+        return
+    if tenant and not tenant.is_admin(cq.from_user.id):
+        await cq.answer("Нет доступа к этому каналу")
+        return
+    if folder and action != "stop_publish" and publish_pool.running(folder_str):
+        await cq.answer("Идёт публикация — дождись её или останови")
         return
 
     if action == "skip":
@@ -85,33 +151,84 @@ async def on_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
             (folder / ".lock").unlink(missing_ok=True)
         except Exception:
             pass
+        # mtime корня от снятого .lock не меняется — скан сам папку не заметит
+        tenant.scanner.recheck(folder)
         TOKENS.pop(token, None)
-        await cq.edit_message_text("⏭️ Пропущено: " + folder.name)
+        retire_previews(tenant, folder)
+        tenant.track("skipped", folder)
+        try:
+            await cq.edit_message_text("⏭️ Пропущено: " + folder.name)
+        finally:
+            # токен уже снят: упавшая правка не должна занять слот превью навсегда
+            await on_decision(context.application, tenant, token)
+        return
+
+    if action in {"chunk_sent", "chunk_resend"}:
+        tenant.journal.resolve_uncertain(folder_str, delivered=action == "chunk_sent")
+        action = "publish_now"
+
+    # кнопки из /find и карточки задачи: папку могли поменять после превью,
+    # а «Сейчас» публикует без проверки (проверка по сигнатуре — из кэша)
+    if action in {"schedule", "publish_now"} and not await filter_valid(
+        context.application, tenant, [folder]
+    ):
+        await cq.answer("Папка не прошла проверку — см. /quarantine", show_alert=True)
         return
 
     if action in {"approve", "schedule"}:
+        if action == "approve":
+            tenant.track("approved", folder)
         await cq.answer()
-        await cq.edit_message_reply_markup(reply_markup=_schedule_kb(token))
+        await cq.edit_message_reply_markup(reply_markup=keyboard(SCHEDULE, token))
         return
 
     if action == "publish_now":
-        await cq.answer("Публикую…")
-        await _publish_folder_now(
-            context.application, folder, tg_bot_settings.CHANNEL_ID
+        task = publish_pool.reserve(folder_str, tenant.name)
+        try:
+            await cq.answer("Публикую в фоне…")
+            await cq.edit_message_text(
+                "⏳ В очереди на публикацию: " + folder.name,
+                reply_markup=keyboard(STOP, token),
+            )
+        except TelegramError as e:
+            # протухший запрос или «not modified» — публикации не помеха
+            log.warning("Publish card edit failed", token=token, error=repr(e))
+        except BaseException:
+            # до submit ключ держит только резерв: без снятия папка навсегда
+            # останется «в публикации»
+            publish_pool.release(task)
+            raise
+        publish_pool.submit(
+            context.application,
+            task,
+            _background_publish(
+                context.application,
+                tenant,
+                token,
+                folder,
+                cq.message.chat_id,
+                cq.message.message_id,
+            ),
         )
-        await cq.edit_message_text("✅ Опубликовано и удалено: " + folder.name)
-        TOKENS.pop(token, None)
+        return
+
+    if action == "stop_publish":
+        if not publish_pool.cancel(folder_str):
+            await cq.answer("Публикация уже завершилась")
+            return
+        await cq.answer("Остановлю после текущей части альбома")
         return
 
     if action == "schedule_in":
         await cq.answer("Планирую…")
         secs = int(extra or "0")
         run_at_utc = datetime.now(timezone.utc) + timedelta(seconds=secs)
-        await _schedule_publication(context, token, folder, run_at_utc)
+        await _schedule_publication(context, tenant, token, folder, run_at_utc)
         when_local = run_at_utc.astimezone(TZ).strftime("%Y-%m-%d %H:%M")
         await cq.edit_message_text(
             f"🕒 Запланировано на {when_local}\nПост: {folder.name}"
         )
+        await on_decision(context.application, tenant, token)
         return
 
     if action == "schedule_input":
@@ -126,125 +243,308 @@ async def on_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
         return
     # Новый кейс: отмена запланированной задачи по job_id
     if action == "cancel_job":
-        await cq.answer("Отменяю…")
         job_id = key
+        found = find_job(job_id, tenants_for_user(cq.from_user.id))
+        if not found:
+            await cq.answer("Задача не найдена")
+            return
+        await cq.answer("Отменяю…")
         # снять с планировщика и удалить из стора
         try:
             context.application.job_queue.scheduler.remove_job(job_id)
         except Exception:
             pass
-        scheduled_store.pop(job_id)
+        found[0].scheduled.pop(job_id)
         await cq.edit_message_text("❌ Задача отменена")
         return
 
     # Новый кейс: просмотр по job_id (то же, что /view_job, но по кнопке)
     if action == "view_job":
         await cq.answer()
-        store = scheduled_store.load_all()
-        item = store.get(key)
-        if not item:
+        found = find_job(key, tenants_for_user(cq.from_user.id))
+        if not found:
             await cq.edit_message_text("Задача не найдена.")
             return
+        tenant, item = found
         folder = item.folder
-        if not folder.exists() or not _is_under_posts_root(folder):
+        if not folder.exists() or not tenant.owns(folder):
             await cq.edit_message_text("Папка публикации недоступна.")
             return
 
-        TOKENS[item.token] = str(folder)
-
-        images = collect_images(folder)
-        desc_path = folder / "description.txt"
-        desc = (
-            desc_path.read_text("utf-8", errors="replace").strip()
-            if desc_path.exists()
-            else None
-        )
-        await send_media_preview(
-            context.application,
-            tg_bot_settings.ADMIN_CHAT_ID,
-            images,
-            caption_trim(desc or folder.name),
-        )
-
-        meta = parse_meta(folder / "meta.json")
-        text = (
-            build_preview_text(folder, meta, desc)
-            + f"\n\n<b>🕒 Плановая публикация:</b> {item.format_run_at()}"
-        )
-        kb = InlineKeyboardMarkup(
-            [
-                [
-                    InlineKeyboardButton(
-                        "🟢 Сейчас", callback_data=f"publish_now:{item.token}"
-                    )
-                ],
-                [
-                    InlineKeyboardButton(
-                        "⏱ Перепланировать", callback_data=f"schedule:{item.token}"
-                    )
-                ],
-                [
-                    InlineKeyboardButton(
-                        "❌ Отменить задачу", callback_data=f"cancel_job:{key}"
-                    )
-                ],
-            ]
-        )
-        # Обновим клавиатуру/сообщение
-        await cq.message.reply_text(
-            text,
-            parse_mode=ParseMode.HTML,
-            reply_markup=kb,
-            disable_web_page_preview=True,
+        await send_job_card(
+            context.application, cq.message.chat_id, tenant, key, item
         )
         return
 
     if action == "cancel":
         await cq.answer("Отменено")
         await cq.edit_message_text("❌ Отменено")
+        # карточка без кнопок — решения по ней уже не будет
+        if tenant:
+            await on_decision(context.application, tenant, token)
         return
 
 
+def _background_publish(
+    app: Application,
+    tenant: Tenant,
+    token: str,
+    folder: Path,
+    chat_id: int,
+    message_id: int,
+) -> Callable[[PublishTask], Awaitable[None]]:
+    """Публикация по кнопке «Сейчас»: прогресс и итог — правками карточки."""
+
+    async def status(text: str, kb: InlineKeyboardMarkup | None = None) -> None:
+        try:
+            await app.bot.edit_message_text(
+                text, chat_id=chat_id, message_id=message_id, reply_markup=kb
+            )
+        except BadRequest as e:
+            # «message is not modified» и удалённая карточка не мешают публикации
+            log.debug("Status edit skipped", token=token, error=str(e))
+        except TelegramError as e:
+            # RetryAfter/TimedOut на правке карточки — косметика, не повод
+            # обрывать публикацию или пропускать учёт
+            log.warning("Status edit failed", token=token, error=repr(e))
+
+    async def run(task: PublishTask) -> None:
+        last_edit = 0.0
+
+        async def progress(done: int, total: int) -> None:
+            nonlocal last_edit
+            task.checkpoint(done, total)
+            now = monotonic()
+            interval = tg_bot_settings.PUBLISH_PROGRESS_INTERVAL
+            if total > 1 and now - last_edit >= interval:
+                last_edit = now
+                await status(
+                    f"📤 Публикую {folder.name}: {done}/{total} частей альбома",
+                    keyboard(STOP, token),
+                )
+
+        try:
+            await _publish_folder_now(app, tenant, folder, progress)
+        except PublishCancelled:
+            log.info(
+                "Publication stopped",
+                tenant=tenant.name,
+                folder=str(folder),
+                done=task.done,
+                total=task.total,
+            )
+            await status(
+                f"⛔ Публикация остановлена: {folder.name} "
+                f"({task.done}/{task.total} частей отправлено).\n"
+                "Повтор продолжит с недоставленной части альбома.",
+                keyboard(SCHEDULE, token),
+            )
+            return
+        except DeliveryUncertain as e:
+            log.warning(
+                "Chunk delivery uncertain",
+                tenant=tenant.name,
+                folder=str(folder),
+                chunk=e.index,
+            )
+            await status(
+                UNCERTAIN_TEXT.format(name=folder.name, part=e.index + 1),
+                keyboard(UNCERTAIN, token),
+            )
+            return
+        except Exception:
+            log.exception("Publication failed", folder=str(folder))
+            tenant.track("failed", folder, scheduled=False)
+            await status(
+                "⚠️ Не удалось опубликовать: "
+                + folder.name
+                + "\nПовтор продолжит с недоставленной части альбома.",
+                keyboard(RETRY, token),
+            )
+            return
+
+        # Учёт — до итоговой правки: папки уже нет, токен и превью не должны
+        # пережить сбой косметического сообщения
+        TOKENS.pop(token, None)
+        retire_previews(tenant, folder)
+        try:
+            await status("✅ Опубликовано и удалено: " + folder.name)
+        finally:
+            await on_decision(app, tenant, token)
+
+    return run
+
+
 # Вынесенная публикация (немедленная)
 async def _publish_folder_now(
-    app: Application, folder: Path, channel: int | str
-) -> None:
-    desc_path = folder / "description.txt"
-    desc = (
-        desc_path.read_text("utf-8", errors="replace").strip()
-        if desc_path.exists()
-        else None
+    app: Application,
+    tenant: Tenant,
+    folder: Path,
+    progress: ProgressHook | None = None,
+    staged: StagedMedia | None = None,
+) -> bool:
+    """Публикует папку и удаляет её; True — ушла по предзагруженным file_id."""
+    caption = render_caption(
+        tenant, folder, parse_meta(folder / "meta.json"), read_description(folder)
     )
     images = collect_images(folder)
-    await publish_to_channel(app, channel, images, caption_trim(desc or folder.name))
-    # удалить папку
-    shutil.rmtree(folder)
+    journal_key = str(folder)
+    if staged is not None and not await asyncio.to_thread(is_fresh, staged, folder):
+        log.info("Staged media outdated", tenant=tenant.name, folder=journal_key)
+        staged = None
+    await publish_to_channel(
+        app,
+        tenant,
+        images,
+        caption,
+        journal_key,
+        progress,
+        staged_chunks(staged, folder) if staged else None,
+    )
+    # удалить папку, затем журнал: упавшее удаление повторится без повторной отправки
+    await asyncio.to_thread(tenant.remove_post, folder)
+    tenant.search.discard(folder)
+    tenant.journal.pop(journal_key)
+    tenant.track("published", folder, files=len(images), staged=staged is not None)
+    return staged is not None
 
 
 async def publish_to_channel(
-    app: Application, channel: int | str, images: list[Path], caption: str
+    app: Application,
+    tenant: Tenant,
+    images: list[Path],
+    caption: str,
+    journal_key: str | None = None,
+    progress: ProgressHook | None = None,
+    staged: list[tuple[MediaChunk, list[str]]] | None = None,
 ) -> None:
-    if images:
-        first = True
-        for i in range(0, len(images), MEDIA_GROUP_LIMIT):
-            chunk = images[i : i + MEDIA_GROUP_LIMIT]
-            media = []
-            for j, img in enumerate(chunk):
-                try:
-                    f = img.open("rb")
-                except Exception as e:
-                    log.warning("Cannot open %s: %s", img, e)
-                    continue
-                media.append(
-                    InputMediaPhoto(
-                        f, caption=caption if first and j == 0 and caption else None
-                    )
-                )
-            if media:
-                await app.bot.send_media_group(chat_id=channel, media=media)
-            first = False
+    """Публикует альбом чанками по MEDIA_GROUP_LIMIT.
+
+    С локальным Bot API файлы за лимитами фото уходят отдельными чанками
+    документов (см. ``plan_chunks``). ``staged`` — готовый план с file_id
+    (core.channel.staging): файлы не читаются и не загружаются.
+
+    С ``journal_key`` доставленные чанки фиксируются в журнале, и повторный
+    вызов продолжает с первого недоставленного. ``progress`` вызывается перед
+    каждым чанком и может прервать публикацию исключением.
+    """
+    if staged:
+        chunks = [chunk for chunk, _ in staged]
+        file_ids: list[list[str] | None] = [ids for _, ids in staged]
     else:
-        await app.bot.send_message(chat_id=channel, text=caption or "")
+        chunks = plan_chunks(images, app.bot.local_mode) or [MediaChunk("photo", [])]
+        file_ids = [None] * len(chunks)
+
+    documents = sum(len(c.files) for c in chunks if c.kind == "document")
+    if documents:
+        log.info(
+            "Oversized images sent as documents",
+            tenant=tenant.name,
+            post=journal_key,
+            documents=documents,
+        )
+
+    start = 0
+    if journal_key:
+        sent = tenant.journal.delivered_chunks(journal_key)
+        plan = [[img.name for img in chunk.files] for chunk in chunks]
+        if sent and plan[: len(sent)] != sent:
+            # папку правили после частичной отправки: доставленные чанки уже в
+            # канале и не повторяются, остальные файлы раскладываются заново
+            done = {name for names in sent for name in names}
+            rest = [img for img in images if img.name not in done]
+            folder = images[0].parent if images else Path()
+            chunks = [
+                MediaChunk("photo", [folder / name for name in names])
+                for names in sent
+            ] + plan_chunks(rest, app.bot.local_mode)
+            file_ids = [None] * len(chunks)
+            plan = [[img.name for img in chunk.files] for chunk in chunks]
+            log.warning(
+                "Publication plan changed",
+                tenant=tenant.name,
+                post=journal_key,
+                delivered=len(sent),
+                chunks=len(chunks),
+            )
+        entry = tenant.journal.begin(journal_key, plan)
+        if entry.uncertain is not None:
+            raise DeliveryUncertain(entry.uncertain)
+        start = entry.next_chunk()
+        if start:
+            log.info(
+                "Resuming publication",
+                tenant=tenant.name,
+                post=journal_key,
+                chunk=start,
+                chunks=len(chunks),
+            )
+
+    for i in range(start, len(chunks)):
+        if progress:
+            await progress(i, len(chunks))
+        try:
+            message_ids = await _send_chunk(
+                app, tenant, chunks[i], caption if i == 0 else None, file_ids[i]
+            )
+        except TimedOut as e:
+            if not journal_key:
+                raise
+            tenant.journal.mark_uncertain(journal_key, i)
+            raise DeliveryUncertain(i) from e
+        if journal_key:
+            tenant.journal.mark_delivered(journal_key, i, message_ids)
+
+
+async def _send_chunk(
+    app: Application,
+    tenant: Tenant,
+    chunk: MediaChunk,
+    caption: str | None,
+    file_ids: list[str] | None = None,
+) -> list[int]:
+    channel = tenant.channel_id
+    attempt = 0
+    while True:
+        await tenant.limiter.acquire()
+        try:
+            if not chunk.files:
+                msg = await app.bot.send_message(chat_id=channel, text=caption or "")
+                return [msg.message_id]
+            if file_ids:
+                msgs = await app.bot.send_media_group(
+                    chat_id=channel, media=staged_media(chunk.kind, file_ids, caption)
+                )
+                return [m.message_id for m in msgs]
+            with ExitStack() as stack:
+                media = build_media(stack, chunk, caption, app.bot.local_mode)
+                if not media:
+                    return []
+                msgs = await app.bot.send_media_group(chat_id=channel, media=media)
+            return [m.message_id for m in msgs]
+        except RetryAfter as e:
+            error, delay = e, retry_after_seconds(e)
+        except (BadRequest, TimedOut):
+            # оба — подклассы NetworkError. BadRequest постоянен (битый файл,
+            # длинная подпись, нет чата), а после TimedOut запрос мог и дойти:
+            # повтор задублирует альбом
+            raise
+        except NetworkError as e:
+            error = e
+            delay = min(tg_bot_settings.PUBLISH_BACKOFF_MAX, 2.0**attempt)
+
+        attempt += 1
+        if attempt >= tg_bot_settings.PUBLISH_MAX_ATTEMPTS:
+            raise error
+        log.warning(
+            "Chunk send failed, retrying",
+            tenant=tenant.name,
+            channel=channel,
+            attempt=attempt,
+            delay=delay,
+            error=str(error),
+        )
+        await asyncio.sleep(delay)
 
 
 async def on_schedule_text(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -253,10 +553,21 @@ async def on_schedule_text(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     if not token or not folder_str:
         return
 
+    async with folder_locks.hold(folder_str, "on_schedule_text"):
+        await _apply_schedule_text(update, context, token, folder_str)
+
+
+async def _apply_schedule_text(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, token: str, folder_str: str
+) -> None:
     folder = Path(folder_str)
-    if not folder.exists() or not _is_under_posts_root(folder):
+    tenant = tenant_for_folder(folder)
+    if not folder.exists() or tenant is None:
         await update.message.reply_text("Папка недоступна.")
         return
+    if publish_pool.running(folder_str):
+        await update.message.reply_text("Пост уже публикуется.")
+        return
 
     text = (update.message.text or "").strip()
     try:
@@ -271,108 +582,116 @@ async def on_schedule_text(update: Update, context: ContextTypes.DEFAULT_TYPE) -
         return
 
     run_at_utc = dt_local.astimezone(timezone.utc)
-    await _schedule_publication(context, token, folder, run_at_utc)
+    await _schedule_publication(context, tenant, token, folder, run_at_utc)
     when_local = dt_local.strftime("%Y-%m-%d %H:%M")
     await update.message.reply_text(
         f"🕒 Запланировано на {when_local}\nПост: {folder.name}"
     )
+    await on_decision(context.application, tenant, token)
 
 
-def _is_under_posts_root(p: Path) -> bool:
-    try:
-        p.resolve().relative_to(tg_bot_settings.POSTS_ROOT.resolve())
-        return True
-    except Exception:
-        return False
+async def restore_scheduled(app: Application) -> None:
+    tenants = all_tenants()
+    results = await asyncio.gather(
+        *(_restore_tenant(app, t) for t in tenants), return_exceptions=True
+    )
+    for tenant, res in zip(tenants, results):
+        if isinstance(res, Exception):
+            log.error("Restore failed", tenant=tenant.name, exc_info=res)
 
 
-async def restore_scheduled(app: Application) -> None:
-    store = scheduled_store.load_all()
+async def _restore_tenant(app: Application, tenant: Tenant) -> None:
+    store = tenant.scheduled.load_all()
     if not store:
         return
 
     now = datetime.now(timezone.utc)
-    new_store: dict[str, ScheduledPost] = {}
-
-    async def publish_job(ctx: ContextTypes.DEFAULT_TYPE) -> None:
-        data = ScheduledPost.model_validate(ctx.job.data)
-        folder = data.folder
-        if folder.exists():
-            try:
-                await _publish_folder_now(ctx.application, folder, data.channel)
-            finally:
-                scheduled_store.pop(ctx.job.id)
-        else:
-            scheduled_store.pop(ctx.job.id)
+    grace = timedelta(seconds=tg_bot_settings.LATE_PUBLISH_GRACE)
+    keep: list[str] = []
 
     for old_job_id, item in store.items():
         folder = item.folder
         if not folder.exists():
-            scheduled_store.pop(old_job_id)
+            tenant.scheduled.pop(old_job_id)
+            retire_previews(tenant, folder)
             continue
 
-        if item.run_at <= now:
-            scheduled_store.pop(old_job_id)
+        if item.run_at <= now - grace:
+            # давно просрочен — админ решает заново, пост мог устареть
+            tenant.scheduled.pop(old_job_id)
+            # карточка «Запланировано» и прежние превью сменяются новыми
+            retire_previews(tenant, folder)
 
             token = uuid.uuid4().hex[:12]
             TOKENS[token] = str(folder)
+            tenant.awaiting.add(token)
             try:
                 (folder / ".lock").write_text(token, encoding="utf-8")
             except Exception:
                 pass
 
-            desc_path = folder / "description.txt"
-            desc = (
-                desc_path.read_text("utf-8", errors="replace").strip()
-                if desc_path.exists()
-                else None
-            )
+            desc = read_description(folder)
             images = collect_images(folder)
             meta = parse_meta(folder / "meta.json")
 
-            await send_media_preview(
+            message_ids = await send_media_preview(
                 app,
-                tg_bot_settings.ADMIN_CHAT_ID,
+                tenant.admin_chat_id,
                 images,
-                caption_trim(desc or folder.name),
+                render_caption(tenant, folder, meta, desc),
+                tenant.limiter,
             )
 
-            kb = InlineKeyboardMarkup(
-                [
-                    [
-                        InlineKeyboardButton(
-                            "✅ Утвердить и опубликовать",
-                            callback_data=f"approve:{token}",
-                        )
-                    ],
-                    [
-                        InlineKeyboardButton(
-                            "⏭️ Пропустить", callback_data=f"skip:{token}"
-                        )
-                    ],
-                ]
-            )
-            await app.bot.send_message(
-                chat_id=tg_bot_settings.ADMIN_CHAT_ID,
-                text=build_preview_text(folder, meta, desc),
+            await tenant.limiter.acquire()
+            card = await app.bot.send_message(
+                chat_id=tenant.admin_chat_id,
+                text=render_card(tenant, folder, meta, desc),
                 parse_mode=ParseMode.HTML,
-                reply_markup=kb,
+                reply_markup=keyboard(CARD, token),
                 disable_web_page_preview=True,
             )
+            remember_preview(
+                tenant, folder, tenant.admin_chat_id, message_ids + [card.message_id]
+            )
+            tenant.track("previewed", folder, files=len(images))
             continue
 
-        job = app.job_queue.run_once(
-            publish_job,
-            when=item.run_at,
+        keep.append(old_job_id)
+
+    # восстановление отложено, и пока слались превью, админ мог запланировать
+    # или перепланировать посты: стор не перезаписывается снимком, а задачи
+    # ставятся под прежними job_id по его текущему содержимому. Между чтением
+    # и постановкой нет await — колбэки кнопок сюда не вклинятся
+    current = tenant.scheduled.load_all()
+    late = 0
+    for job_id in keep:
+        item = current.get(job_id)
+        if item is None:
+            # задачу отменили или перепланировали под новым job_id
+            continue
+        if app.job_queue.scheduler.get_job(job_id) is not None:
+            # запланирована уже в этом процессе — задача и предзагрузка стоят
+            continue
+        app.job_queue.run_once(
+            _publish_job,
+            # чуть опоздавший (рестарт, перехват лидерства) уходит в канал сразу
+            when=max(item.run_at, now),
             data=item.model_dump(),
+            job_kwargs={"id": job_id},
         )
-        new_store[job.id] = item
+        _schedule_staging(app, tenant, job_id, item.run_at)
+        late += item.run_at <= now
 
-    scheduled_store.save_all(new_store)
+    if late:
+        log.info("Late posts published on restore", tenant=tenant.name, late=late)
 
 
 async def _schedule_publication(
-    context: ContextTypes.DEFAULT_TYPE, token: str, folder: Path, run_at_utc: datetime
+    context: ContextTypes.DEFAULT_TYPE,
+    tenant: Tenant,
+    token: str,
+    folder: Path,
+    run_at_utc: datetime,
 ) -> None:
     if context.application.job_queue is None:
         log.error("JobQueue не инициализирован.")
@@ -383,26 +702,194 @@ async def _schedule_publication(
     except Exception:
         pass
 
+    # перепланирование: прежняя задача на эту папку больше не нужна,
+    # а её предзагрузка пригодится, если папку с тех пор не меняли
+    staged = None
+    for old_job_id, old in tenant.scheduled.load_all().items():
+        if old.folder == folder:
+            try:
+                context.application.job_queue.scheduler.remove_job(old_job_id)
+            except Exception:
+                pass
+            tenant.scheduled.pop(old_job_id)
+            staged = old.staged or staged
+
     item = ScheduledPost(
         token=token,
         folder=folder,
-        channel=tg_bot_settings.CHANNEL_ID,
+        channel=tenant.channel_id,
         run_at=run_at_utc,
+        tenant=tenant.name,
+        staged=staged,
     )
 
-    async def publish_job(ctx: ContextTypes.DEFAULT_TYPE) -> None:
-        data = ScheduledPost.model_validate(ctx.job.data)
-        if data.folder.exists():
-            try:
-                await _publish_folder_now(ctx.application, data.folder, data.channel)
-            finally:
-                scheduled_store.pop(ctx.job.id)
-        else:
-            scheduled_store.pop(ctx.job.id)
-
     job = context.application.job_queue.run_once(
-        publish_job,
+        _publish_job,
         when=item.run_at,
         data=item.model_dump(),
     )
-    scheduled_store.add(job.id, item)
+    tenant.scheduled.add(job.id, item)
+    _schedule_staging(context.application, tenant, job.id, item.run_at)
+    tenant.track("scheduled", folder, run_at=item.run_at.timestamp())
+    tenant.search.add(folder)
+
+
+def _schedule_staging(
+    app: Application, tenant: Tenant, job_id: str, run_at: datetime
+) -> None:
+    """Предзагрузка за STAGE_LEAD_TIME до публикации (или сразу, если позже)."""
+    lead = tg_bot_settings.STAGE_LEAD_TIME
+    if lead <= 0:
+        return
+    when = max(run_at - timedelta(seconds=lead), datetime.now(timezone.utc))
+    app.job_queue.run_once(
+        _stage_job,
+        when=when,
+        data={"tenant": tenant.name, "job_id": job_id},
+        name=f"stage:{job_id}",
+    )
+
+
+async def _stage_job(ctx: ContextTypes.DEFAULT_TYPE) -> None:
+    tenant = TENANTS.get(ctx.job.data["tenant"])
+    job_id = ctx.job.data["job_id"]
+    if tenant is None or (leader is not None and not leader.holds()):
+        return
+    item = tenant.scheduled.get(job_id)
+    if item is None or not item.folder.exists():
+        return
+    if item.staged and await asyncio.to_thread(is_fresh, item.staged, item.folder):
+        return
+
+    # загрузка идёт без лока папки: кнопки поста не ждут её
+    staged = await stage_media(ctx.application, tenant, item.folder)
+    if staged is None:
+        return
+    async with folder_locks.hold(str(item.folder), "stage_job"):
+        current = tenant.scheduled.get(job_id)
+        if current is None:
+            # задачу отменили, перепланировали или уже опубликовали
+            return
+        tenant.scheduled.add(job_id, current.model_copy(update={"staged": staged}))
+
+
+async def _publish_job(ctx: ContextTypes.DEFAULT_TYPE) -> None:
+    data = ScheduledPost.model_validate(ctx.job.data)
+    tenant = TENANTS.get(data.tenant)
+    if tenant is None:
+        log.error("Unknown tenant for scheduled post", tenant=data.tenant)
+        return
+    key = str(data.folder)
+    if leader is not None and not leader.holds():
+        # лиза могла мигнуть на продлении — через шаг heartbeat проверим снова.
+        # Запись остаётся в общем расписании: если лизу перехватили всерьёз,
+        # этот процесс остановится, а пост поднимет restore нового лидера
+        delay = tg_bot_settings.LEADER_HEARTBEAT
+        ctx.job_queue.run_once(
+            _publish_job,
+            when=delay,
+            data=ctx.job.data,
+            name=ctx.job.name,
+            job_kwargs={"id": ctx.job.id, "replace_existing": True},
+        )
+        log.warning(
+            "Not the leader, scheduled post deferred",
+            tenant=tenant.name,
+            folder=key,
+            job_id=ctx.job.id,
+            retry_in=delay,
+        )
+        return
+    async with folder_locks.hold(key, "publish_job"):
+        stored = tenant.scheduled.get(ctx.job.id)
+        if stored is None:
+            # задачу отменили или перепланировали, пока ждали лок
+            return
+        if not data.folder.exists():
+            tenant.scheduled.pop(ctx.job.id)
+            retire_previews(tenant, data.folder)
+            return
+        task = publish_pool.reserve(key, tenant.name)
+        if task is None:
+            # админ уже публикует этот пост кнопкой «Сейчас»
+            log.info("Scheduled post already publishing", folder=key)
+            tenant.scheduled.pop(ctx.job.id)
+            return
+
+    try:
+        async with publish_pool.slot(task):
+            staged = await _publish_folder_now(
+                ctx.application, tenant, data.folder, staged=stored.staged
+            )
+    except DeliveryUncertain as e:
+        # автоповтор мог бы задублировать альбом — решение за админом
+        log.warning(
+            "Chunk delivery uncertain",
+            tenant=tenant.name,
+            folder=key,
+            chunk=e.index,
+        )
+        tenant.scheduled.pop(ctx.job.id)
+        TOKENS[data.token] = key
+        msg = await ctx.bot.send_message(
+            chat_id=tenant.admin_chat_id,
+            text=UNCERTAIN_TEXT.format(name=data.folder.name, part=e.index + 1),
+            reply_markup=keyboard(UNCERTAIN, data.token),
+        )
+        remember_preview(tenant, data.folder, tenant.admin_chat_id, [msg.message_id])
+        return
+    except Exception:
+        log.exception(
+            "Scheduled publication failed",
+            tenant=tenant.name,
+            folder=str(data.folder),
+            attempt=data.attempts + 1,
+        )
+        tenant.track("failed", data.folder, scheduled=True, attempt=data.attempts + 1)
+        tenant.scheduled.pop(ctx.job.id)
+        await _retry_later(ctx.application, tenant, data)
+        return
+    tenant.scheduled.pop(ctx.job.id)
+    # папки больше нет — кнопки старой карточки должны ответить «устарела»
+    TOKENS.pop(data.token, None)
+    retire_previews(tenant, data.folder)
+
+    # опоздание относительно run_at: от него и считается «пост вышел вовремя»
+    lag = (datetime.now(timezone.utc) - data.run_at).total_seconds()
+    record(f"publish_lag:{'staged' if staged else 'upload'}", max(lag, 0.0))
+    log.info(
+        "Scheduled post published",
+        tenant=tenant.name,
+        folder=key,
+        lag_ms=round(lag * 1000, 1),
+        staged=staged,
+    )
+
+
+async def _retry_later(app: Application, tenant: Tenant, data: ScheduledPost) -> None:
+    """Перепланирует упавшую публикацию; журнал не даст задублировать чанки."""
+    attempts = data.attempts + 1
+    if attempts > tg_bot_settings.PUBLISH_MAX_RETRIES:
+        TOKENS[data.token] = str(data.folder)
+        msg = await app.bot.send_message(
+            chat_id=tenant.admin_chat_id,
+            text=f"⚠️ Не удалось опубликовать {data.folder.name} "
+            f"после {attempts} попыток.",
+            reply_markup=keyboard(RETRY, data.token),
+        )
+        remember_preview(tenant, data.folder, tenant.admin_chat_id, [msg.message_id])
+        return
+
+    delay = tg_bot_settings.PUBLISH_RETRY_DELAY * 2 ** (attempts - 1)
+    item = data.model_copy(
+        update={
+            "attempts": attempts,
+            "run_at": datetime.now(timezone.utc) + timedelta(seconds=delay),
+            # file_id могли и подвести — повтор грузит файлы заново
+            "staged": None,
+        }
+    )
+    job = app.job_queue.run_once(
+        _publish_job, when=item.run_at, data=item.model_dump()
+    )
+    tenant.scheduled.add(job.id, item)
@@ -0,0 +1,125 @@
+"""Предзагрузка медиа плановых постов.
+
+За STAGE_LEAD_TIME до run_at папка проверяется (как перед превью), а альбом
+отправляется в служебный чат без звука и сразу удаляется — остаются file_id.
+Они пишутся в запись расписания, и в run_at публикация — лёгкие отправки по
+file_id без чтения и загрузки файлов. Если с загрузки папку поменяли
+(сигнатура не совпала) или предзагрузка не удалась, пост грузится как раньше.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from pathlib import Path
+from time import perf_counter
+
+from telegram import InputMediaDocument, InputMediaPhoto, Message
+from telegram.error import TelegramError
+from telegram.ext import Application
+
+from config.logger import get_logger
+from core.channel.media import MediaChunk, build_media, plan_chunks
+from core.tenants import Tenant
+from core.timing import record
+from core.utils import collect_images
+from core.validation import filter_valid, fingerprint
+from schemas.schema import StagedMedia
+
+log = get_logger(__name__)
+
+
+def _file_id(msg: Message) -> str:
+    # у фото берём самый крупный размер — его и отправит канал
+    return msg.photo[-1].file_id if msg.photo else msg.document.file_id
+
+
+async def stage_media(
+    app: Application, tenant: Tenant, folder: Path
+) -> StagedMedia | None:
+    """Проверить папку и загрузить её медиа ради file_id; None — не вышло."""
+    if not await filter_valid(app, tenant, [folder]):
+        log.warning(
+            "Scheduled post failed validation", tenant=tenant.name, folder=str(folder)
+        )
+        return None
+
+    started = perf_counter()
+    signature = await asyncio.to_thread(fingerprint, folder)
+    chunks = plan_chunks(collect_images(folder), app.bot.local_mode)
+    if not chunks:
+        return None
+
+    file_ids: list[list[str]] = []
+    sent: list[int] = []
+    try:
+        for chunk in chunks:
+            with ExitStack() as stack:
+                media = build_media(stack, chunk, None, app.bot.local_mode)
+                if len(media) != len(chunk.files):
+                    # файл пропал или не открылся — пусть публикация решает сама
+                    return None
+                await tenant.limiter.acquire()
+                msgs = await app.bot.send_media_group(
+                    chat_id=tenant.staging_chat_id,
+                    media=media,
+                    disable_notification=True,
+                )
+            sent += [m.message_id for m in msgs]
+            file_ids.append([_file_id(m) for m in msgs])
+    except Exception:
+        log.exception("Staging failed", tenant=tenant.name, folder=str(folder))
+        return None
+    finally:
+        if sent:
+            try:
+                # file_id переживают удаление сообщений
+                await app.bot.delete_messages(tenant.staging_chat_id, sent)
+            except TelegramError as e:
+                log.debug("Staging cleanup skipped", error=str(e))
+
+    elapsed = perf_counter() - started
+    record("stage_media", elapsed)
+    log.info(
+        "Media staged",
+        tenant=tenant.name,
+        folder=str(folder),
+        files=sum(len(c.files) for c in chunks),
+        duration_ms=round(elapsed * 1000, 1),
+    )
+    return StagedMedia(
+        fingerprint=signature,
+        kinds=[c.kind for c in chunks],
+        names=[[f.name for f in c.files] for c in chunks],
+        file_ids=file_ids,
+        staged_at=datetime.now(timezone.utc),
+    )
+
+
+def is_fresh(staged: StagedMedia, folder: Path) -> bool:
+    """Папка не менялась с загрузки: file_id соответствуют файлам."""
+    try:
+        return fingerprint(folder) == staged.fingerprint
+    except OSError:
+        return False
+
+
+def staged_chunks(
+    staged: StagedMedia, folder: Path
+) -> list[tuple[MediaChunk, list[str]]]:
+    return [
+        (MediaChunk(kind, [folder / n for n in names]), ids)
+        for kind, names, ids in zip(staged.kinds, staged.names, staged.file_ids)
+    ]
+
+
+def staged_media(
+    kind: str, file_ids: list[str], caption: str | None
+) -> list[InputMediaPhoto | InputMediaDocument]:
+    """InputMedia по file_id; подпись — на первом элементе, как в ``build_media``."""
+    cls = InputMediaPhoto if kind == "photo" else InputMediaDocument
+    return [
+        cls(file_id, caption=None if i else caption or None)
+        for i, file_id in enumerate(file_ids)
+    ]
@@ -0,0 +1,226 @@
+"""HTTP-клиенты Bot API: отдельные пулы под загрузки, интерактив и polling.
+
+С одним клиентом на всё ответ на кнопку ждёт свободного соединения, пока
+альбомы публикаций и предзагрузки держат пул. ``RoutedRequest`` разводит
+вызовы по методу: отправки медиа и всё, что идёт multipart'ом, — в пул
+загрузок, остальное (answerCallbackQuery, правки карточек, сообщения) — в
+интерактивный. getUpdates PTB и так шлёт отдельным клиентом
+(``get_updates_request``), его собирает ``polling_request``.
+
+Перед каждым пулом — семафор на его размер: соединение httpx не ждётся
+никогда, а ожидание семафора и есть насыщение пула. Оно пишется в
+``core.timing`` как ``http:<пул>:wait`` рядом с длительностью вызова
+``http:<пул>``, а текущая занятость — в ``format_pools`` для /timings.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from importlib.util import find_spec
+from time import perf_counter
+
+import httpx
+from telegram.error import TimedOut
+from telegram.request import BaseRequest, HTTPXRequest, RequestData
+
+from config.logger import get_logger
+from config.settings import settings
+from core.timing import record
+
+log = get_logger(__name__)
+
+tg_bot_settings = settings.TGBOT
+
+# методы, которые тащат файлы; по file_id — тоже сюда, чтобы не обгонять
+# очередь альбомов и не занимать интерактивный пул публикациями
+UPLOAD_METHODS = frozenset(
+    {
+        "sendMediaGroup",
+        "sendPhoto",
+        "sendDocument",
+        "sendVideo",
+        "sendAnimation",
+        "sendAudio",
+        "sendVoice",
+        "editMessageMedia",
+    }
+)
+
+
+class PoolStats:
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.in_flight = 0
+        self.peak = 0
+        # запросы, которым пришлось ждать свободного соединения
+        self.waited = 0
+
+
+class _Pool:
+    def __init__(
+        self, name: str, request: HTTPXRequest, size: int, pool_timeout: float
+    ) -> None:
+        self.name = name
+        self.request = request
+        self.pool_timeout = pool_timeout
+        self.stats = PoolStats(size)
+        self._slots = asyncio.Semaphore(size)
+
+    async def do_request(
+        self, url: str, method: str, request_data: RequestData | None, **timeouts
+    ) -> tuple[int, bytes]:
+        pool_timeout = timeouts.pop("pool_timeout", None)
+        if not isinstance(pool_timeout, (int, float)):
+            pool_timeout = self.pool_timeout
+        queued = perf_counter()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), pool_timeout)
+        except asyncio.TimeoutError:
+            record(f"http:{self.name}:wait", perf_counter() - queued, failed=True)
+            raise TimedOut(
+                f"Pool timeout: all {self.name} connections are busy, "
+                "request was not sent"
+            ) from None
+        started = perf_counter()
+        wait = started - queued
+        stats = self.stats
+        stats.in_flight += 1
+        stats.peak = max(stats.peak, stats.in_flight)
+        if wait > 0.001:
+            stats.waited += 1
+        record(f"http:{self.name}:wait", wait)
+        if wait * 1000 >= tg_bot_settings.SLOW_UPDATE_MS:
+            log.warning(
+                "HTTP pool saturated",
+                pool=self.name,
+                size=stats.size,
+                wait_ms=round(wait * 1000, 1),
+            )
+        failed = False
+        try:
+            # очередь уже отстояна на семафоре — соединение httpx свободно
+            return await self.request.do_request(
+                url, method, request_data, pool_timeout=None, **timeouts
+            )
+        except Exception:
+            failed = True
+            raise
+        finally:
+            stats.in_flight -= 1
+            self._slots.release()
+            record(f"http:{self.name}", perf_counter() - started, failed)
+
+
+# {"<пул>": _Pool} всех собранных клиентов — для /timings
+POOLS: dict[str, _Pool] = {}
+
+
+def _http_version() -> str:
+    if not tg_bot_settings.HTTP2:
+        return "1.1"
+    if find_spec("h2") is None:
+        log.warning("HTTP/2 requested but h2 is not installed, using HTTP/1.1")
+        return "1.1"
+    return "2"
+
+
+def _make_pool(name: str, size: int, timeout: float, pool_timeout: float) -> _Pool:
+    request = HTTPXRequest(
+        connection_pool_size=size,
+        read_timeout=timeout,
+        write_timeout=timeout,
+        media_write_timeout=timeout,
+        connect_timeout=tg_bot_settings.HTTP_CONNECT_TIMEOUT,
+        pool_timeout=pool_timeout,
+        http_version=_http_version(),
+        httpx_kwargs={
+            "limits": httpx.Limits(
+                max_connections=size,
+                max_keepalive_connections=size,
+                keepalive_expiry=tg_bot_settings.HTTP_KEEPALIVE,
+            )
+        },
+    )
+    POOLS[name] = _Pool(name, request, size, pool_timeout)
+    return POOLS[name]
+
+
+class RoutedRequest(BaseRequest):
+    """Шлёт загрузки в ``uploads`` (если он есть), остальное — в ``default``."""
+
+    def __init__(self, default: _Pool, uploads: _Pool | None = None) -> None:
+        self.default = default
+        self.uploads = uploads
+        self._pools = [p for p in (default, uploads) if p is not None]
+
+    @property
+    def read_timeout(self) -> float | None:
+        return self.default.request.read_timeout
+
+    async def initialize(self) -> None:
+        await asyncio.gather(*(p.request.initialize() for p in self._pools))
+
+    async def shutdown(self) -> None:
+        await asyncio.gather(*(p.request.shutdown() for p in self._pools))
+
+    def route(self, url: str, request_data: RequestData | None) -> _Pool:
+        if self.uploads is None:
+            return self.default
+        if request_data is not None and request_data.contains_files:
+            return self.uploads
+        if url.rsplit("/", 1)[-1] in UPLOAD_METHODS:
+            return self.uploads
+        return self.default
+
+    async def do_request(
+        self,
+        url: str,
+        method: str,
+        request_data: RequestData | None = None,
+        read_timeout=BaseRequest.DEFAULT_NONE,
+        write_timeout=BaseRequest.DEFAULT_NONE,
+        connect_timeout=BaseRequest.DEFAULT_NONE,
+        pool_timeout=BaseRequest.DEFAULT_NONE,
+    ) -> tuple[int, bytes]:
+        return await self.route(url, request_data).do_request(
+            url,
+            method,
+            request_data,
+            read_timeout=read_timeout,
+            write_timeout=write_timeout,
+            connect_timeout=connect_timeout,
+            pool_timeout=pool_timeout,
+        )
+
+
+def bot_request() -> RoutedRequest:
+    """Клиент всех вызовов, кроме getUpdates: пулы interactive и uploads."""
+    s = tg_bot_settings
+    return RoutedRequest(
+        _make_pool(
+            "interactive", s.HTTP_POOL_SIZE, s.HTTP_TIMEOUT, s.HTTP_POOL_TIMEOUT
+        ),
+        uploads=_make_pool(
+            "uploads",
+            s.HTTP_UPLOAD_POOL_SIZE,
+            s.HTTP_UPLOAD_TIMEOUT,
+            s.HTTP_UPLOAD_POOL_TIMEOUT,
+        ),
+    )
+
+
+def polling_request() -> RoutedRequest:
+    """Клиент getUpdates: одно соединение, к read_timeout PTB сам добавляет
+    таймаут long polling'а."""
+    s = tg_bot_settings
+    return RoutedRequest(_make_pool("polling", 1, s.HTTP_TIMEOUT, s.HTTP_POOL_TIMEOUT))
+
+
+def format_pools() -> str:
+    if not POOLS:
+        return ""
+    lines = ["pool — занято / размер / пик / ждали"]
+    for name, pool in POOLS.items():
+        st = pool.stats
+        lines.append(f"{name} — {st.in_flight} / {st.size} / {st.peak} / {st.waited}")
+    return "\n".join(lines)
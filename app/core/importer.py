@@ -0,0 +1,313 @@
+"""Импорт архивов с папками постов (/import).
+
+Архив (zip или tar с любым сжатием) читается потоком, без распаковки целиком
+во временный каталог: файлы пишутся сразу в POSTS_ROOT/.import/<id>/ —
+скрытый каталог на той же ФС, скан его не видит. Папка поста — каталог с
+meta.json. Готовая папка проверяется (meta.json по схеме ``PostMeta``) и
+переносится в корень атомарным rename пачками по IMPORT_BATCH раз в
+IMPORT_BATCH_INTERVAL секунд: скан не видит полураспакованных папок и
+успевает разбирать новые.
+
+zip читается с произвольным доступом, и папки распаковываются параллельно в
+IMPORT_WORKERS потоках (zlib отпускает GIL). tar — поток (``r|*``): папка
+готова, когда архив перешёл к следующей; файл уже перенесённой папки,
+встреченный позже, пропускается с ошибкой.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import shutil
+import tarfile
+import threading
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path, PurePosixPath
+from time import monotonic, perf_counter
+from typing import IO, Callable
+
+from pydantic import ValidationError
+
+from config.logger import get_logger
+from config.settings import settings
+from core.tenants import Tenant
+from core.timing import record
+from schemas.schema import PostMeta
+
+log = get_logger(__name__)
+
+tg_bot_settings = settings.TGBOT
+
+IMPORT_DIR_NAME = ".import"
+COPY_CHUNK = 1024 * 1024
+
+# тенанты, в которые сейчас идёт импорт, и их каталоги распаковки
+_running: dict[str, Path] = {}
+
+
+class ImportResult:
+    def __init__(self) -> None:
+        self.imported = 0
+        self.files = 0
+        self.bytes = 0
+        self.rejected: list[str] = []  # «папка: причина»
+        self.existing: list[str] = []  # такая папка уже есть в корне
+        self.skipped: list[str] = []  # файлы вне папок постов, опасные пути
+        # перенос упал — распаковку дальше не продолжать
+        self.stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def add_file(self, size: int) -> None:
+        # zip распаковывается в нескольких потоках
+        with self._lock:
+            self.files += 1
+            self.bytes += size
+
+
+def running(tenant: Tenant) -> bool:
+    return tenant.name in _running
+
+
+async def import_archive(tenant: Tenant, archive: Path) -> ImportResult:
+    """Распаковать ``archive`` в корень тенанта; по одному импорту на тенанта."""
+    if running(tenant):
+        raise RuntimeError(f"импорт в {tenant.name} уже идёт")
+    root = tenant.posts_root / IMPORT_DIR_NAME
+    staging = root / uuid.uuid4().hex[:12]
+    _running[tenant.name] = staging
+    result = ImportResult()
+    started = perf_counter()
+    try:
+        await asyncio.to_thread(_drop_stale, root)
+        staging.mkdir(parents=True)
+        await _import(tenant, archive, staging, result)
+    finally:
+        _running.pop(tenant.name, None)
+        await asyncio.to_thread(shutil.rmtree, staging, True)
+
+    elapsed = perf_counter() - started
+    record("import_archive", elapsed)
+    log.info(
+        "Archive imported",
+        tenant=tenant.name,
+        archive=str(archive),
+        imported=result.imported,
+        rejected=len(result.rejected),
+        existing=len(result.existing),
+        files=result.files,
+        mb=round(result.bytes / 1024 / 1024, 1),
+        duration_ms=round(elapsed * 1000, 1),
+    )
+    return result
+
+
+def _drop_stale(root: Path) -> None:
+    # каталоги импортов, оборванных рестартом: другой импорт здесь не идёт
+    if root.exists():
+        active = set(_running.values())
+        for d in root.iterdir():
+            if d not in active:
+                shutil.rmtree(d, ignore_errors=True)
+
+
+async def _import(
+    tenant: Tenant, archive: Path, staging: Path, result: ImportResult
+) -> None:
+    loop = asyncio.get_running_loop()
+    ready: asyncio.Queue[str | None] = asyncio.Queue()
+
+    def on_ready(folder: str) -> None:
+        loop.call_soon_threadsafe(ready.put_nowait, folder)
+
+    extract = asyncio.ensure_future(
+        asyncio.to_thread(_extract, archive, staging, on_ready, result)
+    )
+    extract.add_done_callback(lambda _: ready.put_nowait(None))
+
+    batch: list[str] = []
+    last_move = 0.0
+    finished = False
+    try:
+        while not finished:
+            folder = await ready.get()
+            finished = folder is None
+            if folder is not None:
+                batch.append(folder)
+            if batch and (finished or len(batch) >= tg_bot_settings.IMPORT_BATCH):
+                # пачка не чаще раза в интервал: скан разбирает прошлую
+                wait = last_move + tg_bot_settings.IMPORT_BATCH_INTERVAL - monotonic()
+                if last_move and wait > 0:
+                    await asyncio.sleep(wait)
+                await asyncio.to_thread(_move_batch, tenant, staging, batch, result)
+                last_move = monotonic()
+                batch = []
+    except BaseException:
+        # поток распаковки не отменить — только остановить и дождаться,
+        # иначе он пишет в уже удаляемый каталог
+        result.stop.set()
+        await asyncio.wait([extract])
+        raise
+    # ошибка чтения архива — после переноса того, что уже распаковано
+    await extract
+
+
+def _move_batch(
+    tenant: Tenant, staging: Path, batch: list[str], result: ImportResult
+) -> None:
+    for rel in batch:
+        src = staging / rel
+        error = _check_meta(src / "meta.json")
+        if error:
+            result.rejected.append(f"{rel}: {error}")
+            shutil.rmtree(src, ignore_errors=True)
+            continue
+        dest = tenant.posts_root / src.name
+        if dest.exists():
+            result.existing.append(rel)
+            shutil.rmtree(src, ignore_errors=True)
+            continue
+        # та же ФС: папка появляется в корне целиком
+        os.rename(src, dest)
+        result.imported += 1
+    log.info(
+        "Import batch moved",
+        tenant=tenant.name,
+        batch=len(batch),
+        imported=result.imported,
+    )
+
+
+def _check_meta(path: Path) -> str | None:
+    try:
+        PostMeta.model_validate(json.loads(path.read_text("utf-8")))
+    except json.JSONDecodeError as e:
+        return f"meta.json: невалидный JSON ({e})"
+    except ValidationError as e:
+        return "meta.json: " + "; ".join(err["msg"] for err in e.errors())
+    except Exception as e:
+        return f"meta.json: не читается ({e})"
+    return None
+
+
+def _member_path(name: str) -> tuple[str, str] | None:
+    """(папка, файл) внутри архива; None — путь наружу или служебный файл."""
+    parts = PurePosixPath(name.replace("\\", "/")).parts
+    if len(parts) < 2 or parts[0] == "/":
+        return None
+    if any(p == ".." or p.startswith(".") or p == "__MACOSX" for p in parts):
+        return None
+    return "/".join(parts[:-1]), parts[-1]
+
+
+def _copy(src: IO[bytes], dest: Path, result: ImportResult) -> None:
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    with dest.open("wb") as out:
+        shutil.copyfileobj(src, out, COPY_CHUNK)
+    result.add_file(dest.stat().st_size)
+
+
+def _extract(
+    archive: Path, staging: Path, ready: Callable[[str], None], result: ImportResult
+) -> None:
+    if zipfile.is_zipfile(archive):
+        _extract_zip(archive, staging, ready, result)
+    else:
+        _extract_tar(archive, staging, ready, result)
+
+
+def _extract_zip(
+    archive: Path, staging: Path, ready: Callable[[str], None], result: ImportResult
+) -> None:
+    folders: dict[str, list[zipfile.ZipInfo]] = {}
+    with zipfile.ZipFile(archive) as zf:
+        for info in zf.infolist():
+            if info.is_dir():
+                continue
+            member = _member_path(info.filename)
+            if member is None:
+                result.skipped.append(info.filename)
+                continue
+            folders.setdefault(member[0], []).append(info)
+
+    posts = {
+        folder: infos
+        for folder, infos in folders.items()
+        if any(i.filename.endswith("/meta.json") for i in infos)
+    }
+    result.skipped += [
+        i.filename for f, infos in folders.items() if f not in posts for i in infos
+    ]
+
+    # у каждого потока свой дескриптор архива: чтение со сдвигом не делится
+    local = threading.local()
+    handles: list[zipfile.ZipFile] = []
+
+    def extract_folder(folder: str) -> None:
+        if result.stop.is_set():
+            return
+        if not hasattr(local, "zf"):
+            local.zf = zipfile.ZipFile(archive)
+            handles.append(local.zf)
+        for info in posts[folder]:
+            with local.zf.open(info) as src:
+                _copy(src, staging / folder / PurePosixPath(info.filename).name, result)
+        ready(folder)
+
+    workers = max(1, tg_bot_settings.IMPORT_WORKERS)
+    try:
+        with ThreadPoolExecutor(workers, thread_name_prefix="import") as pool:
+            for future in [pool.submit(extract_folder, f) for f in posts]:
+                try:
+                    future.result()
+                except BaseException:
+                    result.stop.set()
+                    raise
+    finally:
+        for zf in handles:
+            zf.close()
+
+
+def _extract_tar(
+    archive: Path, staging: Path, ready: Callable[[str], None], result: ImportResult
+) -> None:
+    done: set[str] = set()
+    current: str | None = None
+
+    def finish(folder: str) -> None:
+        done.add(folder)
+        if (staging / folder / "meta.json").is_file():
+            ready(folder)
+        else:
+            # не папка поста — каталог распаковки удалится целиком в конце
+            files = (staging / folder).iterdir()
+            result.skipped += [f"{folder}/{f.name}" for f in files]
+
+    # "r|*" — строго последовательное чтение с любым сжатием, без seek
+    with tarfile.open(archive, mode="r|*") as tf:
+        for m in tf:
+            if result.stop.is_set():
+                return
+            if not m.isfile():
+                continue
+            member = _member_path(m.name)
+            if member is None:
+                result.skipped.append(m.name)
+                continue
+            folder, name = member
+            if folder in done:
+                # папка уже ушла в корень: дописывать её нельзя
+                result.skipped.append(m.name)
+                continue
+            if folder != current:
+                if current is not None:
+                    finish(current)
+                current = folder
+            src = tf.extractfile(m)
+            if src is not None:
+                with src:
+                    _copy(src, staging / folder / name, result)
+        if current is not None:
+            finish(current)
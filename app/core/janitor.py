@@ -0,0 +1,127 @@
+"""Уборка превью постов из чатов админов.
+
+Превью (альбом миниатюр и карточка со скана, восстановления или /view_job)
+записываются в ``tenant.previews`` по папке поста. Когда пост опубликован,
+пропущен или его папка пропала, они ставятся на удаление через
+PREVIEW_CLEANUP_DELAY секунд — админ успевает увидеть итог на карточке.
+Фоновая задача раз в PREVIEW_JANITOR_INTERVAL удаляет созревшие пачками
+``delete_messages`` до 100 id за вызов. Сообщения старше 48 часов Telegram
+боту удалить не даёт — такие записи просто забываются.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from time import perf_counter
+
+from telegram.error import BadRequest, NetworkError, RetryAfter, TelegramError
+from telegram.ext import Application, ContextTypes
+
+from config.logger import get_logger
+from config.settings import settings
+from core.leader import leader
+from core.tenants import Tenant, all_tenants
+from core.timing import record
+from schemas.schema import PreviewMessages
+
+log = get_logger(__name__)
+
+tg_bot_settings = settings.TGBOT
+
+# лимит id в одном deleteMessages
+DELETE_BATCH = 100
+# старше — Telegram не даст удалить
+DELETE_WINDOW = timedelta(hours=48)
+
+
+def cleanup_enabled() -> bool:
+    return tg_bot_settings.PREVIEW_CLEANUP_DELAY >= 0
+
+
+def remember_preview(
+    tenant: Tenant, folder: Path, chat_id: int | str, message_ids: list[int]
+) -> None:
+    if cleanup_enabled():
+        tenant.previews.add(str(folder), chat_id, message_ids)
+
+
+def retire_previews(tenant: Tenant, folder: Path) -> None:
+    """Пост опубликован, пропущен или пропал — его превью больше не нужны."""
+    if cleanup_enabled():
+        tenant.previews.retire(str(folder), tg_bot_settings.PREVIEW_CLEANUP_DELAY)
+
+
+async def janitor_job(ctx: ContextTypes.DEFAULT_TYPE) -> None:
+    if leader is not None and not leader.holds():
+        return
+    tenants = all_tenants()
+    results = await asyncio.gather(
+        *(sweep_previews(ctx.application, t) for t in tenants),
+        return_exceptions=True,
+    )
+    for tenant, res in zip(tenants, results):
+        if isinstance(res, Exception):
+            log.error("Preview cleanup failed", tenant=tenant.name, exc_info=res)
+
+
+async def sweep_previews(app: Application, tenant: Tenant) -> int:
+    """Удалить созревшие превью тенанта; вернёт число удалённых сообщений."""
+    for key, items in tenant.previews.load_all().items():
+        # папку убрали мимо бота — решения по посту уже не будет
+        if any(i.delete_after is None for i in items) and not Path(key).exists():
+            retire_previews(tenant, Path(key))
+
+    now = datetime.now(timezone.utc)
+    due = tenant.previews.due(now)
+    if not due:
+        return 0
+
+    started = perf_counter()
+    done: list[tuple[str, PreviewMessages]] = []
+    by_chat: dict[int | str, list[tuple[str, PreviewMessages]]] = {}
+    for key, item in due:
+        if now - item.sent_at >= DELETE_WINDOW:
+            done.append((key, item))
+        else:
+            by_chat.setdefault(item.chat_id, []).append((key, item))
+    expired = len(done)
+
+    deleted = 0
+    for chat_id, entries in by_chat.items():
+        ids = [mid for _, item in entries for mid in item.message_ids]
+        try:
+            for i in range(0, len(ids), DELETE_BATCH):
+                await tenant.limiter.acquire()
+                # уже удалённые руками id Telegram просто пропускает
+                await app.bot.delete_messages(chat_id, ids[i : i + DELETE_BATCH])
+        except BadRequest as e:
+            # чат недоступен, прав нет — повтор не поможет
+            log.warning(
+                "Preview cleanup rejected",
+                tenant=tenant.name,
+                chat_id=chat_id,
+                error=str(e),
+            )
+        except (RetryAfter, NetworkError) as e:
+            # повторные id безвредны — пусть чат целиком уйдёт следующим тиком
+            log.info("Preview cleanup postponed", tenant=tenant.name, error=str(e))
+            continue
+        except TelegramError as e:
+            log.warning("Preview cleanup failed", tenant=tenant.name, error=str(e))
+        else:
+            deleted += len(ids)
+        done += entries
+
+    tenant.previews.discard(done)
+    elapsed = perf_counter() - started
+    record("preview_cleanup", elapsed)
+    log.info(
+        "Previews cleaned",
+        tenant=tenant.name,
+        deleted=deleted,
+        expired=expired,
+        duration_ms=round(elapsed * 1000, 1),
+    )
+    return deleted
@@ -0,0 +1,55 @@
+"""Инлайн-клавиатуры карточек.
+
+Раскладки — константы: (подпись, шаблон callback_data) по рядам. Разметка
+собирается один раз на токен и переиспользуется: InlineKeyboardMarkup
+неизменяем, одну и ту же можно слать и править сколько угодно раз.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+Layout = tuple[tuple[tuple[str, str], ...], ...]
+
+CARD: Layout = (
+    (("✅ Утвердить и опубликовать", "approve:{token}"),),
+    (("⏭️ Пропустить", "skip:{token}"),),
+)
+SCHEDULE: Layout = (
+    (("🟢 Сейчас", "publish_now:{token}"),),
+    (
+        ("⏱ +15 мин", "schedule_in:{token}:900"),
+        ("⏱ +1 ч", "schedule_in:{token}:3600"),
+        ("⏱ +3 ч", "schedule_in:{token}:10800"),
+    ),
+    (("📅 Ввести дату/время", "schedule_input:{token}"),),
+    (("✖️ Отмена", "cancel:{token}"),),
+)
+JOB: Layout = (
+    (("🟢 Сейчас", "publish_now:{token}"),),
+    (("⏱ Перепланировать", "schedule:{token}"),),
+    (("❌ Отменить задачу", "cancel_job:{job_id}"),),
+)
+RETRY: Layout = ((("🔁 Повторить", "publish_now:{token}"),),)
+STOP: Layout = ((("⛔ Остановить", "stop_publish:{token}"),),)
+UNCERTAIN: Layout = (
+    (("✅ Часть дошла — продолжить", "chunk_sent:{token}"),),
+    (("🔁 Не дошла — отправить снова", "chunk_resend:{token}"),),
+)
+
+
+@lru_cache(maxsize=1024)
+def keyboard(layout: Layout, token: str, job_id: str = "") -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(
+        [
+            [
+                InlineKeyboardButton(
+                    label, callback_data=data.format(token=token, job_id=job_id)
+                )
+                for label, data in row
+            ]
+            for row in layout
+        ]
+    )
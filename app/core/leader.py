@@ -0,0 +1,142 @@
+"""Горячий резерв: публикует только процесс, держащий лизу.
+
+Лиза — JSON-файл ``{"holder", "expires", "term"}`` рядом с POSTS_ROOT, общий
+для всех экземпляров (тот же хост или общая ФС, часы синхронизированы).
+Читается и пишется под flock, так что взять её может только один. Лидер
+продлевает лизу каждые LEADER_HEARTBEAT секунд; резерв с тем же шагом
+пробует её взять и, пока не вышло, держит расписание тенантов прогретым
+в памяти (кэш ``ScheduledStore``). Telegram не даёт двум процессам читать
+getUpdates, поэтому резерв не поллит и не сканирует — бот в нём ещё не запущен.
+
+Лидер, не сумевший продлить лизу (процесс подвис дольше TTL и её перехватили),
+останавливается; плановые задачи он перед публикацией сверяет с ``holds()``
+и чужие посты не трогает.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import socket
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator
+
+from config.logger import get_logger
+from config.settings import settings
+from core.tenants import all_tenants
+
+log = get_logger(__name__)
+
+tg_bot_settings = settings.TGBOT
+
+
+class LeaderLease:
+    def __init__(self, path: Path, ttl: float) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        # до какого момента (unix-время) лиза наша по последнему продлению
+        self.expires = 0.0
+        self.term = 0
+        # лизу перехватили, пока мы были лидером
+        self.lost = False
+
+    def holds(self) -> bool:
+        return time.time() < self.expires
+
+    def try_acquire(self) -> bool:
+        """Взять или продлить лизу; False — её держит другой живой процесс."""
+        now = time.time()
+        with self._locked() as f:
+            current = _read(f)
+            if current and current["holder"] != self.holder:
+                if current["expires"] > now:
+                    self.lost = self.lost or self.expires > 0
+                    self.expires = 0.0
+                    return False
+                term = current["term"] + 1
+            else:
+                term = current["term"] if current else 1
+            state = {"holder": self.holder, "expires": now + self.ttl, "term": term}
+            _write(f, state)
+        self.expires, self.term = now + self.ttl, term
+        return True
+
+    def release(self) -> None:
+        """Отдать лизу при штатной остановке: резерв не ждёт истечения TTL."""
+        if not self.holds():
+            return
+        with self._locked() as f:
+            current = _read(f)
+            if current and current["holder"] == self.holder:
+                _write(f, {**current, "expires": 0})
+        self.expires = 0.0
+        log.info("Leadership released", term=self.term)
+
+    def current_holder(self) -> str | None:
+        with self._locked() as f:
+            current = _read(f)
+        return current["holder"] if current else None
+
+    @contextmanager
+    def _locked(self) -> Iterator[IO[str]]:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        with os.fdopen(fd, "r+", encoding="utf-8") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield f
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _read(f: IO[str]) -> dict | None:
+    f.seek(0)
+    try:
+        return json.loads(f.read() or "null")
+    except ValueError:
+        # битый файл — как пустой: лизу возьмёт первый пришедший
+        return None
+
+
+def _write(f: IO[str], state: dict) -> None:
+    f.seek(0)
+    f.truncate()
+    f.write(json.dumps(state))
+    f.flush()
+
+
+def stand_by(lease: LeaderLease) -> None:
+    """Ждать лизу, держа расписание прогретым; возвращается лидером."""
+    started = time.monotonic()
+    announced = False
+    while not lease.try_acquire():
+        # перечитываются только изменившиеся файлы, остальное — из кэша
+        scheduled = sum(len(t.scheduled.load_all()) for t in all_tenants())
+        if not announced:
+            log.info(
+                "Standing by",
+                leader=lease.current_holder(),
+                scheduled=scheduled,
+                ttl=lease.ttl,
+            )
+            announced = True
+        time.sleep(tg_bot_settings.LEADER_HEARTBEAT)
+    log.info(
+        "Leadership acquired",
+        holder=lease.holder,
+        term=lease.term,
+        waited_s=round(time.monotonic() - started, 1),
+    )
+
+
+# None — выборы выключены, процесс один и всегда лидер
+leader: LeaderLease | None = None
+if tg_bot_settings.LEADER_LEASE_FILE:
+    leader = LeaderLease(
+        Path(tg_bot_settings.LEADER_LEASE_FILE), tg_bot_settings.LEADER_LEASE_TTL
+    )
@@ -0,0 +1,59 @@
+"""Локи по ключу для конкурентной обработки апдейтов.
+
+Апдейты обрабатываются параллельно (``concurrent_updates``), поэтому всё,
+что меняет судьбу поста — кнопки, ввод даты, плановая публикация, — берёт
+лок его папки. Токен карточки указывает на папку, а у одной папки бывает
+несколько токенов (карточка из /view_job, восстановленная после рестарта),
+поэтому ключ — путь папки. Ожидание лока пишется в /timings как ``lock:<scope>``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from time import perf_counter
+from typing import AsyncIterator
+
+from config.logger import get_logger
+from config.settings import settings
+from core.timing import record
+
+log = get_logger(__name__)
+
+tg_bot_settings = settings.TGBOT
+
+
+class KeyedLocks:
+    def __init__(self) -> None:
+        self._locks: dict[str, asyncio.Lock] = {}
+        # сколько корутин держит или ждёт лок — чтобы не копить локи мёртвых папок
+        self._users: dict[str, int] = {}
+
+    def locked(self, key: str) -> bool:
+        lock = self._locks.get(key)
+        return lock is not None and lock.locked()
+
+    @asynccontextmanager
+    async def hold(self, key: str, scope: str) -> AsyncIterator[None]:
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        self._users[key] = self._users.get(key, 0) + 1
+        started = perf_counter()
+        try:
+            async with lock:
+                waited = perf_counter() - started
+                record(f"lock:{scope}", waited)
+                waited_ms = round(waited * 1000, 1)
+                if waited_ms >= tg_bot_settings.SLOW_UPDATE_MS:
+                    log.warning(
+                        "Slow lock wait", key=key, scope=scope, wait_ms=waited_ms
+                    )
+                yield
+        finally:
+            self._users[key] -= 1
+            if not self._users[key]:
+                del self._users[key]
+                del self._locks[key]
+
+
+# папка поста (str(path)) и скан тенанта ("scan:<name>")
+folder_locks = KeyedLocks()
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import asyncio
+from time import monotonic
+
+
+class RateLimiter:
+    """Асинхронный token bucket: ``rate`` отправок за ``period`` секунд."""
+
+    def __init__(self, rate: int, period: float = 60.0) -> None:
+        self.capacity = max(1, rate)
+        self.interval = period / self.capacity
+        self.tokens = float(self.capacity)
+        self.updated = monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) / self.interval
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) * self.interval)
@@ -0,0 +1,90 @@
+"""Запись входящих апдейтов в JSONL для нагрузочного прогона (bench.replay).
+
+Строка файла — ``{"at": <unix-время>, "update": <Update.to_dict()>,
+"refs": {...}}``; файл дописывается, записи нескольких запусков идут подряд.
+Токены карточек и job_id живут только в памяти процесса, поэтому в ``refs``
+рядом с ними пишется, на какую папку они указывали (тенант и имя папки):
+при прогоне они переводятся на токены и задачи, выданные заново на
+синтетическом POSTS_ROOT.
+
+В файл попадают тексты сообщений и id пользователей — держать его там же,
+где логи бота.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from time import time
+from typing import IO
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from config.logger import get_logger
+from core.tenants import find_job, tenant_for_folder, tenants_for_user
+from storages.publication import TOKENS
+
+log = get_logger(__name__)
+
+JOB_ACTIONS = frozenset({"cancel_job", "view_job"})
+
+
+def folder_ref(folder: Path) -> dict[str, str] | None:
+    tenant = tenant_for_folder(folder)
+    if tenant is None:
+        return None
+    return {"tenant": tenant.name, "folder": folder.name}
+
+
+def callback_refs(update: Update) -> dict[str, dict[str, str]]:
+    """Куда указывают токен или job_id из callback_data на момент нажатия."""
+    cq = update.callback_query
+    if cq is None or not cq.data or ":" not in cq.data:
+        return {}
+    action, key = cq.data.split(":", 2)[:2]
+    if action in JOB_ACTIONS:
+        found = find_job(key, tenants_for_user(cq.from_user.id))
+        folder = found[1].folder if found else None
+    else:
+        folder = Path(TOKENS[key]) if key in TOKENS else None
+    ref = folder_ref(folder) if folder else None
+    return {key: ref} if ref else {}
+
+
+class UpdateRecorder:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._file: IO[str] | None = None
+        self.count = 0
+
+    async def __call__(
+        self, update: object, context: ContextTypes.DEFAULT_TYPE
+    ) -> None:
+        if not isinstance(update, Update):
+            return
+        try:
+            line = json.dumps(
+                {
+                    "at": round(time(), 3),
+                    "update": update.to_dict(),
+                    "refs": callback_refs(update),
+                },
+                ensure_ascii=False,
+            )
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                # построчная буферизация: оборванная запись теряет максимум строку
+                self._file = self.path.open("a", encoding="utf-8", buffering=1)
+                log.info("Recording updates", path=str(self.path))
+            self._file.write(line + "\n")
+            self.count += 1
+        except Exception:
+            # запись — диагностика, обработку апдейта она не ломает
+            log.exception("Update recording failed", update_id=update.update_id)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            log.info("Updates recorded", path=str(self.path), count=self.count)
@@ -0,0 +1,107 @@
+"""Ограниченные тики скана POSTS_ROOT с курсором.
+
+Тик проверяет не больше ``limit`` папок после курсора (в порядке имён без
+учёта регистра) и сохраняет курсор — следующий тик продолжит с того же места,
+в том числе после рестарта. Проход, дошедший до конца, запоминает mtime
+корня: пока в корне не появилось и не пропало ни одной папки, тик стоит один
+stat. Папки, появившиеся в середине прохода левее курсора, не теряются —
+mtime корня к концу прохода уже другой, и начнётся новый проход.
+
+Изменения внутри папок mtime корня не трогают, поэтому папки без meta.json
+(ещё копируются) и папки в карантине держатся в ``watch`` и перепроверяются
+каждый тик, а снятый ботом .lock (skip) отмечается через ``recheck``.
+"""
+
+from __future__ import annotations
+
+import bisect
+import os
+from pathlib import Path
+
+from schemas.schema import ScanState
+from storages.scan_state import ScanStateStore
+
+
+def _key(name: str) -> tuple[str, str]:
+    return name.lower(), name
+
+
+class ScanCursor:
+    def __init__(self, root: Path, store: ScanStateStore) -> None:
+        self.root = root
+        self.store = store
+        self._state: ScanState | None = None
+        self._dirty = False
+        # отсортированный листинг корня и mtime, на котором он снят
+        self._listing: list[tuple[str, str]] = []
+        self._listing_mtime: int | None = None
+
+    @property
+    def state(self) -> ScanState:
+        if self._state is None:
+            self._state = self.store.load()
+        return self._state
+
+    @property
+    def in_pass(self) -> bool:
+        return self.state.cursor is not None
+
+    def next_batch(self, limit: int) -> list[Path]:
+        """Папки на проверку в этом тике: ``watch`` и до ``limit`` после курсора."""
+        state = self.state
+        mtime = os.stat(self.root).st_mtime_ns
+
+        names: list[str] = []
+        if state.cursor is not None or mtime != state.root_mtime_ns:
+            self._dirty = True
+            if state.cursor is None:
+                state.pass_mtime_ns = mtime
+            names = self._slice(state.cursor, limit, mtime)
+            if len(names) < limit:
+                state.cursor = None
+                state.root_mtime_ns = state.pass_mtime_ns
+            else:
+                state.cursor = names[-1]
+
+        batch = dict.fromkeys(state.watch + names)
+        return [self.root / name for name in batch]
+
+    def finish(self, watch: list[str]) -> None:
+        """Сохранить курсор и новый список папок под наблюдением.
+
+        Холостой тик (корень не менялся, watch тот же) файл не переписывает.
+        """
+        watch = sorted(set(watch), key=_key)
+        if watch != self.state.watch:
+            self.state.watch = watch
+            self._dirty = True
+        if self._dirty:
+            self.store.save(self.state)
+            self._dirty = False
+
+    def recheck(self, folder: Path) -> None:
+        """Папка снова ждёт скана (сняли .lock) — проверить её в следующем тике."""
+        if folder.name not in self.state.watch:
+            self.state.watch.append(folder.name)
+            self.store.save(self.state)
+
+    def reset(self) -> None:
+        """Забыть mtime корня: следующий тик начнёт полный проход."""
+        self.state.root_mtime_ns = None
+        self.state.cursor = None
+        self._dirty = True
+
+    def _slice(self, cursor: str | None, limit: int, mtime: int) -> list[str]:
+        if self._listing_mtime != mtime:
+            # DirEntry.is_dir() берёт тип из самого листинга, без stat на папку
+            with os.scandir(self.root) as it:
+                self._listing = sorted(
+                    _key(e.name)
+                    for e in it
+                    if not e.name.startswith(".") and e.is_dir()
+                )
+            self._listing_mtime = mtime
+        start = 0
+        if cursor is not None:
+            start = bisect.bisect_right(self._listing, _key(cursor))
+        return [name for _, name in self._listing[start : start + limit]]
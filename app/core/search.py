@@ -0,0 +1,166 @@
+"""Поиск по постам тенанта: /find и инлайн-режим.
+
+Инвертированный индекс в памяти: слово → папки. Слова берутся из имени
+папки, значений meta.json и description.txt — в нижнем регистре, «ё» как
+«е», имя папки режется и по «_». Индекс строится при старте одним проходом по
+POSTS_ROOT, дальше обновляется по ходу конвейера: скан нашёл папку или пост
+запланирован — папка переиндексируется, опубликован — убирается.
+
+В запросе все слова должны найтись, каждое — как префикс (инлайн-запрос
+набирается по буквам): префиксы ищутся бинарным поиском по отсортированному
+словарю, так что запрос не перебирает папки.
+"""
+
+from __future__ import annotations
+
+import bisect
+import hashlib
+import heapq
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import NamedTuple
+
+_WORD = re.compile(r"[^\W_]+")
+# кандидатов меньше — следующее слово проверяется по их словам, без словаря
+FILTER_BELOW = 256
+# больше любого символа слова: [term, term + _MAX_CHAR) — все слова с префиксом
+_MAX_CHAR = chr(0x10FFFF)
+
+
+class Hit(NamedTuple):
+    folder: Path
+    title: str
+
+
+def tokens(text: str) -> list[str]:
+    return _WORD.findall(text.lower().replace("ё", "е"))
+
+
+def folder_key(folder: Path) -> str:
+    """Короткий постоянный ключ папки — для ссылок t.me/<бот>?start=..."""
+    return hashlib.blake2b(str(folder).encode(), digest_size=8).hexdigest()
+
+
+def _meta_text(raw: object) -> tuple[str, str]:
+    """(title, все значения meta.json одной строкой)."""
+    if not isinstance(raw, dict):
+        return "", ""
+    values: list[str] = []
+    for v in raw.values():
+        values += [str(x) for x in (v if isinstance(v, list) else [v])]
+    title = raw.get("title")
+    return (title if isinstance(title, str) else ""), " ".join(values)
+
+
+class SearchIndex:
+    def __init__(self) -> None:
+        # папка → (имя, title, её слова)
+        self._docs: dict[str, tuple[str, str, frozenset[str]]] = {}
+        self._postings: dict[str, set[str]] = {}
+        # отсортированные ключи _postings — для поиска по префиксу
+        self._vocab: list[str] = []
+        # folder_key → папка
+        self._keys: dict[str, str] = {}
+        # индекс строится в потоке, пока event loop уже ищет и добавляет
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, folder: Path) -> None:
+        """(Пере)индексировать папку; читает meta.json и description.txt."""
+        try:
+            raw = json.loads((folder / "meta.json").read_text("utf-8"))
+        except Exception:
+            raw = None
+        title, meta = _meta_text(raw)
+        try:
+            desc = (folder / "description.txt").read_text("utf-8", errors="replace")
+        except OSError:
+            desc = ""
+        words = frozenset(tokens(f"{folder.name} {meta} {desc}"))
+
+        key = str(folder)
+        with self._lock:
+            self._drop(key)
+            self._docs[key] = (folder.name, title, words)
+            self._keys[folder_key(folder)] = key
+            for w in words:
+                docs = self._postings.get(w)
+                if docs is None:
+                    docs = self._postings[w] = set()
+                    bisect.insort(self._vocab, w)
+                docs.add(key)
+
+    def discard(self, folder: Path) -> None:
+        with self._lock:
+            self._drop(str(folder))
+
+    def folder(self, key: str) -> Path | None:
+        """Папка по ``folder_key``; None — не в индексе."""
+        found = self._keys.get(key)
+        return Path(found) if found is not None else None
+
+    def build(self, root: Path) -> int:
+        """Проиндексировать все папки постов в ``root``; вызывается из потока."""
+        with os.scandir(root) as it:
+            dirs = [
+                Path(e.path) for e in it if not e.name.startswith(".") and e.is_dir()
+            ]
+        for d in dirs:
+            if (d / "meta.json").is_file():
+                self.add(d)
+        return len(self)
+
+    def search(self, query: str, limit: int) -> list[Hit]:
+        """Папки, где нашлись все слова запроса; точные совпадения выше."""
+        terms = tokens(query)
+        if not terms:
+            return []
+        with self._lock:
+            spans = []
+            for term in terms:
+                lo = bisect.bisect_left(self._vocab, term)
+                hi = bisect.bisect_left(self._vocab, term + _MAX_CHAR, lo)
+                if lo == hi:
+                    return []
+                spans.append((hi - lo, term, lo, hi))
+            # сначала самое редкое слово: дальше кандидатов только меньше
+            spans.sort()
+            found: set[str] | None = None
+            for _, term, lo, hi in spans:
+                if found is not None and len(found) < FILTER_BELOW:
+                    found = {
+                        k
+                        for k in found
+                        if any(w.startswith(term) for w in self._docs[k][2])
+                    }
+                else:
+                    matched: set[str] = set()
+                    for w in self._vocab[lo:hi]:
+                        matched |= self._postings[w]
+                    found = matched if found is None else found & matched
+                if not found:
+                    return []
+
+            def rank(key: str) -> tuple[int, str]:
+                name, _, words = self._docs[key]
+                return -sum(t in words for t in terms), name
+
+            best = heapq.nsmallest(limit, found, key=rank)
+            return [Hit(Path(k), self._docs[k][1]) for k in best]
+
+    def _drop(self, key: str) -> None:
+        doc = self._docs.pop(key, None)
+        if doc is None:
+            return
+        self._keys.pop(folder_key(Path(key)), None)
+        for w in doc[2]:
+            docs = self._postings[w]
+            docs.discard(key)
+            if not docs:
+                del self._postings[w]
+                del self._vocab[bisect.bisect_left(self._vocab, w)]
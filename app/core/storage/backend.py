@@ -0,0 +1,106 @@
+"""Хранилище постов: откуда бот берёт папки и где их удаляет после публикации.
+
+Пост — «папка» верхнего уровня: каталог в POSTS_ROOT или общий префикс
+ключей в бакете. ``list_posts`` одним листингом отдаёт все посты с файлами и
+их версиями (mtime/размер локально, ETag в S3) — по ним ``StorageMirror``
+понимает, что изменилось, не читая байты. ``open`` отдаёт поток: файл
+копируется кусками, целиком в память не читается.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import BinaryIO, NamedTuple
+
+from config.settings import settings
+
+
+class StoredFile(NamedTuple):
+    name: str
+    size: int
+    # меняется при любой перезаписи файла
+    version: str
+
+
+class PostStorage(ABC):
+    # True — посты лежат прямо в POSTS_ROOT и рабочая копия не нужна
+    local: bool = False
+
+    def check(self) -> None:
+        """Проверка доступа при старте; недоступное хранилище — выход."""
+
+    @abstractmethod
+    def list_posts(self) -> dict[str, dict[str, StoredFile]]:
+        """{пост: {имя файла: StoredFile}} — все посты одним листингом."""
+
+    @abstractmethod
+    def open(self, post: str, name: str) -> BinaryIO:
+        """Поток на чтение файла поста."""
+
+    @abstractmethod
+    def delete_post(self, post: str) -> None:
+        """Удалить пост целиком; удалённый уже — не ошибка."""
+
+
+def is_post_name(name: str) -> bool:
+    # служебные каталоги (.bot, .import, .mirror) — не посты
+    return bool(name) and not name.startswith(".")
+
+
+class LocalStorage(PostStorage):
+    """Посты — подкаталоги ``root`` на локальной (или смонтированной) ФС."""
+
+    local = True
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def list_posts(self) -> dict[str, dict[str, StoredFile]]:
+        posts: dict[str, dict[str, StoredFile]] = {}
+        with os.scandir(self.root) as it:
+            dirs = [e for e in it if is_post_name(e.name) and e.is_dir()]
+        for d in dirs:
+            files: dict[str, StoredFile] = {}
+            try:
+                with os.scandir(d.path) as it:
+                    for f in it:
+                        if f.name.startswith(".") or not f.is_file():
+                            continue
+                        st = f.stat()
+                        version = f"{st.st_size}-{st.st_mtime_ns}"
+                        files[f.name] = StoredFile(f.name, st.st_size, version)
+            except FileNotFoundError:
+                # папку удалили между листингами
+                continue
+            posts[d.name] = files
+        return posts
+
+    def open(self, post: str, name: str) -> BinaryIO:
+        return (self.root / post / name).open("rb")
+
+    def delete_post(self, post: str) -> None:
+        try:
+            shutil.rmtree(self.root / post)
+        except FileNotFoundError:
+            pass
+
+
+def make_storage(root: Path, prefix: str) -> PostStorage:
+    """Бэкенд по STORAGE_BACKEND; ``prefix`` — папка тенанта в бакете."""
+    cfg = settings.TGBOT
+    if cfg.STORAGE_BACKEND == "s3":
+        from core.storage.s3 import S3Storage
+
+        return S3Storage(
+            cfg.S3_BUCKET,
+            prefix,
+            endpoint_url=cfg.S3_ENDPOINT_URL,
+            region=cfg.S3_REGION,
+            access_key=cfg.S3_ACCESS_KEY,
+            secret_key=cfg.S3_SECRET_KEY,
+            max_connections=cfg.STORAGE_WORKERS,
+        )
+    return LocalStorage(root)
@@ -0,0 +1,226 @@
+"""Рабочая копия постов из внешнего хранилища (S3) в POSTS_ROOT.
+
+Скан, проверка, миниатюры и отправка работают с файлами на диске, поэтому
+пост из бакета скачивается в POSTS_ROOT — но не весь бакет, а только рабочий
+набор: посты с .lock (ждут решения или запланированы) и окно ещё не
+показанных админу (``window``: свободные слоты под карточки). Остальное
+лежит в бакете, пока окно не освободится. Раз в STORAGE_SYNC_INTERVAL —
+один листинг префикса, сравнение версий файлов (ETag) с запомненными и
+скачивание только изменившегося, не больше SCAN_BATCH постов за раз. Файлы
+качаются параллельно в STORAGE_WORKERS потоков, потоком прямо в файл.
+
+Новый пост собирается в ``.mirror/`` и переносится в корень rename'ом —
+скан не видит его наполовину. Изменённый файл готового поста подменяется
+атомарно, .lock и прочие локальные файлы не трогаются. Пост, пропавший из
+бакета, удаляется из рабочей копии; опубликованный удаляется в бакете
+(``remove``) и больше не скачивается.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import closing
+from pathlib import Path
+from time import monotonic, perf_counter
+from typing import NamedTuple
+
+from config.logger import get_logger
+from core.storage.backend import PostStorage, StoredFile
+from core.timing import record
+from storages.mirror_state import MirrorStateStore
+
+log = get_logger(__name__)
+
+MIRROR_DIR_NAME = ".mirror"
+COPY_CHUNK = 1024 * 1024
+
+
+class SyncResult(NamedTuple):
+    posts: int
+    files: int
+    bytes: int
+    removed: int
+    # изменившиеся посты, не уместившиеся в пачку
+    pending: int
+    # новые посты, ждущие места в окне рабочей копии
+    waiting: int
+
+
+class StorageMirror:
+    def __init__(
+        self,
+        storage: PostStorage,
+        root: Path,
+        store: MirrorStateStore,
+        workers: int,
+        batch: int,
+    ) -> None:
+        self.storage = storage
+        self.root = root
+        self.store = store
+        self.workers = max(1, workers)
+        self.batch = max(1, batch)
+        self.staging = root / MIRROR_DIR_NAME
+        # посты, удалённые публикацией: листинг мог снять их до удаления
+        self._removed: set[str] = set()
+        self._lock = threading.Lock()
+        self._synced_at: float | None = None
+
+    def due(self, interval: float) -> bool:
+        return self._synced_at is None or monotonic() - self._synced_at >= interval
+
+    def sync(
+        self, window: int | None = None, exclude: frozenset[str] = frozenset()
+    ) -> SyncResult:
+        """Привести рабочую копию к хранилищу; вызывается из потока.
+
+        ``window`` — сколько постов без .lock может лежать в рабочей копии
+        (None — без предела); посты из ``exclude`` (карантин) в окно не
+        считаются. Скачанные посты обновляются всегда, новые — пока есть место.
+        """
+        started = perf_counter()
+        self._synced_at = monotonic()
+        if self.staging.exists():
+            # недокачанное до рестарта или в упавшей синхронизации
+            shutil.rmtree(self.staging, ignore_errors=True)
+
+        remote = self.storage.list_posts()
+        state = self.store.load()
+        with self._lock:
+            # из листинга пропали — дальше их отсекает сам листинг
+            self._removed &= remote.keys()
+            removed = set(self._removed)
+
+        plans: list[tuple[str, list[StoredFile], list[str]]] = []
+        new: list[str] = []
+        for post in sorted(remote):
+            if post in removed:
+                continue
+            if post not in state.files:
+                new.append(post)
+                continue
+            have = state.files[post]
+            files = remote[post]
+            changed = [f for f in files.values() if have.get(f.name) != f.version]
+            dropped = [n for n in have if n not in files]
+            if changed or dropped:
+                plans.append((post, changed, dropped))
+        gone = [post for post in state.files if post not in remote]
+
+        # место в окне: посты рабочей копии без решения (.lock) его занимают
+        room = len(new)
+        if window is not None:
+            undecided = sum(
+                1
+                for post in state.files
+                if post in remote and post not in exclude and self._undecided(post)
+            )
+            room = min(room, max(0, window - undecided))
+        waiting = len(new) - room
+        plans += [(post, list(remote[post].values()), []) for post in new[:room]]
+
+        todo = plans[: self.batch]
+        fetched = size = posts = 0
+        if todo:
+            self.staging.mkdir(exist_ok=True)
+            with ThreadPoolExecutor(self.workers, thread_name_prefix="mirror") as pool:
+                jobs = [
+                    (post, changed, dropped, self._submit(pool, post, changed))
+                    for post, changed, dropped in todo
+                ]
+                for post, changed, dropped, (dest, futures) in jobs:
+                    try:
+                        sizes = [f.result() for f in futures]
+                        kept = self._finish(post, dest, dropped)
+                    except Exception as e:
+                        # пост целиком повторится в следующий раз
+                        log.warning("Post download failed", post=post, error=str(e))
+                        kept = False
+                    if not kept:
+                        if dest.parent == self.staging:
+                            shutil.rmtree(dest, ignore_errors=True)
+                        continue
+                    state.files[post] = {
+                        name: f.version for name, f in remote[post].items()
+                    }
+                    posts += 1
+                    fetched += len(changed)
+                    size += sum(sizes)
+
+        for post in gone:
+            # убрали из бакета мимо бота — как удалённая локальная папка
+            shutil.rmtree(self.root / post, ignore_errors=True)
+            state.files.pop(post, None)
+        if posts or gone:
+            self.store.save(state)
+
+        elapsed = perf_counter() - started
+        record("storage_sync", elapsed)
+        result = SyncResult(
+            posts, fetched, size, len(gone), len(plans) - len(todo), waiting
+        )
+        if posts or gone or result.pending:
+            log.info(
+                "Storage synced",
+                storage=repr(self.storage),
+                posts=posts,
+                files=fetched,
+                mb=round(size / 1024 / 1024, 1),
+                removed=len(gone),
+                pending=result.pending,
+                waiting=waiting,
+                duration_ms=round(elapsed * 1000, 1),
+            )
+        return result
+
+    def _undecided(self, post: str) -> bool:
+        # .lock ставит превью: без него пост ещё не показан или пропущен
+        folder = self.root / post
+        return folder.is_dir() and not (folder / ".lock").exists()
+
+    def remove(self, post: str) -> None:
+        """Пост опубликован: удалить его в хранилище, затем в рабочей копии."""
+        with self._lock:
+            self._removed.add(post)
+        self.storage.delete_post(post)
+        try:
+            shutil.rmtree(self.root / post)
+        except FileNotFoundError:
+            pass
+        state = self.store.load()
+        if state.files.pop(post, None) is not None:
+            self.store.save(state)
+
+    def _submit(
+        self, pool: ThreadPoolExecutor, post: str, files: list[StoredFile]
+    ) -> tuple[Path, list[Future[int]]]:
+        dest = self.root / post
+        if not dest.exists():
+            # новый пост собирается в стороне и появляется в корне целиком
+            dest = self.staging / post
+            shutil.rmtree(dest, ignore_errors=True)
+            dest.mkdir()
+        return dest, [pool.submit(self._fetch, post, f, dest) for f in files]
+
+    def _fetch(self, post: str, f: StoredFile, dest: Path) -> int:
+        target = dest / f.name
+        # точка в начале: скан, сигнатура папки и сбор картинок её не видят
+        tmp = dest / f".{f.name}.part"
+        with closing(self.storage.open(post, f.name)) as src, tmp.open("wb") as out:
+            shutil.copyfileobj(src, out, COPY_CHUNK)
+        os.replace(tmp, target)
+        return target.stat().st_size
+
+    def _finish(self, post: str, dest: Path, dropped: list[str]) -> bool:
+        with self._lock:
+            if post in self._removed:
+                # опубликован, пока качался, — не воскрешать
+                return False
+            if dest.parent == self.staging:
+                os.rename(dest, self.root / post)
+        for name in dropped:
+            (self.root / post / name).unlink(missing_ok=True)
+        return True
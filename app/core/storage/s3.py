@@ -0,0 +1,110 @@
+"""S3-совместимое хранилище постов (AWS S3, MinIO и т. п.).
+
+Пост — префикс ``<S3_PREFIX><папка>/``, файлы — ключи прямо под ним; ключи
+глубже и «скрытые» имена не считаются. boto3 нужен только этому бэкенду и
+импортируется при первом обращении.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import BinaryIO
+
+from core.storage.backend import PostStorage, StoredFile, is_post_name
+
+# лимит ключей в одном DeleteObjects
+DELETE_BATCH = 1000
+
+
+class S3Storage(PostStorage):
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "",
+        endpoint_url: str = "",
+        region: str = "",
+        access_key: str = "",
+        secret_key: str = "",
+        max_connections: int = 10,
+    ) -> None:
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self._options = {
+            "endpoint_url": endpoint_url or None,
+            "region_name": region or None,
+            # пусто — стандартная цепочка boto3 (env, ~/.aws, роль инстанса)
+            "aws_access_key_id": access_key or None,
+            "aws_secret_access_key": secret_key or None,
+        }
+        self._max_connections = max_connections
+        self._client_obj = None
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"s3://{self.bucket}/{self.prefix}"
+
+    def _client(self):
+        # клиент boto3 потокобезопасен: один на все потоки скачивания
+        with self._lock:
+            if self._client_obj is None:
+                import boto3
+                from botocore.config import Config
+
+                self._client_obj = boto3.session.Session().client(
+                    "s3",
+                    config=Config(
+                        max_pool_connections=self._max_connections,
+                        retries={"max_attempts": 5, "mode": "standard"},
+                    ),
+                    **self._options,
+                )
+            return self._client_obj
+
+    def check(self) -> None:
+        try:
+            self._client().head_bucket(Bucket=self.bucket)
+        except ImportError:
+            raise SystemExit("STORAGE_BACKEND=s3: нужен пакет boto3 (poetry -E s3)")
+        except Exception as e:
+            raise SystemExit(f"Бакет {self!r} недоступен: {e}")
+
+    def list_posts(self) -> dict[str, dict[str, StoredFile]]:
+        posts: dict[str, dict[str, StoredFile]] = {}
+        pages = self._client().get_paginator("list_objects_v2")
+        for page in pages.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for obj in page.get("Contents", []):
+                parts = obj["Key"][len(self.prefix) :].split("/")
+                if len(parts) != 2 or not is_post_name(parts[0]):
+                    continue
+                post, name = parts
+                if not is_post_name(name):
+                    continue
+                # ETag — хэш содержимого: перезапись тем же файлом его не меняет
+                version = obj["ETag"].strip('"')
+                files = posts.setdefault(post, {})
+                files[name] = StoredFile(name, obj["Size"], version)
+        return posts
+
+    def open(self, post: str, name: str) -> BinaryIO:
+        key = f"{self.prefix}{post}/{name}"
+        return self._client().get_object(Bucket=self.bucket, Key=key)["Body"]
+
+    def delete_post(self, post: str) -> None:
+        client = self._client()
+        keys: list[str] = []
+        pages = client.get_paginator("list_objects_v2")
+        for page in pages.paginate(Bucket=self.bucket, Prefix=f"{self.prefix}{post}/"):
+            keys += [obj["Key"] for obj in page.get("Contents", [])]
+        for i in range(0, len(keys), DELETE_BATCH):
+            resp = client.delete_objects(
+                Bucket=self.bucket,
+                Delete={
+                    "Objects": [{"Key": k} for k in keys[i : i + DELETE_BATCH]],
+                    "Quiet": True,
+                },
+            )
+            if resp.get("Errors"):
+                err = resp["Errors"][0]
+                raise RuntimeError(
+                    f"Cannot delete {err['Key']} from {self!r}: {err['Message']}"
+                )
@@ -0,0 +1,119 @@
+"""Шаблоны карточки поста и подписи в канале.
+
+Шаблон — строка в синтаксисе ``str.format`` с полями ``{name}``, ``{title}``,
+``{meta}``, ``{description}``. Он разбирается один раз (кэш по тексту
+шаблона), дальше рендер — склейка готовых кусков. Строка шаблона, в которой
+все поля пусты, выпадает целиком: метка «description.txt:» не повиснет без
+описания.
+
+Карточка — HTML: значения экранируются, лимит считается по видимому тексту.
+Подпись уходит без parse_mode, как есть.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from pathlib import Path
+from string import Formatter
+from typing import TYPE_CHECKING
+
+from config.settings import MAX_CAPTION, MAX_MESSAGE
+from core.utils import html_escape, trim_html, trim_text, visible_len
+
+if TYPE_CHECKING:
+    from core.tenants import Tenant
+
+FIELDS = frozenset({"name", "title", "meta", "description"})
+
+DEFAULT_CARD_TEMPLATE = (
+    "📦 <b>{name}</b>\n{meta}\n\n<b>description.txt</b>:{description}"
+)
+DEFAULT_CAPTION_TEMPLATE = "{description}"
+
+# описание в карточке — короткий анонс, полный текст уйдёт подписью
+CARD_DESCRIPTION_LIMIT = 500
+
+
+class CompiledTemplate:
+    """Разобранный шаблон: строки из кусков (литерал, поле или None)."""
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self.lines: list[tuple[list[tuple[str, str | None]], bool]] = []
+        for line in source.split("\n"):
+            parts = [
+                (literal, field)
+                for literal, field, spec, conv in Formatter().parse(line)
+            ]
+            fields = {f for _, f in parts if f is not None}
+            unknown = fields - FIELDS
+            if unknown:
+                raise ValueError(
+                    f"Неизвестные поля шаблона {sorted(unknown)}, "
+                    f"доступны: {sorted(FIELDS)}"
+                )
+            self.lines.append((parts, bool(fields)))
+
+    def render(self, values: dict[str, str]) -> str:
+        out = []
+        for parts, has_fields in self.lines:
+            if has_fields and not any(values[f] for _, f in parts if f):
+                continue
+            out.append("".join(lit + (values[f] if f else "") for lit, f in parts))
+        return "\n".join(out).rstrip()
+
+
+@lru_cache(maxsize=64)
+def compile_template(source: str) -> CompiledTemplate:
+    return CompiledTemplate(source)
+
+
+def _meta_value(v: object) -> str:
+    return ", ".join(map(str, v)) if isinstance(v, list) else str(v)
+
+
+def _meta_block(meta: dict) -> str:
+    return "\n".join(
+        f"<b>{html_escape(str(k))}:</b> {html_escape(_meta_value(v))}"
+        for k, v in meta.items()
+    )
+
+
+def render_card(
+    tenant: Tenant,
+    folder: Path,
+    meta: dict,
+    desc: str | None,
+    footer: str = "",
+) -> str:
+    """HTML карточки для админа; ``footer`` (готовый HTML) входит в лимит."""
+    values = {
+        "name": html_escape(folder.name),
+        "title": html_escape(str(meta.get("title") or "")),
+        "meta": _meta_block(meta) if meta else "",
+        "description": "",
+    }
+    if desc:
+        # сколько видимых символов осталось под описание после остальной карточки
+        rest = visible_len(tenant.card_template.render(values) + footer)
+        room = min(CARD_DESCRIPTION_LIMIT, MAX_MESSAGE - rest)
+        if room > 1:
+            values["description"] = html_escape(trim_text(desc, room))
+    return trim_html(tenant.card_template.render(values) + footer, MAX_MESSAGE)
+
+
+def render_caption(
+    tenant: Tenant, folder: Path, meta: dict | None, desc: str | None
+) -> str:
+    """Подпись к альбому в канале; пустой результат — имя папки."""
+    meta = meta or {}
+    values = {
+        "name": folder.name,
+        "title": str(meta.get("title") or ""),
+        "meta": "\n".join(f"{k}: {_meta_value(v)}" for k, v in meta.items()),
+        # подпись режется целиком ниже, тут хватит первых MAX_CAPTION символов
+        "description": trim_text(desc, MAX_CAPTION + 1, ellipsis=""),
+    }
+    return trim_text(
+        tenant.caption_template.render(values) or folder.name, MAX_CAPTION
+    )
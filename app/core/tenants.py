@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from config.logger import get_logger
+from config.settings import TenantSettings, settings
+from core.rate_limit import RateLimiter
+from core.scan_cursor import ScanCursor
+from core.search import SearchIndex
+from core.storage.backend import make_storage
+from core.storage.mirror import StorageMirror
+from core.templates import (
+    DEFAULT_CAPTION_TEMPLATE,
+    DEFAULT_CARD_TEMPLATE,
+    compile_template,
+)
+from schemas.schema import ScheduledPost
+from storages.event_log import EventLog
+from storages.mirror_state import MIRROR_STATE_FILE_NAME, MirrorStateStore
+from storages.pending_queue import QUEUE_FILE_NAME, PendingQueue
+from storages.preview_store import PREVIEWS_FILE_NAME, PreviewStore
+from storages.publish_journal import JOURNAL_FILE_NAME, PublishJournal
+from storages.scan_state import SCAN_STATE_FILE_NAME, ScanStateStore
+from storages.scheduled_store import SCHEDULE_FILE_NAME, ScheduledStore
+from storages.validation_store import VALIDATION_FILE_NAME, ValidationStore
+
+log = get_logger(__name__)
+
+tg_bot_settings = settings.TGBOT
+
+STATE_DIR_NAME = ".bot"
+STATE_FILES = (
+    SCHEDULE_FILE_NAME,
+    JOURNAL_FILE_NAME,
+    QUEUE_FILE_NAME,
+    VALIDATION_FILE_NAME,
+    SCAN_STATE_FILE_NAME,
+)
+
+
+class Tenant:
+    """Конвейер одного канала: папка постов, канал, админы и свои сторы."""
+
+    def __init__(self, cfg: TenantSettings) -> None:
+        self.name = cfg.NAME
+        self.posts_root = cfg.POSTS_ROOT
+        self.channel_id = cfg.CHANNEL_ID
+        self.admin_chat_id = cfg.ADMIN_CHAT_ID
+        self.admin_ids = set(cfg.ADMIN_IDS or [cfg.ADMIN_CHAT_ID])
+        # куда заранее грузятся медиа плановых постов ради file_id
+        self.staging_chat_id = (
+            cfg.STAGING_CHAT_ID or tg_bot_settings.STAGING_CHAT_ID or cfg.ADMIN_CHAT_ID
+        )
+        self.max_pending_previews = (
+            cfg.MAX_PENDING_PREVIEWS
+            if cfg.MAX_PENDING_PREVIEWS is not None
+            else tg_bot_settings.MAX_PENDING_PREVIEWS
+        )
+
+        # файлы состояния — в подкаталоге: их запись не трогает mtime корня,
+        # по которому скан понимает, что новых папок нет
+        self.state_dir = self.posts_root / STATE_DIR_NAME
+        self.scheduled = ScheduledStore(self.state_dir / SCHEDULE_FILE_NAME)
+        self.journal = PublishJournal(self.state_dir / JOURNAL_FILE_NAME)
+        self.pending = PendingQueue(self.state_dir / QUEUE_FILE_NAME)
+        self.validation = ValidationStore(self.state_dir / VALIDATION_FILE_NAME)
+        self.previews = PreviewStore(self.state_dir / PREVIEWS_FILE_NAME)
+        self.events = EventLog(
+            self.state_dir,
+            tg_bot_settings.EVENT_LOG_MAX_BYTES,
+            tg_bot_settings.EVENT_LOG_KEEP,
+            tg_bot_settings.STATS_DAYS,
+        )
+        # поиск /find по папкам в корне; в памяти, строится при старте
+        self.search = SearchIndex()
+        self.scanner = ScanCursor(
+            self.posts_root, ScanStateStore(self.state_dir / SCAN_STATE_FILE_NAME)
+        )
+        # посты во внешнем хранилище скачиваются в POSTS_ROOT (core.storage)
+        prefix = cfg.S3_PREFIX
+        if prefix is None:
+            prefix = f"{tg_bot_settings.S3_PREFIX.strip('/')}/{cfg.NAME}"
+        self.storage = make_storage(self.posts_root, prefix)
+        self.mirror = (
+            None
+            if self.storage.local
+            else StorageMirror(
+                self.storage,
+                self.posts_root,
+                MirrorStateStore(self.state_dir / MIRROR_STATE_FILE_NAME),
+                tg_bot_settings.STORAGE_WORKERS,
+                tg_bot_settings.SCAN_BATCH,
+            )
+        )
+
+        # токены карточек, ждущих решения админа (approve/skip/schedule)
+        self.awaiting: set[str] = set()
+        # общий пул соединений бота, но свой темп отправок на каждый канал
+        self.limiter = RateLimiter(
+            cfg.SEND_RATE_PER_MIN or tg_bot_settings.SEND_RATE_PER_MIN
+        )
+        # шаблоны разбираются один раз; опечатка в поле валит старт, а не скан
+        self.card_template = compile_template(
+            cfg.CARD_TEMPLATE or tg_bot_settings.CARD_TEMPLATE or DEFAULT_CARD_TEMPLATE
+        )
+        self.caption_template = compile_template(
+            cfg.CAPTION_TEMPLATE
+            or tg_bot_settings.CAPTION_TEMPLATE
+            or DEFAULT_CAPTION_TEMPLATE
+        )
+        self._root_resolved = self.posts_root.resolve()
+
+    def prepare(self) -> None:
+        """Создать каталог состояния; файлы из корня (старая раскладка) перенести."""
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        for name in STATE_FILES:
+            old, new = self.posts_root / name, self.state_dir / name
+            if old.exists() and not new.exists():
+                os.replace(old, new)
+
+    def owns(self, folder: Path) -> bool:
+        try:
+            folder.resolve().relative_to(self._root_resolved)
+            return True
+        except Exception:
+            return False
+
+    def remove_post(self, folder: Path) -> None:
+        """Пост опубликован: удалить его из хранилища (и рабочей копии)."""
+        if self.mirror is not None:
+            self.mirror.remove(folder.name)
+        else:
+            self.storage.delete_post(folder.name)
+
+    def is_admin(self, user_id: int | None) -> bool:
+        return user_id in self.admin_ids
+
+    def track(self, event: str, folder: Path, **fields: object) -> None:
+        """Событие поста в журнал для /stats; сбой записи конвейер не ломает."""
+        try:
+            self.events.emit(event, folder.name, **fields)
+        except Exception:
+            log.exception("Event log write failed", tenant=self.name, event=event)
+
+
+TENANTS: dict[str, Tenant] = {
+    cfg.NAME: Tenant(cfg) for cfg in tg_bot_settings.tenants()
+}
+
+
+def all_tenants() -> list[Tenant]:
+    return list(TENANTS.values())
+
+
+def tenant_for_folder(folder: Path) -> Tenant | None:
+    for tenant in TENANTS.values():
+        if tenant.owns(folder):
+            return tenant
+    return None
+
+
+def tenants_for_user(user_id: int | None) -> list[Tenant]:
+    return [t for t in TENANTS.values() if t.is_admin(user_id)]
+
+
+def all_admin_ids() -> set[int]:
+    return set().union(*(t.admin_ids for t in TENANTS.values()))
+
+
+def find_job(
+    job_id: str, tenants: list[Tenant]
+) -> tuple[Tenant, ScheduledPost] | None:
+    for tenant in tenants:
+        item = tenant.scheduled.get(job_id)
+        if item is not None:
+            return tenant, item
+    return None
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+from pathlib import Path
+
+from config.logger import get_logger
+from config.settings import settings
+
+log = get_logger(__name__)
+
+tg_bot_settings = settings.TGBOT
+
+HASH_CHUNK = 1 << 20
+
+
+def content_hash(path: Path) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(HASH_CHUNK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _render(src: Path, dst: Path, max_side: int, quality: int) -> None:
+    # Pillow тяжёлый (~20 мс на импорт) и нужен только при первом превью
+    from PIL import Image, ImageOps
+
+    with Image.open(src) as im:
+        # draft() позволяет JPEG-декодеру сразу отдать уменьшенную копию
+        im.draft("RGB", (max_side, max_side))
+        im = ImageOps.exif_transpose(im)
+        im.thumbnail((max_side, max_side))
+        if im.mode not in ("RGB", "L"):
+            im = im.convert("RGB")
+        tmp = dst.with_name(dst.name + ".tmp")
+        im.save(tmp, "JPEG", quality=quality, optimize=True)
+    os.replace(tmp, dst)
+
+
+def make_thumbnail(src: Path) -> Path:
+    """Вернёт путь к уменьшенной копии (из кэша или свежесозданной).
+
+    При любой ошибке возвращает оригинал — превью не должно ломаться.
+    """
+    max_side = tg_bot_settings.PREVIEW_THUMB_SIZE
+    quality = tg_bot_settings.PREVIEW_THUMB_QUALITY
+    cache_dir = tg_bot_settings.THUMB_CACHE_DIR
+    try:
+        key = f"{content_hash(src)}_{max_side}q{quality}.jpg"
+        dst = cache_dir / key
+        if dst.exists():
+            return dst
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        _render(src, dst, max_side, quality)
+        return dst
+    except Exception as e:
+        log.warning("Cannot make thumbnail for %s: %s", src, e)
+        return src
+
+
+async def preview_images(images: list[Path]) -> list[Path]:
+    """Готовит миниатюры вне event loop, сохраняя порядок."""
+    if tg_bot_settings.PREVIEW_THUMB_SIZE <= 0:
+        return images
+    return list(
+        await asyncio.gather(*(asyncio.to_thread(make_thumbnail, i) for i in images))
+    )
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import functools
+from collections import deque
+from time import perf_counter
+from typing import Awaitable, Callable
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from config.logger import get_logger
+from config.settings import settings
+
+log = get_logger(__name__)
+
+tg_bot_settings = settings.TGBOT
+
+HandlerCallback = Callable[[Update, ContextTypes.DEFAULT_TYPE], Awaitable[None]]
+
+SAMPLES_KEEP = 512
+
+
+class HandlerStats:
+    def __init__(self) -> None:
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples: deque[float] = deque(maxlen=SAMPLES_KEEP)
+
+    def add(self, elapsed: float, failed: bool = False) -> None:
+        self.count += 1
+        self.errors += failed
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+        self.samples.append(elapsed)
+
+    def percentile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    @property
+    def avg(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+# {"<handler>:<update_type>": HandlerStats}
+STATS: dict[str, HandlerStats] = {}
+
+
+def update_type(update: object) -> str:
+    if not isinstance(update, Update):
+        return type(update).__name__
+    if update.callback_query:
+        action = (update.callback_query.data or "").split(":", 1)[0]
+        return f"callback:{action or '?'}"
+    if update.message:
+        text = update.message.text or ""
+        if text.startswith("/"):
+            return "command:" + text.split(maxsplit=1)[0][1:].split("@", 1)[0]
+        return "message"
+    if update.inline_query:
+        return "inline_query"
+    return "other"
+
+
+def record(key: str, elapsed: float, failed: bool = False) -> None:
+    STATS.setdefault(key, HandlerStats()).add(elapsed, failed)
+
+
+def timed(callback: HandlerCallback, name: str | None = None) -> HandlerCallback:
+    """Оборачивает хендлер: латентность по хендлеру и типу апдейта + лог медленных."""
+    handler_name = name or callback.__name__
+
+    @functools.wraps(callback)
+    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        kind = update_type(update)
+        started = perf_counter()
+        failed = False
+        try:
+            return await callback(update, context)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            elapsed = perf_counter() - started
+            record(f"{handler_name}:{kind}", elapsed, failed)
+            elapsed_ms = round(elapsed * 1000, 1)
+            if elapsed_ms >= tg_bot_settings.SLOW_UPDATE_MS:
+                log.warning(
+                    "Slow update",
+                    handler=handler_name,
+                    update_type=kind,
+                    update_id=getattr(update, "update_id", None),
+                    duration_ms=elapsed_ms,
+                    failed=failed,
+                )
+
+    return wrapper
+
+
+def format_stats() -> str:
+    if not STATS:
+        return "Замеров пока нет."
+    lines = ["handler:update — n / err / avg / p50 / p99 / max (мс)"]
+    for key, st in sorted(STATS.items(), key=lambda kv: -kv[1].total):
+        lines.append(
+            f"{key} — {st.count} / {st.errors} / {st.avg * 1000:.0f} / "
+            f"{st.percentile(0.5) * 1000:.0f} / {st.percentile(0.99) * 1000:.0f} / "
+            f"{st.max * 1000:.0f}"
+        )
+    return "\n".join(lines)
@@ -1,17 +1,102 @@
 from __future__ import annotations
 
+import re
+from datetime import timedelta
 from pathlib import Path
 
+from telegram.error import RetryAfter
+
 from config.logger import get_logger
 from schemas.enums import IMAGE_EXTS
 
 log = get_logger(__name__)
 
 
+_HTML_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+_LEADING_WS = re.compile(r"\s*")
+# тег, HTML-сущность или кусок текста между ними
+_HTML_TOKEN = re.compile(r"<(/?)([a-zA-Z-]+)[^>]*>|&#?\w+;|[^<&]+|[<&]")
+
+
 def html_escape(s: str | list) -> str:
     if isinstance(s, list):
         s = ", ".join(map(str, s))
-    return s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    return s.translate(_HTML_ESCAPES)
+
+
+def utf16_len(s: str) -> int:
+    """Длина так, как её считает Telegram: в UTF-16 code units."""
+    return len(s.encode("utf-16-le")) // 2
+
+
+def _utf16_cut(s: str, units: int) -> str:
+    # обрезка по UTF-16; разрезанная суррогатная пара отбрасывается целиком
+    return s.encode("utf-16-le")[: units * 2].decode("utf-16-le", errors="ignore")
+
+
+def trim_text(text: str | None, limit: int, ellipsis: str = "…") -> str:
+    """Обрезает текст до ``limit`` единиц UTF-16 с многоточием.
+
+    Смотрит только на первые ``limit`` символов: длинное описание не копируется
+    и не кодируется целиком.
+    """
+    if not text:
+        return ""
+    start = _LEADING_WS.match(text).end()
+    end = start + limit + 1
+    head = text[start:end]
+    # дальше head только пробелы — текст, возможно, влезает целиком
+    if _LEADING_WS.match(text, end).end() >= len(text):
+        stripped = head.rstrip()
+        if utf16_len(stripped) <= limit:
+            return stripped
+    return _utf16_cut(head, limit - len(ellipsis)).rstrip() + ellipsis
+
+
+def visible_len(html: str) -> int:
+    """Длина HTML-текста после разбора Telegram: без тегов, сущность — 1."""
+    used = 0
+    for m in _HTML_TOKEN.finditer(html):
+        token = m.group(0)
+        if m.group(2):
+            continue
+        used += 1 if token[0] == "&" and len(token) > 1 else utf16_len(token)
+    return used
+
+
+def trim_html(html: str, limit: int, ellipsis: str = "…") -> str:
+    """Обрезает HTML-разметку Telegram по видимому тексту за один проход.
+
+    Теги в лимит не входят, сущность (``&amp;``) считается одним символом —
+    как у Telegram после разбора. Обрезка не рвёт тег или сущность, открытые
+    теги закрываются.
+    """
+    budget = limit - len(ellipsis)
+    used = 0
+    open_tags: list[str] = []
+    # точка обрезки: куда встанет многоточие, если текст не влезет целиком
+    cut: tuple[str, list[str]] | None = None
+    for m in _HTML_TOKEN.finditer(html):
+        token = m.group(0)
+        if m.group(2):
+            if m.group(1):
+                if open_tags and open_tags[-1] == m.group(2):
+                    open_tags.pop()
+            else:
+                open_tags.append(m.group(2))
+            continue
+        entity = token[0] == "&" and len(token) > 1
+        size = 1 if entity else utf16_len(token)
+        if cut is None and used + size > budget:
+            head = html[: m.start()]
+            if not entity:
+                head += _utf16_cut(token, budget - used)
+            cut = (head, list(open_tags))
+        used += size
+        if used > limit:
+            head, tags = cut
+            return head + ellipsis + "".join(f"</{t}>" for t in reversed(tags))
+    return html
 
 
 def collect_images(folder: Path) -> list[Path]:
@@ -29,3 +114,11 @@ def create_path_if_not_exists(path: Path) -> None:
 
     elif not path.is_dir():
         raise SystemExit(f"POSTS_ROOT {path} не является директорией.")
+
+
+def retry_after_seconds(e: RetryAfter) -> float:
+    # с v22.2 retry_after может быть timedelta (PTB_TIMEDELTA)
+    value = e.retry_after
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    return float(value)
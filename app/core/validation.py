@@ -0,0 +1,101 @@
+"""Проверка папок постов до превью.
+
+Сама проверка (``validate_folder``) живёт в ``core.validation_worker`` и
+выполняется в воркерах ProcessPoolExecutor. ``filter_valid`` — оркестратор в
+event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from telegram.ext import Application
+
+from config.logger import get_logger
+from config.settings import settings
+from core.channel.media import LOCAL_MODE
+from core.tenants import Tenant
+from core.validation_worker import fingerprint, validate_folder
+
+log = get_logger(__name__)
+
+tg_bot_settings = settings.TGBOT
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: форк процесса с потоками (листенер логов, executor) небезопасен
+        _pool = ProcessPoolExecutor(
+            max_workers=tg_bot_settings.VALIDATION_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _fingerprints(folders: list[Path]) -> list[str | None]:
+    out: list[str | None] = []
+    for f in folders:
+        try:
+            out.append(fingerprint(f))
+        except OSError:
+            # папку удалили/переименовали между листингом и проверкой
+            out.append(None)
+    return out
+
+
+async def filter_valid(
+    app: Application, tenant: Tenant, folders: list[Path]
+) -> list[Path]:
+    """Вернёт папки, прошедшие проверку; остальные попадают в карантин.
+
+    Результат кэшируется по сигнатуре содержимого, так что неизменённая папка
+    проверяется один раз.
+    """
+    if not folders:
+        return []
+
+    prints = await asyncio.to_thread(_fingerprints, folders)
+    cache = tenant.validation.load_all()
+    misses = [(f, fp) for f, fp in zip(folders, prints) if fp and fp not in cache]
+
+    if misses:
+        loop = asyncio.get_running_loop()
+        pool = _get_pool()
+        reports = await asyncio.gather(
+            *(
+                loop.run_in_executor(pool, validate_folder, str(f), fp, LOCAL_MODE)
+                for f, fp in misses
+            )
+        )
+        for report in reports:
+            cache[report.fingerprint] = report
+        tenant.validation.save_all(cache)
+
+        bad = [r for r in reports if not r.ok]
+        if bad:
+            log.warning(
+                "Folders quarantined",
+                tenant=tenant.name,
+                folders=[Path(r.folder).name for r in bad],
+                checked=len(reports),
+            )
+            await app.bot.send_message(
+                chat_id=tenant.admin_chat_id,
+                text=f"🚫 Не прошли проверку и отложены в карантин: {len(bad)}.\n"
+                "Подробности: /quarantine",
+            )
+
+    return [f for f, fp in zip(folders, prints) if fp and cache[fp].ok]
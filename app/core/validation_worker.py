@@ -0,0 +1,125 @@
+"""Код, исполняемый в воркерах проверки (ProcessPoolExecutor, spawn).
+
+Spawn-воркер импортирует этот модуль заново, поэтому здесь нет импортов бота,
+тенантов и логгера: только константы лимитов, схемы и PIL. Воркер читает
+файлы и ничего не пишет — ни на диск, ни в лог.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+from pydantic import ValidationError
+
+from config.settings import (
+    LOCAL_MAX_FILE_BYTES,
+    MAX_CAPTION,
+    MAX_PHOTO_BYTES,
+    MAX_PHOTO_RATIO,
+    MAX_PHOTO_SIDES_SUM,
+)
+from schemas.enums import IMAGE_EXTS
+from schemas.schema import PostMeta, ValidationReport
+
+
+def fingerprint(folder: Path) -> str:
+    """Сигнатура содержимого папки: имена, размеры и mtime всех файлов.
+
+    Любая правка файла меняет сигнатуру, а считать её — один stat на файл,
+    без чтения байтов.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for f in sorted(folder.iterdir(), key=lambda x: x.name):
+        if f.name.startswith(".") or not f.is_file():
+            continue
+        st = f.stat()
+        h.update(f"{f.name}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+
+def photo_limit_error(size: int, w: int, h: int) -> str | None:
+    """Почему файл не пройдёт как фото (лимиты sendPhoto); None — пройдёт."""
+    if size > MAX_PHOTO_BYTES:
+        return f"{size / 1024 / 1024:.1f} МБ > {MAX_PHOTO_BYTES // 1024 // 1024} МБ"
+    if w + h > MAX_PHOTO_SIDES_SUM:
+        return f"{w}x{h}, сумма сторон > {MAX_PHOTO_SIDES_SUM}"
+    if max(w, h) > MAX_PHOTO_RATIO * min(w, h):
+        return f"{w}x{h}, соотношение сторон > {MAX_PHOTO_RATIO}:1"
+    return None
+
+
+def _utf16_len(s: str) -> int:
+    # как core.utils.utf16_len; utils тянет telegram и логгер
+    return len(s.encode("utf-16-le")) // 2
+
+
+def _images(folder: Path) -> list[Path]:
+    # тот же отбор и порядок, что у core.utils.collect_images
+    return [
+        f
+        for f in sorted(folder.iterdir(), key=lambda x: x.name.lower())
+        if f.is_file() and f.suffix.lower() in IMAGE_EXTS
+    ]
+
+
+def _check_image(path: Path, local: bool) -> str | None:
+    from PIL import Image
+
+    size = path.stat().st_size
+    if local and size > LOCAL_MAX_FILE_BYTES:
+        return f"{path.name}: {size / 1024 / 1024:.0f} МБ > лимита локального Bot API"
+    if not local and size > MAX_PHOTO_BYTES:
+        return f"{path.name}: {size / 1024 / 1024:.1f} МБ > 10 МБ"
+    try:
+        with Image.open(path) as im:
+            im.load()
+            w, h = im.size
+    except Exception as e:
+        return f"{path.name}: не декодируется ({e})"
+    # с локальным сервером файл за лимитами фото уйдёт документом
+    err = None if local else photo_limit_error(size, w, h)
+    return f"{path.name}: {err}" if err else None
+
+
+def validate_folder(
+    folder_str: str, expected_fingerprint: str, local: bool
+) -> ValidationReport:
+    folder = Path(folder_str)
+    errors: list[str] = []
+
+    title = None
+    try:
+        raw = json.loads((folder / "meta.json").read_text("utf-8"))
+        title = PostMeta.model_validate(raw).title
+    except json.JSONDecodeError as e:
+        errors.append(f"meta.json: невалидный JSON ({e})")
+    except ValidationError as e:
+        errors += [f"meta.json: {err['msg']}" for err in e.errors()]
+    except Exception as e:
+        errors.append(f"meta.json: не читается ({e})")
+
+    desc_path = folder / "description.txt"
+    if desc_path.exists():
+        caption = desc_path.read_text("utf-8", errors="replace").strip()
+        # Telegram считает длину в UTF-16: эмодзи — две единицы
+        if _utf16_len(caption) > MAX_CAPTION:
+            errors.append(
+                f"description.txt: {_utf16_len(caption)} > {MAX_CAPTION} символов"
+            )
+    if title and _utf16_len(title.strip()) > MAX_CAPTION:
+        errors.append(f"meta.json: title длиннее {MAX_CAPTION} символов")
+
+    for img in _images(folder):
+        err = _check_image(img, local)
+        if err:
+            errors.append(err)
+
+    return ValidationReport(
+        folder=folder_str,
+        fingerprint=expected_fingerprint,
+        errors=errors,
+        checked_at=datetime.now(timezone.utc),
+    )
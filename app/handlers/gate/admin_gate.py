@@ -1,13 +1,14 @@
 from telegram import Update
 from telegram.ext import ContextTypes, ApplicationHandlerStop
 
-from config.settings import settings
-tg_bot_settings = settings.TGBOT
+from core.tenants import all_admin_ids
+
+ADMIN_IDS = all_admin_ids()
 
 
 async def admin_gate(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     user = update.effective_user
-    if not user or user.id != tg_bot_settings.ADMIN_CHAT_ID:
+    if not user or user.id not in ADMIN_IDS:
         cq = getattr(update, "callback_query", None)
         if cq:
             await cq.answer("Доступ только для администратора", show_alert=False)
@@ -3,6 +3,8 @@ from telegram.constants import ParseMode
 from telegram.ext import ContextTypes
 
 from config.settings import settings, TZ
+from core.tenants import tenants_for_user
+from core.utils import html_escape
 
 tg_bot_settings = settings.TGBOT
 
@@ -20,6 +22,12 @@ HELP_TEXT = (
     "• <code>/stop_scan &lt;task_id&gt;</code> — остановить периодическое сканирование\n"
     "• <code>/view_jobs</code> — показать запланированные публикации (job_id и время)\n"
     "• <code>/view_job &lt;job_id&gt;</code> — открыть превью конкретной публикации + плановая дата\n"
+    "• <code>/find &lt;слова&gt;</code> — найти пост по имени папки, meta.json и описанию; то же в любом чате: <code>@бот слова</code> (инлайн-режим включается в BotFather)\n"
+    "• <code>/quarantine</code> — папки, не прошедшие проверку (битые изображения, meta.json, длина подписи)\n"
+    "• <code>/import &lt;архив&gt; [канал]</code> — распаковать zip/tar с папками постов из каталога импорта\n"
+    "• <code>/stats</code> — статистика постов: одобрение, публикации в день, путь от скана до канала\n"
+    "• <code>/timings</code> — латентность хендлеров (p50/p99)\n"
+    "• <code>/profile &lt;сек&gt;</code> — снять профиль (HTML-отчёт документом), <code>/profile_stop</code> — досрочно\n"
     "• <code>/help</code> — эта справка\n\n"
     "<b>Утверждение и расписание</b>\n"
     "После предпросмотра жми «✅ Утвердить…» → выбери «Сейчас» или «Запланировать».\n"
@@ -30,11 +38,26 @@ HELP_TEXT = (
 )
 
 
+def _caps_text(user_id: int) -> str:
+    """Лимит ждущих карточек — свой у каждого тенанта пользователя."""
+    caps = [
+        f"<b>{html_escape(t.name)}</b> — {t.max_pending_previews or '∞'}"
+        for t in tenants_for_user(user_id)
+    ]
+    if not caps:
+        return ""
+    return (
+        "• Одновременно ждут решения не больше: "
+        + ", ".join(caps)
+        + " карточек, остальные папки встают в очередь (глубина — в /start).\n"
+    )
+
+
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     chat_id = update.effective_chat.id
     await context.bot.send_message(
         chat_id=chat_id,
-        text=HELP_TEXT,
+        text=HELP_TEXT + _caps_text(update.effective_user.id),
         parse_mode=ParseMode.HTML,
         disable_web_page_preview=True,
     )
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from telegram import Update
+from telegram.constants import ParseMode
+from telegram.ext import ContextTypes
+
+from config.logger import get_logger
+from config.settings import settings
+from core.importer import import_archive, running
+from core.tenants import Tenant, tenants_for_user
+from core.utils import html_escape
+
+log = get_logger(__name__)
+
+tg_bot_settings = settings.TGBOT
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+LIST_LIMIT = 20
+ERRORS_SHOWN = 5
+
+
+async def import_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    if not tg_bot_settings.IMPORT_DIR:
+        await update.message.reply_text("Импорт выключен: задай TGBOT_IMPORT_DIR.")
+        return
+    import_dir = Path(tg_bot_settings.IMPORT_DIR).resolve()
+    args = context.args or []
+    if not args:
+        await update.message.reply_text(
+            _usage(import_dir), parse_mode=ParseMode.HTML
+        )
+        return
+
+    tenants = tenants_for_user(update.effective_user.id)
+    if len(args) > 1:
+        tenants = [t for t in tenants if t.name == args[1]]
+    if len(tenants) != 1:
+        names = ", ".join(t.name for t in tenants_for_user(update.effective_user.id))
+        await update.message.reply_text(
+            f"Укажи канал: /import <архив> <канал>. Доступны: {names}"
+        )
+        return
+    tenant = tenants[0]
+
+    archive = (import_dir / args[0]).resolve()
+    if not archive.is_relative_to(import_dir) or not archive.is_file():
+        await update.message.reply_text("Архив не найден в каталоге импорта.")
+        return
+    if running(tenant):
+        await update.message.reply_text("Импорт в этот канал уже идёт.")
+        return
+
+    await update.message.reply_text(
+        f"📦 Импортирую {archive.name} в {tenant.name}. Папки появятся в корне "
+        f"пачками по {tg_bot_settings.IMPORT_BATCH}."
+    )
+    # распаковка тысяч папок идёт минутами — хендлер не держим
+    context.application.create_task(
+        _run_import(context, update.effective_chat.id, tenant, archive),
+        update=update,
+    )
+
+
+async def _run_import(
+    context: ContextTypes.DEFAULT_TYPE, chat_id: int, tenant: Tenant, archive: Path
+) -> None:
+    try:
+        result = await import_archive(tenant, archive)
+    except Exception as e:
+        log.exception("Archive import failed", tenant=tenant.name, archive=str(archive))
+        await context.bot.send_message(
+            chat_id, f"⚠️ Импорт {archive.name} не удался: {e}"
+        )
+        return
+
+    lines = [
+        f"✅ <b>Импорт {html_escape(archive.name)}</b>: "
+        f"{result.imported} папок, {result.files} файлов, "
+        f"{result.bytes / 1024 / 1024:.1f} МБ"
+    ]
+    if result.existing:
+        lines.append(f"Уже были в корне: {len(result.existing)}")
+    if result.skipped:
+        lines.append(f"Пропущено файлов вне папок постов: {len(result.skipped)}")
+    if result.rejected:
+        lines.append(f"Отклонено (meta.json): {len(result.rejected)}")
+        lines += [f"  • {html_escape(r)}" for r in result.rejected[:ERRORS_SHOWN]]
+        if len(result.rejected) > ERRORS_SHOWN:
+            lines.append(f"  … ещё {len(result.rejected) - ERRORS_SHOWN}")
+    await context.bot.send_message(
+        chat_id, "\n".join(lines), parse_mode=ParseMode.HTML
+    )
+
+
+def _usage(import_dir: Path) -> str:
+    archives = sorted(
+        p.name
+        for p in import_dir.iterdir()
+        if p.is_file() and p.name.lower().endswith(ARCHIVE_SUFFIXES)
+    )
+    lines = ["Импорт папок постов: <code>/import &lt;архив&gt; [канал]</code>"]
+    if archives:
+        lines.append(f"\nАрхивы в <code>{html_escape(str(import_dir))}</code>:")
+        lines += [f"• <code>{html_escape(a)}</code>" for a in archives[:LIST_LIMIT]]
+    else:
+        lines.append(f"\nВ <code>{html_escape(str(import_dir))}</code> архивов нет.")
+    return "\n".join(lines)
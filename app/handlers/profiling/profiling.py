@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+
+from telegram import Update
+from telegram.constants import ParseMode
+from telegram.ext import Application, ContextTypes
+
+from config.logger import get_logger
+from config.settings import TZ
+from core.http import format_pools
+from core.timing import format_stats
+from core.utils import html_escape
+
+log = get_logger(__name__)
+
+PROFILE_MAX_SECONDS = 600
+PROFILE_DEFAULT_SECONDS = 30
+
+# активная сессия профилирования: сигнал досрочной остановки
+_stop_event: asyncio.Event | None = None
+
+
+async def timings_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    text = "\n\n".join(filter(None, [format_stats(), format_pools()]))
+    await update.effective_chat.send_message(
+        f"<pre>{html_escape(text)}</pre>", parse_mode=ParseMode.HTML
+    )
+
+
+async def profile_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    global _stop_event
+
+    if _stop_event is not None:
+        await update.message.reply_text("Профилирование уже идёт. /profile_stop")
+        return
+
+    try:
+        seconds = int(context.args[0]) if context.args else PROFILE_DEFAULT_SECONDS
+    except ValueError:
+        await update.message.reply_text("Укажи длительность в секундах: /profile 30")
+        return
+    seconds = max(1, min(seconds, PROFILE_MAX_SECONDS))
+
+    _stop_event = asyncio.Event()
+    # профилировщик работает в фоне, чтобы не держать хендлер N секунд
+    context.application.create_task(
+        _run_profile(context.application, update.effective_chat.id, seconds),
+        update=update,
+    )
+    await update.message.reply_text(
+        f"Профилирую {seconds} сек. Досрочно: /profile_stop"
+    )
+
+
+async def profile_stop_command(
+    update: Update, context: ContextTypes.DEFAULT_TYPE
+) -> None:
+    if _stop_event is None:
+        await update.message.reply_text("Профилирование не запущено.")
+        return
+    _stop_event.set()
+
+
+async def _run_profile(app: Application, chat_id: int, seconds: int) -> None:
+    global _stop_event
+
+    # редкая команда — не тянем pyinstrument при старте бота
+    from pyinstrument import Profiler
+
+    # sampling-профайлер потока event loop'а: видно все хендлеры и джобы
+    profiler = Profiler(interval=0.005, async_mode="disabled")
+    profiler.start()
+    try:
+        await asyncio.wait_for(_stop_event.wait(), timeout=seconds)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        profiler.stop()
+        _stop_event = None
+
+    html = await asyncio.to_thread(profiler.output_html)
+    stamp = datetime.now(TZ).strftime("%Y%m%d-%H%M%S")
+    await app.bot.send_document(
+        chat_id=chat_id,
+        document=html.encode("utf-8"),
+        filename=f"profile-{stamp}.html",
+        caption=f"Профиль за {profiler.last_session.duration:.1f} сек.",
+    )
+    log.info("Profile sent", chat_id=chat_id, seconds=seconds)
@@ -0,0 +1,34 @@
+from telegram import Update
+from telegram.constants import ParseMode
+from telegram.ext import ContextTypes
+
+from core.tenants import tenants_for_user
+from core.utils import html_escape
+
+ERRORS_PER_FOLDER = 3
+
+
+async def quarantine_command(
+    update: Update, context: ContextTypes.DEFAULT_TYPE
+) -> None:
+    reports = [
+        r
+        for tenant in tenants_for_user(update.effective_user.id)
+        for r in tenant.validation.quarantined()
+    ]
+    if not reports:
+        await update.message.reply_text("Карантин пуст.")
+        return
+
+    lines = [f"🚫 <b>В карантине: {len(reports)}</b>"]
+    for report in reports[:30]:  # ограничим вывод
+        lines.append(f"\n📦 <b>{html_escape(report.folder.rsplit('/', 1)[-1])}</b>")
+        for err in report.errors[:ERRORS_PER_FOLDER]:
+            lines.append(f"  • {html_escape(err)}")
+        if len(report.errors) > ERRORS_PER_FOLDER:
+            lines.append(f"  … ещё {len(report.errors) - ERRORS_PER_FOLDER}")
+    lines.append("\nИсправь файлы — папка перепроверится при следующем скане.")
+
+    await update.message.reply_text(
+        "\n".join(lines), parse_mode=ParseMode.HTML, disable_web_page_preview=True
+    )
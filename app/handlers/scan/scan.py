@@ -1,20 +1,27 @@
 from __future__ import annotations
 
+import asyncio
 import json
-
-from core.utils import html_escape, collect_images
+from contextlib import ExitStack
+from time import perf_counter
+
+from core.channel.media import MediaChunk, build_media
+from core.locks import folder_locks
+from core.rate_limit import RateLimiter
+from core.tenants import Tenant, all_tenants, tenants_for_user, TENANTS
+from core.thumbnails import preview_images
+from core.janitor import remember_preview
+from core.validation import filter_valid
+from core.keyboards import CARD, keyboard
+from core.templates import render_card
+from core.utils import collect_images, trim_text
 from storages.publication import TOKENS, JOBS
 from config.settings import MAX_CAPTION, MEDIA_GROUP_LIMIT
 
 import uuid
 from pathlib import Path
-from app.config.settings import settings
-from telegram import (
-    Update,
-    InlineKeyboardButton,
-    InlineKeyboardMarkup,
-    InputMediaPhoto,
-)
+from config.settings import settings
+from telegram import Update
 from telegram.constants import ParseMode
 from telegram.ext import (
     Application,
@@ -32,26 +39,31 @@ async def start_scan_command(
     update: Update, context: ContextTypes.DEFAULT_TYPE
 ) -> None:
     task_id = str(uuid.uuid4())  # Генерируем уникальный ID для задачи
-    await periodic_scan(context.application, task_id)
+    tenants = tenants_for_user(update.effective_user.id)
+    await periodic_scan(context.application, task_id, [t.name for t in tenants])
     await update.message.reply_text(f"Сканирование запущено с ID {task_id}")
 
 
-async def periodic_scan(app: Application, task_id: str) -> None:
+async def periodic_scan(
+    app: Application, task_id: str, tenant_names: list[str] | None = None
+) -> None:
     async def job_fn(ctx: ContextTypes.DEFAULT_TYPE) -> None:
-        try:
-            await process_scan(ctx)
-        except Exception:
-            log.exception("Periodic scan failed")
+        names = ctx.job.data or list(TENANTS)
+        tenants = [TENANTS[n] for n in names if n in TENANTS]
+        await process_scan(ctx.application, tenants)
 
     # Запускаем задачу и сохраняем в jobs
     job = app.job_queue.run_repeating(
-        job_fn, interval=tg_bot_settings.SCAN_INTERVAL, first=3
+        job_fn, interval=tg_bot_settings.SCAN_INTERVAL, first=3, data=tenant_names
     )
     JOBS[task_id] = job
 
 
 async def scan_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    await process_scan(context)
+    # ручной /scan проходит корень целиком, а не один тик
+    await process_scan(
+        context.application, tenants_for_user(update.effective_user.id), full=True
+    )
 
 
 async def stop_scan_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -77,60 +89,192 @@ async def stop_scan_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
             )
 
 
-async def process_scan(context: ContextTypes.DEFAULT_TYPE) -> None:
-    for entry in sorted(
-        tg_bot_settings.POSTS_ROOT.iterdir(), key=lambda p: p.name.lower()
-    ):
-        if not is_post_folder(entry):
+async def process_scan(
+    app: Application, tenants: list[Tenant] | None = None, full: bool = False
+) -> None:
+    """Сканирует тенантов конкурентно; сбой одного не мешает остальным.
+
+    Обычно это один тик на тенанта (до SCAN_BATCH папок); ``full`` — проход
+    корня целиком, тиками подряд.
+    """
+    tenants = all_tenants() if tenants is None else tenants
+    results = await asyncio.gather(
+        *(scan_tenant(app, t, full) for t in tenants), return_exceptions=True
+    )
+    for tenant, res in zip(tenants, results):
+        if isinstance(res, Exception):
+            log.error("Scan failed", tenant=tenant.name, exc_info=res)
+
+
+async def scan_tenant(app: Application, tenant: Tenant, full: bool = False) -> None:
+    # /scan и периодический скан не должны выслать одну папку дважды
+    async with folder_locks.hold(f"scan:{tenant.name}", "scan"):
+        if full:
+            tenant.scanner.reset()
+        await _sync_storage(tenant, full)
+        await _scan_tenant(app, tenant)
+        while full and tenant.scanner.in_pass:
+            await _scan_tenant(app, tenant)
+
+
+async def _sync_storage(tenant: Tenant, full: bool) -> None:
+    mirror = tenant.mirror
+    if mirror is None:
+        return
+    if not full and not mirror.due(tg_bot_settings.STORAGE_SYNC_INTERVAL):
+        return
+    # новые посты качаются под свободные слоты карточек, а не весь бакет;
+    # карантин ждёт правки в хранилище и окно не занимает
+    cap = tenant.max_pending_previews
+    window = max(0, cap - len(tenant.awaiting)) if cap > 0 else None
+    exclude = frozenset(Path(r.folder).name for r in tenant.validation.quarantined())
+    result = await asyncio.to_thread(mirror.sync, window, exclude)
+    # /scan докачивает всю пачку изменений, а не одну
+    while full and result.pending:
+        result = await asyncio.to_thread(mirror.sync, window, exclude)
+
+
+async def _scan_tenant(app: Application, tenant: Tenant) -> None:
+    queued = set(tenant.pending.load_all())
+    overflow: list[str] = []
+
+    started = perf_counter()
+    batch = tenant.scanner.next_batch(tg_bot_settings.SCAN_BATCH)
+    candidates: list[Path] = []
+    watch: list[str] = []
+    for entry in batch:
+        if not (entry / "meta.json").exists():
+            # ещё копируется — meta.json появится без изменения mtime корня
+            if entry.is_dir():
+                watch.append(entry.name)
             continue
-        lock = entry / ".lock"
-        if lock.exists():
+        if (entry / ".lock").exists() or str(entry) in queued:
             continue
+        candidates.append(entry)
+
+    valid = await filter_valid(app, tenant, candidates)
+    # карантин: исправленную папку подхватим без изменения корня
+    passed = set(valid)
+    watch += [entry.name for entry in candidates if entry not in passed]
+    tenant.scanner.finish(watch)
+    if batch:
+        log.debug(
+            "Scan tick",
+            tenant=tenant.name,
+            checked=len(batch),
+            candidates=len(candidates),
+            watch=len(watch),
+            in_pass=tenant.scanner.in_pass,
+            duration_ms=round((perf_counter() - started) * 1000, 1),
+        )
 
-        meta = parse_meta(entry / "meta.json")
-        images = collect_images(entry)
+    for entry in valid:
+        tenant.track("discovered", entry)
+        tenant.search.add(entry)
+        # очередь не пуста — новые папки встают за ней, чтобы не обгонять
+        if overflow or queued or not _has_preview_slot(tenant):
+            overflow.append(str(entry))
+            continue
 
-        # 1) Медиа-превью
-        await send_media_preview(
-            context.application,
-            tg_bot_settings.ADMIN_CHAT_ID,
-            images,
-            caption_trim(meta.get("title") or entry.name),
-        )
+        await preview_folder(app, tenant, entry)
 
-        # 2) Карточка с метаданными и кнопками
-        token = uuid.uuid4().hex[:12]
-        TOKENS[token] = str(entry)
-
-        keyboard = InlineKeyboardMarkup(
-            [
-                [
-                    InlineKeyboardButton(
-                        "✅ Утвердить и опубликовать", callback_data=f"approve:{token}"
-                    )
-                ],
-                [InlineKeyboardButton("⏭️ Пропустить", callback_data=f"skip:{token}")],
-            ]
-        )
-        await context.application.bot.send_message(
-            chat_id=tg_bot_settings.ADMIN_CHAT_ID,
-            text=build_preview_text(entry, meta, desc=None),
-            parse_mode=ParseMode.HTML,
-            reply_markup=keyboard,
-            disable_web_page_preview=True,
+    if overflow:
+        tenant.pending.extend(overflow)
+        log.info(
+            "Previews deferred",
+            tenant=tenant.name,
+            deferred=len(overflow),
+            awaiting=len(tenant.awaiting),
+            queue_depth=len(queued) + len(overflow),
         )
+    if overflow or queued:
+        # после рестарта awaiting пуст — очередь начинает разбираться сама
+        await release_pending(app, tenant)
+
+
+async def preview_folder(app: Application, tenant: Tenant, entry: Path) -> str:
+    """Отправляет админу превью и карточку с кнопками, ставит .lock."""
+    meta = parse_meta(entry / "meta.json")
+    images = collect_images(entry)
+
+    # 1) Медиа-превью
+    message_ids = await send_media_preview(
+        app,
+        tenant.admin_chat_id,
+        images,
+        trim_text(meta.get("title") or entry.name, MAX_CAPTION),
+        tenant.limiter,
+    )
+
+    # 2) Карточка с метаданными и кнопками
+    token = uuid.uuid4().hex[:12]
+    TOKENS[token] = str(entry)
+    tenant.awaiting.add(token)
+
+    await tenant.limiter.acquire()
+    card = await app.bot.send_message(
+        chat_id=tenant.admin_chat_id,
+        text=render_card(tenant, entry, meta, desc=None),
+        parse_mode=ParseMode.HTML,
+        reply_markup=keyboard(CARD, token),
+        disable_web_page_preview=True,
+    )
+    remember_preview(
+        tenant, entry, tenant.admin_chat_id, message_ids + [card.message_id]
+    )
+    tenant.track("previewed", entry, files=len(images))
+
+    # помечаем как отправленное
+    try:
+        (entry / ".lock").write_text(token, encoding="utf-8")
+    except Exception:
+        pass
+    return token
 
-        # помечаем как отправленное
-        try:
-            lock.write_text(token, encoding="utf-8")
-        except Exception:
-            pass
+
+def _has_preview_slot(tenant: Tenant) -> bool:
+    cap = tenant.max_pending_previews
+    return cap <= 0 or len(tenant.awaiting) < cap
+
+
+async def release_pending(app: Application, tenant: Tenant) -> None:
+    """Достаёт папки из очереди, пока есть свободные слоты под решения."""
+    # решения по карточкам приходят параллельно — слоты считаем под локом
+    async with folder_locks.hold(f"pending:{tenant.name}", "release_pending"):
+        await _release_pending(app, tenant)
+
+
+async def _release_pending(app: Application, tenant: Tenant) -> None:
+    while _has_preview_slot(tenant):
+        folder_str = tenant.pending.pop_next()
+        if folder_str is None:
+            return
+        entry = Path(folder_str)
+        # за время ожидания папку могли удалить или уже отправить
+        if not is_post_folder(entry) or (entry / ".lock").exists():
+            continue
+        await preview_folder(app, tenant, entry)
+
+
+async def on_decision(app: Application, tenant: Tenant, token: str | None) -> None:
+    """Карточка получила решение — освобождаем слот под следующее превью."""
+    if token:
+        tenant.awaiting.discard(token)
+    await release_pending(app, tenant)
 
 
 def is_post_folder(p: Path) -> bool:
     return p.is_dir() and (p / "meta.json").exists()
 
 
+def read_description(folder: Path) -> str | None:
+    desc_path = folder / "description.txt"
+    if not desc_path.exists():
+        return None
+    # без strip: подпись и карточка режут пробелы сами, не копируя весь текст
+    return desc_path.read_text("utf-8", errors="replace") or None
+
+
 def parse_meta(meta_path: Path) -> dict[str, str]:
     meta: dict[str, str] = {}
     try:
@@ -144,51 +288,36 @@ def parse_meta(meta_path: Path) -> dict[str, str]:
 
 
 async def send_media_preview(
-    app: Application, chat_id: int, images: list[Path], caption: str
-) -> None:
+    app: Application,
+    chat_id: int,
+    images: list[Path],
+    caption: str,
+    limiter: RateLimiter | None = None,
+) -> list[int]:
+    """Альбом миниатюр; вернёт id отправленных сообщений."""
     if not images:
-        await app.bot.send_message(chat_id=chat_id, text=caption or "(без изображений)")
-        return
+        if limiter:
+            await limiter.acquire()
+        msg = await app.bot.send_message(
+            chat_id=chat_id, text=caption or "(без изображений)"
+        )
+        return [msg.message_id]
+
+    # админу достаточно миниатюр, оригиналы уходят только в канал
+    images = await preview_images(images)
 
+    message_ids: list[int] = []
     first = True
     for i in range(0, len(images), MEDIA_GROUP_LIMIT):
-        chunk = images[i : i + MEDIA_GROUP_LIMIT]
-        media = []
-        for j, img in enumerate(chunk):
-            try:
-                f = img.open("rb")
-            except Exception as e:
-                log.warning("Cannot open %s: %s", img, e)
-                continue
-            if first and j == 0 and caption:
-                media.append(InputMediaPhoto(f, caption=caption))
-            else:
-                media.append(InputMediaPhoto(f))
-        if media:
-            await app.bot.send_media_group(chat_id=chat_id, media=media)
+        chunk = MediaChunk("photo", images[i : i + MEDIA_GROUP_LIMIT])
+        with ExitStack() as stack:
+            media = build_media(
+                stack, chunk, caption if first else None, app.bot.local_mode
+            )
+            if media:
+                if limiter:
+                    await limiter.acquire()
+                msgs = await app.bot.send_media_group(chat_id=chat_id, media=media)
+                message_ids += [m.message_id for m in msgs]
         first = False
-
-
-def caption_trim(text: str | None) -> str:
-    if not text:
-        return ""
-    text = text.strip()
-    return text if len(text) <= MAX_CAPTION else text[: MAX_CAPTION - 1] + "…"
-
-
-def build_preview_text(folder: Path, meta: dict[str, str], desc: str | None) -> str:
-    lines = [f"📦 <b>{html_escape(folder.name)}</b>"]
-
-    if meta:
-        for k, v in meta.items():
-            if isinstance(v, list):
-                v = ", ".join(v)
-            lines.append(f"<b>{html_escape(k)}:</b> {html_escape(str(v))}")
-
-    if desc:
-        short = desc.strip()
-        if len(short) > 500:
-            short = short[:500] + "…"
-        lines += ["", "<b>description.txt</b>:" + html_escape(short)]
-
-    return "\n".join(lines)
+    return message_ids
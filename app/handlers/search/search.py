@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from time import perf_counter
+from typing import NamedTuple
+
+from telegram import (
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    InlineQueryResultArticle,
+    InputTextMessageContent,
+    Update,
+)
+from telegram.constants import ParseMode
+from telegram.ext import ContextTypes
+
+from config.logger import get_logger
+from core.keyboards import SCHEDULE, keyboard
+from core.search import Hit, folder_key
+from core.templates import render_card
+from core.tenants import Tenant, all_tenants, find_job, tenants_for_user
+from core.timing import record
+from core.utils import html_escape, trim_text
+from core.validation import filter_valid
+from handlers.scan.scan import parse_meta, read_description
+from handlers.store.delay_posts import send_job_card
+from schemas.schema import ScheduledPost
+from storages.publication import TOKENS
+
+log = get_logger(__name__)
+
+FIND_LIMIT = 10
+INLINE_LIMIT = 20
+# длина заголовка в строке результата
+TITLE_LEN = 80
+# лимит Bot API на подпись кнопки
+BUTTON_LEN = 64
+
+
+class Found(NamedTuple):
+    tenant: Tenant
+    hit: Hit
+    # (job_id, задача), если пост запланирован
+    job: tuple[str, ScheduledPost] | None
+
+
+def find_posts(user_id: int, query: str, limit: int) -> list[Found]:
+    started = perf_counter()
+    found: list[Found] = []
+    for tenant in tenants_for_user(user_id):
+        hits = tenant.search.search(query, limit)
+        if not hits:
+            continue
+        jobs = {
+            str(item.folder): (job_id, item)
+            for job_id, item in tenant.scheduled.load_all().items()
+        }
+        # карантин не предлагается: его кнопки опубликовали бы битую папку
+        quarantined = {r.folder for r in tenant.validation.quarantined()}
+        for hit in hits:
+            if not hit.folder.exists():
+                # убрали мимо бота — индекс узнаёт об этом здесь
+                tenant.search.discard(hit.folder)
+                continue
+            if str(hit.folder) in quarantined:
+                continue
+            found.append(Found(tenant, hit, jobs.get(str(hit.folder))))
+    record("search", perf_counter() - started)
+    return found[:limit]
+
+
+def _card_token(folder: Path) -> str | None:
+    """Токен карточки поста из .lock; None — превью ещё не высылалось.
+
+    Новых токенов поиск не заводит: решение по токену карточки освобождает
+    её слот превью, а после рестарта возвращает к жизни и её кнопки.
+    """
+    try:
+        token = (folder / ".lock").read_text("utf-8").strip()
+    except OSError:
+        return None
+    if not token:
+        return None
+    TOKENS[token] = str(folder)
+    return token
+
+
+def _status(f: Found) -> str:
+    if f.job:
+        return "🕒 " + f.job[1].format_run_at()
+    if (f.hit.folder / ".lock").exists():
+        return "⏳ ждёт решения"
+    return "📥 в очереди на превью"
+
+
+def _button(label: str, **kwargs: str) -> InlineKeyboardButton:
+    return InlineKeyboardButton(trim_text(label, BUTTON_LEN), **kwargs)
+
+
+async def find_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    query = " ".join(context.args or [])
+    if not query.strip():
+        await update.message.reply_text(
+            "Укажи, что искать: /find <слова из названия, meta.json или описания>"
+        )
+        return
+    found = find_posts(update.effective_user.id, query, FIND_LIMIT)
+    if not found:
+        await update.message.reply_text("Ничего не найдено.")
+        return
+    app = context.application
+
+    show_tenant = len({f.tenant.name for f in found}) > 1
+    lines, rows = [], []
+    for f in found:
+        folder = f.hit.folder
+        prefix = f"[{html_escape(f.tenant.name)}] " if show_tenant else ""
+        title = trim_text(f.hit.title, TITLE_LEN)
+        title = f" — {html_escape(title)}" if title else ""
+        lines.append(
+            f"• {prefix}<b>{html_escape(folder.name)}</b>{title}\n  {_status(f)}"
+        )
+        if f.job:
+            # та же карточка задачи, что /view_job
+            data = f"view_job:{f.job[0]}"
+            rows.append([_button("🕒 " + folder.name, callback_data=data)])
+            continue
+        token = _card_token(folder)
+        # папку могли поменять после превью — кнопки только проверенной
+        if token and await filter_valid(app, f.tenant, [folder]):
+            data = f"schedule:{token}"
+            rows.append([_button("📅 " + folder.name, callback_data=data)])
+
+    await update.message.reply_text(
+        "\n".join(lines),
+        parse_mode=ParseMode.HTML,
+        reply_markup=InlineKeyboardMarkup(rows) if rows else None,
+        disable_web_page_preview=True,
+    )
+
+
+async def inline_find(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    iq = update.inline_query
+    found = find_posts(iq.from_user.id, iq.query, INLINE_LIMIT)
+    results = []
+    for i, f in enumerate(found):
+        folder = f.hit.folder
+        status = _status(f)
+        # кнопки инлайн-сообщения живут в чужом чате: пост открывается в
+        # личке с ботом через /start; токены заводятся только там
+        payload = f"job_{f.job[0]}" if f.job else f"post_{folder_key(folder)}"
+        url = f"https://t.me/{context.bot.username}?start={payload}"
+        results.append(
+            InlineQueryResultArticle(
+                id=str(i),
+                title=folder.name,
+                description=" · ".join(filter(None, [status, f.hit.title])),
+                input_message_content=InputTextMessageContent(
+                    f"<b>{html_escape(folder.name)}</b>\n{html_escape(status)}",
+                    parse_mode=ParseMode.HTML,
+                ),
+                reply_markup=InlineKeyboardMarkup(
+                    [[_button("Открыть в боте", url=url)]]
+                ),
+            )
+        )
+    # выдача зависит от каналов пользователя и меняется с каждым сканом
+    await iq.answer(results, cache_time=0, is_personal=True)
+
+
+async def open_link(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, payload: str
+) -> bool:
+    """/start с ссылки из инлайн-выдачи; False — не наша ссылка."""
+    kind, _, key = payload.partition("_")
+    chat_id = update.effective_chat.id
+    tenants = tenants_for_user(update.effective_user.id)
+    if kind == "job":
+        found = find_job(key, tenants)
+        if not found or not found[1].folder.exists():
+            await update.message.reply_text("Задача не найдена.")
+            return True
+        await send_job_card(context.application, chat_id, found[0], key, found[1])
+        return True
+    if kind != "post":
+        return False
+
+    found = [(t, t.search.folder(key)) for t in tenants]
+    tenant, folder = next(((t, f) for t, f in found if f is not None), (None, None))
+    if tenant is None or not folder.exists():
+        await update.message.reply_text("Пост не найден — найди его заново.")
+        return True
+    token = _card_token(folder)
+    if token is None:
+        await update.message.reply_text("Пост ещё в очереди — карточка придёт сама.")
+        return True
+    if not await filter_valid(context.application, tenant, [folder]):
+        await update.message.reply_text("Пост не прошёл проверку — см. /quarantine")
+        return True
+    await tenant.limiter.acquire()
+    await context.bot.send_message(
+        chat_id=chat_id,
+        text=render_card(
+            tenant, folder, parse_meta(folder / "meta.json"), read_description(folder)
+        ),
+        parse_mode=ParseMode.HTML,
+        reply_markup=keyboard(SCHEDULE, token),
+        disable_web_page_preview=True,
+    )
+    return True
+
+
+async def build_index_job(ctx: ContextTypes.DEFAULT_TYPE) -> None:
+    """Индекс поиска с нуля при старте; дальше он обновляется по ходу скана."""
+    for tenant in all_tenants():
+        started = perf_counter()
+        try:
+            posts = await asyncio.to_thread(tenant.search.build, tenant.posts_root)
+        except Exception:
+            log.exception("Search index build failed", tenant=tenant.name)
+            continue
+        log.info(
+            "Search index built",
+            tenant=tenant.name,
+            posts=posts,
+            duration_ms=round((perf_counter() - started) * 1000, 1),
+        )
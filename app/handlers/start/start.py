@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+from core.tenants import tenants_for_user
+from handlers.search.search import open_link
 from core.utils import html_escape
 
-from app.config.settings import settings
+from config.settings import settings
 from telegram import (
     Update,
 )
@@ -19,10 +21,24 @@ tg_bot_settings = settings.TGBOT
 
 
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    # t.me/<бот>?start=... — кнопка «Открыть» из инлайн-поиска
+    if context.args and await open_link(update, context, context.args[0]):
+        return
+    lines = []
+    for tenant in tenants_for_user(update.effective_user.id):
+        cap = tenant.max_pending_previews or "∞"
+        lines.append(
+            f"• <b>{html_escape(tenant.name)}</b>: "
+            f"папка <code>{html_escape(str(tenant.posts_root))}</code>, "
+            f"канал <code>{html_escape(tenant.channel_id)}</code>, "
+            f"ждут решения: {len(tenant.awaiting)} из {cap}, "
+            f"в очереди на превью: {tenant.pending.depth()}"
+        )
+    tenants_info = "".join(line + "\n" for line in lines)
     await update.effective_chat.send_message(
-        "Привет! Я слежу за папкой и отправляю посты на утверждение."
-        "Команды:• /scan — проверить папку сейчас"
-        f"• Папка: <code>{html_escape(str(tg_bot_settings.POSTS_ROOT))}</code>"
+        "Привет! Я слежу за папкой и отправляю посты на утверждение.\n"
+        "Команды:\n• /scan — проверить папку сейчас\n"
+        f"{tenants_info}"
         f"• Интервал сканирования: {tg_bot_settings.SCAN_INTERVAL} сек.",
         parse_mode=ParseMode.HTML,
     )
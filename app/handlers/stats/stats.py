@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+
+from telegram import Update
+from telegram.constants import ParseMode
+from telegram.ext import ContextTypes
+
+from config.settings import TZ
+from core.tenants import Tenant, tenants_for_user
+from core.utils import html_escape
+from schemas.schema import EventRollup
+from storages.event_log import LATENCY_BUCKETS
+
+# за сколько последних дней считать «в день»
+RECENT_DAYS = 7
+
+EVENT_LABELS = {
+    "discovered": "найдено",
+    "previewed": "превью",
+    "approved": "утверждено",
+    "scheduled": "запланировано",
+    "published": "опубликовано",
+    "skipped": "пропущено",
+    "failed": "сбоев",
+}
+
+
+async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    blocks = [
+        format_tenant_stats(tenant)
+        for tenant in tenants_for_user(update.effective_user.id)
+    ]
+    await update.message.reply_text(
+        "\n\n".join(blocks) or "Статистики пока нет.", parse_mode=ParseMode.HTML
+    )
+
+
+def format_tenant_stats(tenant: Tenant) -> str:
+    """Сводка из журнала событий: только готовые счётчики, без чтения истории."""
+    r = tenant.events.rollup()
+    lines = [f"📊 <b>{html_escape(tenant.name)}</b>"]
+    if not r.totals:
+        lines.append("Событий пока нет.")
+        return "\n".join(lines)
+
+    lines.append(
+        ", ".join(
+            f"{label}: {r.totals[event]}"
+            for event, label in EVENT_LABELS.items()
+            if r.totals.get(event)
+        )
+    )
+
+    approved, skipped = r.totals.get("approved", 0), r.totals.get("skipped", 0)
+    if approved + skipped:
+        lines.append(f"Одобрено: {approved / (approved + skipped):.0%}")
+
+    published = r.totals.get("published", 0)
+    if published:
+        lines.append(f"Средний альбом: {r.album_files / published:.1f} файла")
+
+    today = datetime.now(TZ).date()
+    recent = [
+        r.days.get((today - timedelta(days=i)).isoformat(), {}).get("published", 0)
+        for i in range(RECENT_DAYS)
+    ]
+    lines.append(
+        f"Публикаций в день за {RECENT_DAYS} дн.: {sum(recent) / RECENT_DAYS:.1f}"
+        f" (сегодня {recent[0]})"
+    )
+
+    if r.latency_count:
+        lines.append(
+            "От скана до канала: "
+            f"в среднем {_duration(r.latency_sum / r.latency_count)}, "
+            f"медиана {_median_bucket(r)}, "
+            f"максимум {_duration(r.latency_max)}"
+        )
+    if r.discovered_at:
+        lines.append(f"Ждут публикации: {len(r.discovered_at)}")
+    return "\n".join(lines)
+
+
+def _median_bucket(r: EventRollup) -> str:
+    # гистограмма корзинами: медиана — граница её корзины
+    half = r.latency_count / 2
+    seen = 0
+    for bound, count in zip(LATENCY_BUCKETS, r.latency_hist):
+        seen += count
+        if seen >= half:
+            return f"до {_duration(bound)}"
+    return f"больше {_duration(LATENCY_BUCKETS[-1])}"
+
+
+def _duration(seconds: float) -> str:
+    if seconds < 60:
+        return f"{seconds:.0f} сек"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} мин"
+    if seconds < 86400:
+        return f"{seconds / 3600:.1f} ч"
+    return f"{seconds / 86400:.1f} дн"
@@ -1,40 +1,46 @@
-from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
+from telegram import Update
 from telegram.constants import ParseMode
-from telegram.ext import ContextTypes
+from telegram.ext import Application, ContextTypes
 
-from config.settings import settings
-from core.channel.publisher import _is_under_posts_root
+from core.janitor import remember_preview
+from core.keyboards import JOB, keyboard
+from core.templates import render_caption, render_card
+from core.tenants import Tenant, find_job, tenants_for_user
 from core.utils import collect_images
 from handlers.scan.scan import (
     send_media_preview,
-    build_preview_text,
     parse_meta,
-    caption_trim,
+    read_description,
 )
-from storages import scheduled_store
+from schemas.schema import ScheduledPost
 from storages.publication import TOKENS
 
-tg_bot_settings = settings.TGBOT
-
 
 async def list_jobs_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     if not update.message:
         return
 
-    store = scheduled_store.load_all()
+    tenants = tenants_for_user(update.effective_user.id)
+    store = {
+        job_id: (tenant, item)
+        for tenant in tenants
+        for job_id, item in tenant.scheduled.load_all().items()
+    }
     if not store:
         await update.message.reply_text("Запланированных публикаций нет.")
         return
 
-    items = sorted(store.items(), key=lambda kv: kv[1].run_at)
+    items = sorted(store.items(), key=lambda kv: kv[1][1].run_at)
+    show_tenant = len(tenants) > 1
     lines = []
-    for job_id, item in items[:50]:  # ограничим вывод
+    for job_id, (tenant, item) in items[:50]:  # ограничим вывод
         if not item.folder.exists():
             status = " (папка отсутствует)"
         else:
             status = ""
+        prefix = f"[{tenant.name}] " if show_tenant else ""
         lines.append(
-            f"• <code>{job_id}</code> — {item.folder.name}{status}\n"
+            f"• <code>{job_id}</code> — {prefix}{item.folder.name}{status}\n"
             f"  🕒 { item.format_run_at() }"
         )
 
@@ -53,63 +59,51 @@ async def view_job_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -
         return
     job_id = args[0].strip()
 
-    store = scheduled_store.load_all()
-    item = store.get(job_id)
-    if not item:
+    found = find_job(job_id, tenants_for_user(update.effective_user.id))
+    if not found:
         await update.message.reply_text("Задача не найдена.")
         return
 
+    tenant, item = found
     folder = item.folder
-    if not folder.exists() or not _is_under_posts_root(folder):
+    if not folder.exists() or not tenant.owns(folder):
         await update.message.reply_text("Папка публикации недоступна.")
         return
 
+    await send_job_card(
+        context.application, update.effective_chat.id, tenant, job_id, item
+    )
+
+
+async def send_job_card(
+    app: Application, chat_id: int, tenant: Tenant, job_id: str, item: ScheduledPost
+) -> None:
+    """Превью запланированного поста и карточка с кнопками задачи."""
+    folder = item.folder
     # Обеспечим наличие токена→папки для кнопок publish_now/schedule
     TOKENS[item.token] = str(folder)
 
-    # Медиа-превью
+    # Медиа-превью — с той же подписью, что уйдёт в канал
     images = collect_images(folder)
-    desc_path = folder / "description.txt"
-    desc = (
-        desc_path.read_text("utf-8", errors="replace").strip()
-        if desc_path.exists()
-        else None
-    )
-    await send_media_preview(
-        context.application,
-        tg_bot_settings.ADMIN_CHAT_ID,
+    desc = read_description(folder)
+    meta = parse_meta(folder / "meta.json")
+    message_ids = await send_media_preview(
+        app,
+        chat_id,
         images,
-        caption_trim(desc or folder.name),
+        render_caption(tenant, folder, meta, desc),
+        tenant.limiter,
     )
 
     # Текстовая карточка + плановое время
-    meta = parse_meta(folder / "meta.json")
-    text = (
-        build_preview_text(folder, meta, desc)
-        + f"\n\n<b>🕒 Плановая публикация:</b> {item.format_run_at()}"
-    )
-
-    # Кнопки действий
-    kb = InlineKeyboardMarkup(
-        [
-            [
-                InlineKeyboardButton(
-                    "🟢 Сейчас", callback_data=f"publish_now:{item.token}"
-                )
-            ],
-            [
-                InlineKeyboardButton(
-                    "⏱ Перепланировать", callback_data=f"schedule:{item.token}"
-                )
-            ],
-            [
-                InlineKeyboardButton(
-                    "❌ Отменить задачу", callback_data=f"cancel_job:{job_id}"
-                )
-            ],
-        ]
-    )
-
-    await update.message.reply_text(
-        text, parse_mode=ParseMode.HTML, reply_markup=kb, disable_web_page_preview=True
+    footer = f"\n\n<b>🕒 Плановая публикация:</b> {item.format_run_at()}"
+    await tenant.limiter.acquire()
+    card = await app.bot.send_message(
+        chat_id=chat_id,
+        text=render_card(tenant, folder, meta, desc, footer),
+        parse_mode=ParseMode.HTML,
+        reply_markup=keyboard(JOB, item.token, job_id),
+        disable_web_page_preview=True,
     )
+    # уберётся вместе с остальными превью поста, когда он выйдет
+    remember_preview(tenant, folder, chat_id, message_ids + [card.message_id])
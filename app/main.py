@@ -1,24 +1,47 @@
+import sys
+from pathlib import Path
+from time import perf_counter
+
 from telegram import Update
 from telegram.ext import (
     Application,
     CallbackQueryHandler,
     CommandHandler,
+    ContextTypes,
+    InlineQueryHandler,
     MessageHandler,
     filters, TypeHandler,
 )
+from telegram.request import BaseRequest
 
 from config.logger import get_logger
 from config.settings import settings
 from core.channel.publisher import on_callback, on_schedule_text, restore_scheduled
+from core.http import bot_request, polling_request
+from core.janitor import cleanup_enabled, janitor_job
+from core.leader import leader, stand_by
+from core.recorder import UpdateRecorder
+from core.tenants import all_admin_ids, all_tenants
+from core.timing import timed
+from core.validation import shutdown_pool
 from core.utils import create_path_if_not_exists
 from handlers.gate.admin_gate import admin_gate
 from handlers.help.help import help_command
+from handlers.imports.imports import import_command
+from handlers.quarantine.quarantine import quarantine_command
+from handlers.search.search import build_index_job, find_command, inline_find
+from handlers.profiling.profiling import (
+    profile_command,
+    profile_stop_command,
+    timings_command,
+)
 from handlers.scan.scan import (
     scan_command,
     stop_scan_command,
     start_scan_command,
 )
 from handlers.start.start import start_command
+from handlers.stats.stats import stats_command
 from handlers.store.delay_posts import list_jobs_command, view_job_command
 
 log = get_logger(__name__)
@@ -26,46 +49,144 @@ log = get_logger(__name__)
 tg_bot_settings = settings.TGBOT
 
 
+async def _restore_job(ctx: ContextTypes.DEFAULT_TYPE) -> None:
+    started = perf_counter()
+    await restore_scheduled(ctx.application)
+    log.info(
+        "Scheduled posts restored",
+        duration_ms=round((perf_counter() - started) * 1000, 1),
+    )
+
+
+async def _heartbeat(ctx: ContextTypes.DEFAULT_TYPE) -> None:
+    if leader.try_acquire():
+        return
+    # процесс подвис дольше TTL, и лизу взял резерв: работать вдвоём нельзя
+    log.error("Leadership lost, stopping", leader=leader.current_holder())
+    ctx.application.stop_running()
+
+
 async def _post_init(app: Application) -> None:
-    await restore_scheduled(app)
+    if leader is not None:
+        app.job_queue.run_repeating(
+            _heartbeat,
+            interval=tg_bot_settings.LEADER_HEARTBEAT,
+            first=0,
+            name="leader_heartbeat",
+        )
+    if cleanup_enabled():
+        app.job_queue.run_repeating(
+            janitor_job,
+            interval=tg_bot_settings.PREVIEW_JANITOR_INTERVAL,
+            first=tg_bot_settings.PREVIEW_JANITOR_INTERVAL,
+            name="preview_janitor",
+        )
+    app.job_queue.run_once(build_index_job, when=0, name="search_index")
+    # восстановление расписания не должно задерживать первый ответ бота:
+    # джоба стартует вместе с polling'ом
+    app.job_queue.run_once(
+        _restore_job, when=tg_bot_settings.RESTORE_DELAY, name="restore_scheduled"
+    )
 
     log.info(
         "Bot started",
         extras={
-            "posts_root": tg_bot_settings.POSTS_ROOT,
+            "tenants": {t.name: str(t.posts_root) for t in all_tenants()},
             "scan_interval": tg_bot_settings.SCAN_INTERVAL,
+            "local_api": tg_bot_settings.LOCAL_API_URL or None,
         },
     )
 
 
-def main() -> None:
-    create_path_if_not_exists(tg_bot_settings.POSTS_ROOT)
+async def _post_shutdown(app: Application) -> None:
+    shutdown_pool()
+    if leader is not None:
+        leader.release()
+    for tenant in all_tenants():
+        tenant.events.close()
+    recorder = app.bot_data.get("recorder")
+    if recorder:
+        recorder.close()
+
+
+def prepare_storage() -> None:
+    for tenant in all_tenants():
+        create_path_if_not_exists(tenant.posts_root)
+        tenant.prepare()
+        tenant.storage.check()
 
-    application = (
+
+def build_application(request: BaseRequest | None = None) -> Application:
+    """Собирает Application без хендлеров; ``request`` — свой транспорт Bot API."""
+    builder = (
         Application.builder()
         .token(tg_bot_settings.BOT_TOKEN)
         .post_init(_post_init)
-        .build()
+        .post_shutdown(_post_shutdown)
+        # гонки за один пост разводят локи папок (core.locks)
+        .concurrent_updates(max(1, tg_bot_settings.CONCURRENT_UPDATES))
     )
+    if request is not None:
+        # bench.replay: поддельный Bot API вместо сети
+        builder = builder.request(request).get_updates_request(request)
+    else:
+        builder = builder.request(bot_request()).get_updates_request(polling_request())
+    if tg_bot_settings.LOCAL_API_URL:
+        # локальный Bot API: файлы отдаются путями file://, лимит загрузки 2 ГБ
+        url = tg_bot_settings.LOCAL_API_URL.rstrip("/")
+        builder = (
+            builder.base_url(f"{url}/bot")
+            .base_file_url(f"{url}/file/bot")
+            .local_mode(True)
+        )
+    return builder.build()
+
+
+def register_handlers(application: Application) -> None:
+    if tg_bot_settings.RECORD_UPDATES:
+        # раньше гейта: в запись попадают и отбитые апдейты
+        recorder = UpdateRecorder(Path(tg_bot_settings.RECORD_UPDATES))
+        application.bot_data["recorder"] = recorder
+        application.add_handler(TypeHandler(Update, recorder), group=-2)
     application.add_handler(TypeHandler(Update, admin_gate), group=-1)
 
-    application.add_handler(CommandHandler("help", help_command))
-    application.add_handler(CommandHandler("start", start_command))
-    application.add_handler(CommandHandler("scan", scan_command))
-    application.add_handler(CommandHandler("start_scan", start_scan_command))
-    application.add_handler(CommandHandler("stop_scan", stop_scan_command))
-    application.add_handler(CommandHandler("view_jobs", list_jobs_command))
-    application.add_handler(CommandHandler("view_job", view_job_command))
-    application.add_handler(CallbackQueryHandler(on_callback))
+    application.add_handler(CommandHandler("help", timed(help_command)))
+    application.add_handler(CommandHandler("start", timed(start_command)))
+    application.add_handler(CommandHandler("scan", timed(scan_command)))
+    application.add_handler(CommandHandler("start_scan", timed(start_scan_command)))
+    application.add_handler(CommandHandler("stop_scan", timed(stop_scan_command)))
+    application.add_handler(CommandHandler("view_jobs", timed(list_jobs_command)))
+    application.add_handler(CommandHandler("view_job", timed(view_job_command)))
+    application.add_handler(CommandHandler("quarantine", timed(quarantine_command)))
+    application.add_handler(CommandHandler("stats", timed(stats_command)))
+    application.add_handler(CommandHandler("find", timed(find_command)))
+    application.add_handler(CommandHandler("import", timed(import_command)))
+    application.add_handler(CommandHandler("timings", timings_command))
+    application.add_handler(CommandHandler("profile", profile_command))
+    application.add_handler(CommandHandler("profile_stop", profile_stop_command))
+    application.add_handler(CallbackQueryHandler(timed(on_callback)))
+    application.add_handler(InlineQueryHandler(timed(inline_find)))
     application.add_handler(
         MessageHandler(
             filters.TEXT
             & ~filters.COMMAND
-            & filters.User(user_id=tg_bot_settings.ADMIN_CHAT_ID),
-            on_schedule_text,
+            & filters.User(user_id=all_admin_ids()),
+            timed(on_schedule_text),
         )
     )
+
+
+def main() -> None:
+    prepare_storage()
+    if leader is not None:
+        # резерв ждёт здесь: без polling'а, скана и плановых публикаций
+        stand_by(leader)
+    application = build_application()
+    register_handlers(application)
     application.run_polling(close_loop=False)
+    if leader is not None and leader.lost:
+        # перезапуск супервизором вернёт процесс в резерв
+        sys.exit(1)
 
 
 if __name__ == "__main__":
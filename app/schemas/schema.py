@@ -1,11 +1,33 @@
 from datetime import datetime, timezone
 from pathlib import Path
 
-from pydantic import BaseModel, field_validator, field_serializer, ConfigDict
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    field_serializer,
+    field_validator,
+    model_validator,
+)
 
 from config.settings import TZ
 
 
+class StagedMedia(BaseModel):
+    """Медиа поста, заранее загруженные в служебный чат (file_id по чанкам)."""
+
+    fingerprint: str  # сигнатура папки на момент загрузки
+    kinds: list[str]  # photo / document на каждый чанк
+    names: list[list[str]]  # имена файлов по чанкам (план публикации)
+    file_ids: list[list[str]]
+    staged_at: datetime
+
+    model_config = ConfigDict(extra="ignore")
+
+    @field_serializer("staged_at")
+    def _ser_staged_at(self, v: datetime, _info):
+        return v.astimezone(timezone.utc).isoformat()
+
+
 class ScheduledPost(BaseModel):
     """Запись о запланированной публикации."""
 
@@ -13,6 +35,9 @@ class ScheduledPost(BaseModel):
     folder: Path  # путь к папке поста
     channel: int | str  # канал (@name или -100...)
     run_at: datetime  # UTC!
+    attempts: int = 0  # неудачных попыток публикации
+    tenant: str = "default"  # имя тенанта (чей стор и чей канал)
+    staged: StagedMedia | None = None  # предзагрузка (core.channel.staging)
 
     model_config = ConfigDict(
         str_strip_whitespace=True,
@@ -39,3 +64,116 @@ class ScheduledPost(BaseModel):
     def format_run_at(self) -> str:
         local = self.run_at.astimezone(TZ)
         return f"{local:%Y-%m-%d %H:%M} ({TZ.key}), UTC: {self.run_at:%Y-%m-%d %H:%M}"
+
+
+class PublishRecord(BaseModel):
+    """Журнал публикации поста: какие чанки альбома уже доставлены."""
+
+    chunks: list[list[str]]  # имена файлов по чанкам (план публикации)
+    delivered: dict[int, list[int]] = {}  # индекс чанка -> message_id в канале
+    # чанк, отправка которого оборвалась таймаутом: дошёл ли он — неизвестно
+    uncertain: int | None = None
+    updated_at: datetime
+
+    model_config = ConfigDict(extra="ignore")
+
+    @field_serializer("updated_at")
+    def _ser_updated_at(self, v: datetime, _info):
+        return v.astimezone(timezone.utc).isoformat()
+
+    def next_chunk(self) -> int:
+        """Индекс первого недоставленного чанка."""
+        for i in range(len(self.chunks)):
+            if i not in self.delivered:
+                return i
+        return len(self.chunks)
+
+
+class PreviewMessages(BaseModel):
+    """Сообщения одного превью поста (альбом миниатюр и карточка) в чате админа."""
+
+    chat_id: int | str
+    message_ids: list[int]
+    sent_at: datetime
+    # когда удалить; None — пост ещё ждёт решения
+    delete_after: datetime | None = None
+
+    model_config = ConfigDict(extra="ignore")
+
+    @field_serializer("sent_at", "delete_after")
+    def _ser_dt(self, v: datetime | None, _info):
+        return v.astimezone(timezone.utc).isoformat() if v else None
+
+
+class EventRollup(BaseModel):
+    """Сводка журнала событий постов, обновляемая на каждом событии."""
+
+    segment: int = 1  # номер текущего куска журнала
+    offset: int = 0  # до какого байта текущего куска сводка учтена
+    totals: dict[str, int] = {}  # событие -> сколько всего
+    days: dict[str, dict[str, int]] = {}  # день (TZ) -> {событие: сколько}
+    discovered_at: dict[str, float] = {}  # пост, ждущий публикации -> когда найден
+    # путь от скана до канала, секунды
+    latency_count: int = 0
+    latency_sum: float = 0.0
+    latency_max: float = 0.0
+    latency_hist: list[int] = []  # по LATENCY_BUCKETS, последний — всё дольше
+    album_files: int = 0  # файлов во всех опубликованных альбомах
+
+    model_config = ConfigDict(extra="ignore")
+
+
+class PostMeta(BaseModel):
+    """Схема meta.json: плоский объект, значения — скаляры или списки скаляров."""
+
+    title: str | None = None
+
+    model_config = ConfigDict(extra="allow")
+
+    @model_validator(mode="before")
+    @classmethod
+    def _flat_object(cls, data):
+        if not isinstance(data, dict):
+            raise ValueError("meta.json должен быть JSON-объектом")
+        for k, v in data.items():
+            items = v if isinstance(v, list) else [v]
+            if any(isinstance(x, (dict, list)) for x in items):
+                raise ValueError(f"поле {k!r}: вложенные объекты не поддерживаются")
+        return data
+
+
+class ValidationReport(BaseModel):
+    """Результат проверки папки поста."""
+
+    folder: str
+    fingerprint: str
+    errors: list[str] = []
+    checked_at: datetime | None = None
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    @field_serializer("checked_at")
+    def _ser_checked_at(self, v: datetime | None, _info):
+        return v.astimezone(timezone.utc).isoformat() if v else None
+
+
+class MirrorState(BaseModel):
+    """Что из внешнего хранилища уже скачано в рабочую копию POSTS_ROOT."""
+
+    # {пост: {имя файла: версия}}
+    files: dict[str, dict[str, str]] = {}
+
+
+class ScanState(BaseModel):
+    """Курсор скана POSTS_ROOT между тиками."""
+
+    # mtime корня на начало последнего завершённого прохода
+    root_mtime_ns: int | None = None
+    # mtime корня на начало текущего прохода
+    pass_mtime_ns: int | None = None
+    # последняя проверенная папка прохода; None — прохода нет
+    cursor: str | None = None
+    # папки без meta.json или в карантине: перепроверяются каждый тик
+    watch: list[str] = []
@@ -0,0 +1,167 @@
+import json
+import os
+from bisect import bisect_left
+from datetime import datetime
+from pathlib import Path
+from time import time
+from typing import IO
+
+from config.settings import TZ
+from schemas.schema import EventRollup
+from storages.scheduled_store import _atomic_write_text
+
+EVENTS_FILE_NAME = "events.jsonl"
+ROLLUP_FILE_NAME = ".event_rollup.json"
+
+EVENTS = (
+    "discovered",
+    "previewed",
+    "approved",
+    "scheduled",
+    "published",
+    "skipped",
+    "failed",
+)
+# границы корзин гистограммы «скан → канал», секунды
+LATENCY_BUCKETS = (300, 900, 3600, 3 * 3600, 12 * 3600, 86400, 3 * 86400, 7 * 86400)
+# сводка пишется на диск раз в столько событий; потерянный хвост дочитается
+FLUSH_EVERY = 20
+
+
+class EventLog:
+    """Журнал событий постов тенанта (JSONL, только дописывается) и сводка.
+
+    Сводка обновляется на каждом событии и раз в FLUSH_EVERY событий пишется
+    на диск вместе с позицией в журнале, до которой она учтена: после рестарта
+    дочитывается только хвост, а /stats не зависит от объёма истории.
+    Журнал длиннее ``max_bytes`` откладывается в ``events.<n>.jsonl``;
+    куски сверх ``keep`` удаляются — в сводке они уже учтены. Дни старше
+    ``days`` из сводки тоже выбрасываются.
+    """
+
+    def __init__(self, state_dir: Path, max_bytes: int, keep: int, days: int) -> None:
+        self.path = state_dir / EVENTS_FILE_NAME
+        self.rollup_path = state_dir / ROLLUP_FILE_NAME
+        self.max_bytes = max_bytes
+        self.keep = keep
+        self.days = days
+        self._rollup: EventRollup | None = None
+        self._file: IO[bytes] | None = None
+        self._unflushed = 0
+
+    def emit(self, event: str, post: str, **fields: object) -> None:
+        rollup = self.rollup()
+        entry = {"ts": round(time(), 3), "event": event, "post": post, **fields}
+        if _day(entry["ts"]) not in rollup.days:
+            # раз в сутки: окно статистики сдвинулось
+            _compact(rollup, self.days)
+        line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+        if self._file is None:
+            self._file = self.path.open("ab")
+        self._file.write(line)
+        self._file.flush()
+        _apply(rollup, entry)
+        rollup.offset += len(line)
+        self._unflushed += 1
+        if rollup.offset >= self.max_bytes:
+            self._rotate()
+        elif self._unflushed >= FLUSH_EVERY:
+            self.flush()
+
+    def rollup(self) -> EventRollup:
+        if self._rollup is None:
+            self._rollup = self._load()
+        return self._rollup
+
+    def flush(self) -> None:
+        if self._rollup is not None and self._unflushed:
+            _atomic_write_text(self.rollup_path, self._rollup.model_dump_json())
+            self._unflushed = 0
+
+    def close(self) -> None:
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _load(self) -> EventRollup:
+        try:
+            rollup = EventRollup.model_validate_json(self.rollup_path.read_bytes())
+        except Exception:
+            rollup = EventRollup()
+        try:
+            data = self.path.read_bytes()
+        except FileNotFoundError:
+            data = b""
+        if rollup.offset > len(data):
+            # упали посреди ротации: прежний кусок уже учтён и отложен
+            rollup.segment += 1
+            rollup.offset = 0
+        tail = data[rollup.offset :]
+        complete = tail.rfind(b"\n") + 1
+        if complete < len(tail):
+            # оборванная последняя строка — следующая запись пойдёт с новой
+            with self.path.open("r+b") as f:
+                f.truncate(rollup.offset + complete)
+        for raw in tail[:complete].splitlines():
+            try:
+                _apply(rollup, json.loads(raw))
+            except Exception:
+                continue
+            self._unflushed += 1
+        rollup.offset += complete
+        return rollup
+
+    def _rotate(self) -> None:
+        rollup = self.rollup()
+        # сводка с учтённым куском целиком — до переименования
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        os.replace(self.path, self.path.with_name(f"events.{rollup.segment}.jsonl"))
+        old = rollup.segment - self.keep
+        self.path.with_name(f"events.{old}.jsonl").unlink(missing_ok=True)
+        rollup.segment += 1
+        rollup.offset = 0
+        _compact(rollup, self.days)
+        self._unflushed += 1
+        self.flush()
+
+
+def _apply(rollup: EventRollup, entry: dict) -> None:
+    event, post, ts = entry["event"], entry["post"], entry["ts"]
+    rollup.totals[event] = rollup.totals.get(event, 0) + 1
+    day = rollup.days.setdefault(_day(ts), {})
+    day[event] = day.get(event, 0) + 1
+
+    if event == "discovered":
+        rollup.discovered_at.setdefault(post, ts)
+    elif event == "skipped":
+        rollup.discovered_at.pop(post, None)
+    elif event == "published":
+        rollup.album_files += entry.get("files", 0)
+        found = rollup.discovered_at.pop(post, None)
+        if found is None:
+            return
+        latency = max(0.0, ts - found)
+        rollup.latency_count += 1
+        rollup.latency_sum += latency
+        rollup.latency_max = max(rollup.latency_max, latency)
+        hist = rollup.latency_hist
+        hist += [0] * (len(LATENCY_BUCKETS) + 1 - len(hist))
+        hist[bisect_left(LATENCY_BUCKETS, latency)] += 1
+
+
+def _compact(rollup: EventRollup, days: int) -> None:
+    """Выбросить дни за окном и посты, найденные раньше него."""
+    cutoff = time() - days * 86400
+    first_day = _day(cutoff)
+    rollup.days = {d: v for d, v in rollup.days.items() if d >= first_day}
+    rollup.discovered_at = {
+        p: ts for p, ts in rollup.discovered_at.items() if ts >= cutoff
+    }
+
+
+def _day(ts: float) -> str:
+    return datetime.fromtimestamp(ts, TZ).date().isoformat()
@@ -0,0 +1,25 @@
+import json
+from pathlib import Path
+
+from schemas.schema import MirrorState
+from storages.scheduled_store import _atomic_write_text
+
+MIRROR_STATE_FILE_NAME = ".storage_mirror.json"
+
+
+class MirrorStateStore:
+    """Версии файлов рабочей копии: MirrorState в JSON-файле."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def load(self) -> MirrorState:
+        if not self.path.exists():
+            return MirrorState()
+        try:
+            return MirrorState.model_validate_json(self.path.read_text("utf-8"))
+        except Exception:
+            return MirrorState()
+
+    def save(self, state: MirrorState) -> None:
+        _atomic_write_text(self.path, state.model_dump_json(indent=2))
@@ -0,0 +1,44 @@
+import json
+from pathlib import Path
+
+from storages.scheduled_store import _atomic_write_text
+
+QUEUE_FILE_NAME = ".pending_previews.json"
+
+
+class PendingQueue:
+    """Папки тенанта, ждущие превью, в порядке обнаружения."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def load_all(self) -> list[str]:
+        if not self.path.exists():
+            return []
+        try:
+            raw = json.loads(self.path.read_text("utf-8"))
+        except Exception:
+            return []
+        return [str(x) for x in raw] if isinstance(raw, list) else []
+
+    def save_all(self, items: list[str]) -> None:
+        _atomic_write_text(self.path, json.dumps(items, ensure_ascii=False, indent=2))
+
+    def extend(self, folders: list[str]) -> None:
+        if not folders:
+            return
+        items = self.load_all()
+        seen = set(items)
+        items += [f for f in folders if f not in seen]
+        self.save_all(items)
+
+    def pop_next(self) -> str | None:
+        items = self.load_all()
+        if not items:
+            return None
+        head = items.pop(0)
+        self.save_all(items)
+        return head
+
+    def depth(self) -> int:
+        return len(self.load_all())
@@ -0,0 +1,83 @@
+import json
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from schemas.schema import PreviewMessages
+from storages.scheduled_store import _atomic_write_text
+
+PREVIEWS_FILE_NAME = ".preview_messages.json"
+
+
+class PreviewStore:
+    """Превью постов в чатах админов: {папка поста: [PreviewMessages]}."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def load_all(self) -> dict[str, list[PreviewMessages]]:
+        if not self.path.exists():
+            return {}
+        try:
+            raw = json.loads(self.path.read_text("utf-8"))
+        except Exception:
+            return {}
+
+        out: dict[str, list[PreviewMessages]] = {}
+        for key, payload in raw.items():
+            try:
+                out[key] = [PreviewMessages.model_validate(p) for p in payload]
+            except Exception:
+                continue
+        return out
+
+    def save_all(self, data: dict[str, list[PreviewMessages]]) -> None:
+        raw = {k: [p.model_dump() for p in v] for k, v in data.items() if v}
+        _atomic_write_text(self.path, json.dumps(raw, ensure_ascii=False, indent=2))
+
+    def add(self, key: str, chat_id: int | str, message_ids: list[int]) -> None:
+        if not message_ids:
+            return
+        store = self.load_all()
+        store.setdefault(key, []).append(
+            PreviewMessages(
+                chat_id=chat_id,
+                message_ids=message_ids,
+                sent_at=datetime.now(timezone.utc),
+            )
+        )
+        self.save_all(store)
+
+    def retire(self, key: str, delay: float) -> int:
+        """Решение по посту принято: его превью удалить через ``delay`` секунд.
+
+        Превью, отправленные позже (папку снова показали), не трогаются.
+        Вернёт число сообщений, поставленных на удаление.
+        """
+        store = self.load_all()
+        due = datetime.now(timezone.utc) + timedelta(seconds=delay)
+        count = 0
+        for item in store.get(key, []):
+            if item.delete_after is None:
+                item.delete_after = due
+                count += len(item.message_ids)
+        if count:
+            self.save_all(store)
+        return count
+
+    def due(self, now: datetime) -> list[tuple[str, PreviewMessages]]:
+        return [
+            (key, item)
+            for key, items in self.load_all().items()
+            for item in items
+            if item.delete_after is not None and item.delete_after <= now
+        ]
+
+    def discard(self, done: list[tuple[str, PreviewMessages]]) -> None:
+        if not done:
+            return
+        store = self.load_all()
+        for key, item in done:
+            items = store.get(key, [])
+            if item in items:
+                items.remove(item)
+        self.save_all(store)
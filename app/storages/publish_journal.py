@@ -0,0 +1,104 @@
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+from schemas.schema import PublishRecord
+from storages.scheduled_store import _atomic_write_text
+
+JOURNAL_FILE_NAME = ".publish_journal.json"
+
+
+class PublishJournal:
+    """Журнал публикаций тенанта: {папка поста: PublishRecord}."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def load_all(self) -> dict[str, PublishRecord]:
+        if not self.path.exists():
+            return {}
+        try:
+            raw = json.loads(self.path.read_text("utf-8"))
+        except Exception:
+            return {}
+
+        out: dict[str, PublishRecord] = {}
+        for key, payload in raw.items():
+            try:
+                out[key] = PublishRecord.model_validate(payload)
+            except Exception:
+                continue
+        return out
+
+    def save_all(self, data: dict[str, PublishRecord]) -> None:
+        raw = {k: v.model_dump() for k, v in data.items()}
+        _atomic_write_text(self.path, json.dumps(raw, ensure_ascii=False, indent=2))
+
+    def begin(self, key: str, chunks: list[list[str]]) -> PublishRecord:
+        """Вернёт журнал поста с планом ``chunks``.
+
+        Если план поменялся, отметки о доставке сохраняются для общего
+        префикса старого и нового плана — эти чанки уже в канале.
+        """
+        store = self.load_all()
+        record = store.get(key)
+        if record is None or record.chunks != chunks:
+            delivered = {}
+            if record is not None:
+                for i, (old, new) in enumerate(zip(record.chunks, chunks)):
+                    if old != new or i not in record.delivered:
+                        break
+                    delivered[i] = record.delivered[i]
+            record = PublishRecord(
+                chunks=chunks,
+                delivered=delivered,
+                updated_at=datetime.now(timezone.utc),
+            )
+            store[key] = record
+            self.save_all(store)
+        return record
+
+    def mark_uncertain(self, key: str, index: int) -> None:
+        store = self.load_all()
+        record = store.get(key)
+        if record is None:
+            return
+        record.uncertain = index
+        record.updated_at = datetime.now(timezone.utc)
+        self.save_all(store)
+
+    def resolve_uncertain(self, key: str, delivered: bool) -> None:
+        """Решение админа по чанку под вопросом: дошёл он до канала или нет."""
+        store = self.load_all()
+        record = store.get(key)
+        if record is None or record.uncertain is None:
+            return
+        if delivered:
+            # message_id неизвестны: чанк лишь не отправляется повторно
+            record.delivered[record.uncertain] = []
+        record.uncertain = None
+        record.updated_at = datetime.now(timezone.utc)
+        self.save_all(store)
+
+    def delivered_chunks(self, key: str) -> list[list[str]]:
+        """Имена файлов уже доставленных чанков (префикс плана) или []."""
+        record = self.load_all().get(key)
+        if record is None:
+            return []
+        return record.chunks[: record.next_chunk()]
+
+    def mark_delivered(self, key: str, index: int, message_ids: list[int]) -> None:
+        store = self.load_all()
+        record = store.get(key)
+        if record is None:
+            return
+        record.delivered[index] = message_ids
+        record.updated_at = datetime.now(timezone.utc)
+        self.save_all(store)
+
+    def pop(self, key: str) -> PublishRecord | None:
+        store = self.load_all()
+        record = store.pop(key, None)
+        if record is not None:
+            self.save_all(store)
+        return record
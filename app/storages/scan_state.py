@@ -0,0 +1,25 @@
+import json
+from pathlib import Path
+
+from schemas.schema import ScanState
+from storages.scheduled_store import _atomic_write_text
+
+SCAN_STATE_FILE_NAME = ".scan_state.json"
+
+
+class ScanStateStore:
+    """Курсор скана тенанта: ScanState в JSON-файле."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def load(self) -> ScanState:
+        if not self.path.exists():
+            return ScanState()
+        try:
+            return ScanState.model_validate_json(self.path.read_text("utf-8"))
+        except Exception:
+            return ScanState()
+
+    def save(self, state: ScanState) -> None:
+        _atomic_write_text(self.path, state.model_dump_json(indent=2))
@@ -2,10 +2,9 @@ import json
 import os
 from pathlib import Path
 
-from app.config.settings import settings
 from schemas.schema import ScheduledPost
 
-SCHEDULE_FILE = settings.TGBOT.POSTS_ROOT / Path(".scheduled_posts.json")
+SCHEDULE_FILE_NAME = ".scheduled_posts.json"
 
 
 def _atomic_write_text(path: Path, text: str) -> None:
@@ -14,53 +13,74 @@ def _atomic_write_text(path: Path, text: str) -> None:
     os.replace(tmp, path)
 
 
-def load_all() -> dict[str, ScheduledPost]:
-    """Вернёт {job_id: ScheduledPost}."""
-    if not SCHEDULE_FILE.exists():
-        return {}
+def _signature(path: Path) -> tuple[int, int, int] | None:
     try:
-        raw = json.loads(SCHEDULE_FILE.read_text("utf-8"))
-    except Exception:
-        return {}
-
-    out: dict[str, ScheduledPost] = {}
-    for job_id, payload in raw.items():
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    # запись идёт через os.replace — у нового файла новый inode
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+class ScheduledStore:
+    """Запланированные публикации тенанта: {job_id: ScheduledPost} в JSON-файле.
+
+    Разобранный файл кэшируется, пока не изменился на диске: чтение — один
+    stat. Файл может писать и другой процесс (резерв, см. core.leader).
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._cache: dict[str, ScheduledPost] = {}
+        self._signature: tuple[int, int, int] | None = None
+
+    def load_all(self) -> dict[str, ScheduledPost]:
+        """Вернёт {job_id: ScheduledPost}."""
+        sig = _signature(self.path)
+        if sig is None:
+            return {}
+        if sig == self._signature:
+            return dict(self._cache)
         try:
-            out[job_id] = ScheduledPost.model_validate(payload)
+            raw = json.loads(self.path.read_text("utf-8"))
         except Exception:
-            continue
-    return out
-
-
-def save_all(data: dict[str, ScheduledPost]) -> None:
-    raw = {k: v.model_dump() for k, v in data.items()}
-    _atomic_write_text(SCHEDULE_FILE, json.dumps(raw, ensure_ascii=False, indent=2))
-
-
-def add(job_id: str, item: ScheduledPost) -> None:
-    store = load_all()
-    store[job_id] = item
-    save_all(store)
-
-
-def pop(job_id: str) -> ScheduledPost | None:
-    store = load_all()
-    item = store.pop(job_id, None)
-    save_all(store)
-    return item
-
-
-def get(job_id: str) -> ScheduledPost | None:
-    return load_all().get(job_id)
-
-
-def prune_missing_folders() -> tuple[int, int]:
-    """Удаляет записи, чьи папки отсутствуют. Возвращает (удалено, осталось)."""
-    store = load_all()
-    removed = 0
-    for job_id, item in list(store.items()):
-        if not item.folder.exists():
-            store.pop(job_id, None)
-            removed += 1
-    save_all(store)
-    return removed, len(store)
+            return {}
+
+        out: dict[str, ScheduledPost] = {}
+        for job_id, payload in raw.items():
+            try:
+                out[job_id] = ScheduledPost.model_validate(payload)
+            except Exception:
+                continue
+        self._cache, self._signature = out, sig
+        return dict(out)
+
+    def save_all(self, data: dict[str, ScheduledPost]) -> None:
+        raw = {k: v.model_dump() for k, v in data.items()}
+        _atomic_write_text(self.path, json.dumps(raw, ensure_ascii=False, indent=2))
+        self._cache, self._signature = dict(data), _signature(self.path)
+
+    def add(self, job_id: str, item: ScheduledPost) -> None:
+        store = self.load_all()
+        store[job_id] = item
+        self.save_all(store)
+
+    def pop(self, job_id: str) -> ScheduledPost | None:
+        store = self.load_all()
+        item = store.pop(job_id, None)
+        self.save_all(store)
+        return item
+
+    def get(self, job_id: str) -> ScheduledPost | None:
+        return self.load_all().get(job_id)
+
+    def prune_missing_folders(self) -> tuple[int, int]:
+        """Удаляет записи, чьи папки отсутствуют. Возвращает (удалено, осталось)."""
+        store = self.load_all()
+        removed = 0
+        for job_id, item in list(store.items()):
+            if not item.folder.exists():
+                store.pop(job_id, None)
+                removed += 1
+        self.save_all(store)
+        return removed, len(store)
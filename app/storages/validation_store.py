@@ -0,0 +1,61 @@
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+from schemas.schema import ValidationReport
+from storages.scheduled_store import _atomic_write_text
+
+VALIDATION_FILE_NAME = ".validation_cache.json"
+
+
+def _checked(report: ValidationReport) -> datetime:
+    return report.checked_at or datetime.min.replace(tzinfo=timezone.utc)
+
+
+class ValidationStore:
+    """Кэш проверок тенанта: {сигнатура содержимого: ValidationReport}."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def load_all(self) -> dict[str, ValidationReport]:
+        if not self.path.exists():
+            return {}
+        try:
+            raw = json.loads(self.path.read_text("utf-8"))
+        except Exception:
+            return {}
+
+        out: dict[str, ValidationReport] = {}
+        for fp, payload in raw.items():
+            try:
+                out[fp] = ValidationReport.model_validate(payload)
+            except Exception:
+                continue
+        return out
+
+    def save_all(self, data: dict[str, ValidationReport]) -> None:
+        # по папке храним только последний отчёт: старые сигнатуры после правок
+        # файлов уже не встретятся; записи по удалённым папкам не нужны
+        latest: dict[str, tuple[str, ValidationReport]] = {}
+        for fp, report in data.items():
+            prev = latest.get(report.folder)
+            if prev is None or _checked(report) > _checked(prev[1]):
+                latest[report.folder] = (fp, report)
+        raw = {
+            fp: report.model_dump()
+            for folder, (fp, report) in latest.items()
+            if Path(folder).exists()
+        }
+        _atomic_write_text(self.path, json.dumps(raw, ensure_ascii=False, indent=2))
+
+    def quarantined(self) -> list[ValidationReport]:
+        """Актуальные отчёты по папкам с ошибками, свежие сверху."""
+        latest: dict[str, ValidationReport] = {}
+        for report in self.load_all().values():
+            if report.ok or not Path(report.folder).exists():
+                continue
+            prev = latest.get(report.folder)
+            if prev is None or report.checked_at > prev.checked_at:
+                latest[report.folder] = report
+        return sorted(latest.values(), key=lambda r: r.checked_at, reverse=True)